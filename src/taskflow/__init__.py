@@ -1 +1,37 @@
 """TaskFlow package (student practice project)."""
+
+import importlib
+
+# Submodules load on first attribute access (`taskflow.db`, `taskflow.cli`, ...),
+# and `taskflow.main` imports the GUI only when used, so `import taskflow`
+# stays cheap and never loads Tkinter (see tests/test_importtime.py).
+_SUBMODULES = {
+    "aio",
+    "backup",
+    "bench",
+    "cli",
+    "db",
+    "init_db",
+    "instrument",
+    "migrations",
+    "pool",
+    "queries",
+    "records",
+    "sharded",
+    "storage",
+    "ui",
+}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name == "main":
+        from taskflow.ui import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | _SUBMODULES | {"main"})
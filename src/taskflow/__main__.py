@@ -1,6 +1,21 @@
-from taskflow.ui import main
+import sys
+
+
+# `taskflow` starts the GUI; `taskflow <command> ...` runs a headless command
+# (see taskflow.cli). The GUI is imported only when needed, so scripts never load Tk.
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        from taskflow.ui import main as gui_main
+
+        gui_main()
+        return 0
+
+    from taskflow.cli import main as cli_main
+
+    return cli_main(args)
 
 
 # only run main() when this file is executed directly
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from taskflow import db
+
+# asyncio front end for taskflow.db.
+#
+# Every db function runs on a small pool of DB threads, so the event loop
+# never blocks on SQLite, connection setup or the user cache. The method names
+# and arguments are the same as in taskflow.db:
+#
+#   async with AsyncDatabase() as adb:
+#       task_id = await adb.add_task("Write report", None, 1)
+#       rows = await adb.list_tasks(status="todo")
+#
+# - Backpressure: at most max_pending calls are queued or running; further
+#   callers wait (without using a thread) until a slot frees up.
+# - Batching: identical reads issued while one is already running share its
+#   result instead of querying again.
+# - Cancellation: a cancelled call that has not started never runs; a read
+#   that is running is interrupted (sqlite3 Connection.interrupt). A write
+#   that has started runs to completion, so after cancelling a write check
+#   the database to see whether it was applied.
+
+# db functions that only read; these are batched and can be interrupted
+READS = {
+    "list_users",
+    "user_directory",
+    "task_stats",
+    "count_tasks",
+    "list_tasks",
+    "list_tasks_page",
+    "get_task_row",
+    "list_tasks_by_statuses",
+    "get_task",
+    "get_task_record",
+    "list_task_records",
+    "list_user_records",
+    "list_tasks_columnar",
+    "list_cache_info",
+    "storage_info",
+    "change_seq",
+    "changes_since",
+    "get_task_schedule",
+    "next_tasks",
+    "due_before",
+    "overdue_tasks",
+}
+WRITES = {
+    "add_user",
+    "delete_user",
+    "add_task",
+    "update_task_status",
+    "update_task_assignee",
+    "update_task",
+    "delete_task",
+    "add_tasks_many",
+    "update_status_many",
+    "delete_tasks_many",
+    "import_tasks",
+    "compact_changes",
+    "set_task_schedule",
+    "archive_done_tasks",
+}
+
+
+class _SharedRead:
+    # One running read and the number of callers waiting on it.
+    def __init__(self, task: "asyncio.Task[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncDatabase:
+    def __init__(self, workers: int | None = None, max_pending: int = 64) -> None:
+        workers = db.POOL_SIZE if workers is None else workers
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="taskflow-db")
+        self._slots = asyncio.Semaphore(max_pending)
+        self._reads: dict[tuple, _SharedRead] = {}
+        self._closed = False
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        # Look the function up on each call so instrumentation (which swaps
+        # db functions) is picked up.
+        if name in READS:
+
+            async def read(*args: Any, **kwargs: Any) -> Any:
+                return await self._read(name, args, kwargs)
+
+            read.__name__ = name
+            return read
+        if name in WRITES:
+
+            async def write(*args: Any, **kwargs: Any) -> Any:
+                return await self._call(getattr(db, name), args, kwargs, interruptible=False)
+
+            write.__name__ = name
+            return write
+        raise AttributeError(f"{type(self).__name__!s} has no db function {name!r}")
+
+    # async version of db.iter_tasks; pages with the keyset cursor, so each
+    # chunk is a separate short read and no connection stays borrowed between chunks
+    async def iter_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        chunk_size: int = 500,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk size must be a positive number")
+        after = None
+        while True:
+            rows = await self.list_tasks_page(status, assignee_id, title_query, after=after, limit=chunk_size)
+            for row in rows:
+                yield row
+            if len(rows) < chunk_size:
+                return
+            after = (rows[-1][4], rows[-1][0])
+
+    async def _read(self, name: str, args: tuple, kwargs: dict) -> Any:
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # unhashable arguments (e.g. a list of statuses): no batching
+            return await self._call(getattr(db, name), args, kwargs, interruptible=True)
+
+        shared = self._reads.get(key)
+        if shared is None:
+            task = asyncio.ensure_future(self._call(getattr(db, name), args, kwargs, interruptible=True))
+            shared = self._reads[key] = _SharedRead(task)
+            # Later callers start a fresh read once this one is done.
+            task.add_done_callback(lambda _task: self._reads.pop(key, None) if self._reads.get(key) is shared else None)
+
+        shared.waiters += 1
+        try:
+            result = await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            # Only stop the query when nobody else is waiting for it.
+            if shared.waiters == 1 and not shared.task.done():
+                shared.task.cancel()
+            raise
+        finally:
+            shared.waiters -= 1
+        # Callers share one result; give each its own list/dict to modify.
+        if isinstance(result, (list, dict)):
+            return result.copy()
+        return result
+
+    async def _call(self, func: Callable[..., Any], args: tuple, kwargs: dict, interruptible: bool) -> Any:
+        if self._closed:
+            raise RuntimeError("AsyncDatabase is closed")
+        async with self._slots:
+            state: dict[str, Any] = {"cancelled": False, "conn": None}
+            state_lock = threading.Lock()
+
+            def job() -> Any:
+                # Borrow the connection up front: db calls made by func on this
+                # thread reuse it, and we know what to interrupt.
+                with db.connection() as conn:
+                    with state_lock:
+                        if state["cancelled"]:
+                            return None
+                        state["conn"] = conn
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        with state_lock:
+                            state["conn"] = None
+
+            future = self._executor.submit(job)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # wrap_future already cancelled the job if it had not started.
+                if interruptible:
+                    with state_lock:
+                        state["cancelled"] = True
+                        if state["conn"] is not None:
+                            state["conn"].interrupt()
+                raise
+
+    # wait for running calls, then stop the DB threads (the db pool stays open)
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.close()
@@ -0,0 +1,342 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from taskflow import db
+from taskflow.migrations import ARCHIVE_MIGRATIONS, migrate
+
+# Online backups with SQLite's backup API (sqlite3.Connection.backup).
+#
+# - The copy runs in steps of BACKUP_PAGES pages and sleeps BACKUP_SLEEP
+#   seconds between steps, so the app and other processes keep writing.
+#   (Connection.backup's own sleep only applies after a busy step, so the
+#   step callback does the sleeping.)
+# - The archive database (see db.archive_path) is copied next to the main
+#   one as "<dest stem>-archive<suffix>", from the same point in time:
+#   - In WAL mode (the fast profile) both copies run inside one read
+#     transaction. WAL readers see a fixed snapshot and never block
+#     writers, so nothing restarts.
+#   - Otherwise (the durable profile's DELETE journal) a long read would
+#     stall every writer, so each step holds its lock only briefly. SQLite
+#     starts a copy over when another connection writes; every restart
+#     doubles the step size, so the copy soon fits between writes while
+#     writers still wait for at most one step. Main is copied first, and
+#     if the archive changed by the time its copy is done, the pair is
+#     copied again, up to MAX_ATTEMPTS times.
+# - Copies are written to "<file>.partial" and renamed when complete, so a
+#   backup file is never torn.
+# - Snapshots are timestamped backups in DATA_DIR/backups, rotated to the
+#   newest SNAPSHOT_KEEP; SnapshotScheduler takes them on a timer, and
+#   restore() copies one into a new data folder.
+#
+#   python -m taskflow backup taskflow-copy.db
+#   python -m taskflow snapshot --every 60 --keep 24
+#   python -m taskflow restore <snapshot> <new data folder>
+
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.05
+MAX_ATTEMPTS = 3
+SNAPSHOT_KEEP = 7
+SNAPSHOT_PREFIX = "taskflow-"
+
+# progress(copied_pages, total_pages), called after every step
+Progress = Callable[[int, int], object]
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+class _Restarted(Exception):
+    pass
+
+
+# where the archive copy of a backup file goes
+def archive_copy_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}-archive{path.suffix}")
+
+
+def _partial(path: Path) -> Path:
+    return path.with_name(path.name + ".partial")
+
+
+# copy schema name of source into a new file at path
+def _copy(
+    source: sqlite3.Connection,
+    path: Path,
+    name: str,
+    pages: int,
+    sleep: float,
+    progress: Progress | None,
+    cancel: threading.Event | None,
+) -> None:
+    last_remaining = None
+
+    def step(status: int, remaining: int, total: int) -> None:
+        nonlocal last_remaining
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled("backup cancelled")
+        # Every successful step copies pages, so remaining only stops
+        # shrinking when a write from another connection made SQLite start
+        # the copy over. (A busy step copies nothing.)
+        if status == sqlite3.SQLITE_OK and last_remaining is not None and remaining >= last_remaining:
+            raise _Restarted
+        last_remaining = remaining
+        if progress is not None:
+            progress(total - remaining, total)
+        if status == sqlite3.SQLITE_OK and remaining and sleep:
+            time.sleep(sleep)
+
+    while True:
+        path.unlink(missing_ok=True)
+        last_remaining = None
+        try:
+            with closing(sqlite3.connect(path)) as target:
+                source.backup(target, pages=pages, progress=step, name=name, sleep=sleep)
+                # The copy inherits WAL mode from the source; switch it back
+                # so the backup is a single self-contained file.
+                target.execute("PRAGMA journal_mode = DELETE")
+            return
+        except _Restarted:
+            pages *= 2
+
+
+# copy each (schema, path) of copies, all from the same point in time
+def _copy_consistent(
+    source: sqlite3.Connection,
+    copies: list[tuple[str, Path]],
+    pages: int,
+    sleep: float,
+    progress: Progress | None,
+    cancel: threading.Event | None,
+) -> None:
+    modes = {source.execute(f"PRAGMA {name}.journal_mode").fetchone()[0] for name, _ in copies}
+    if modes == {"wal"}:
+        source.execute("BEGIN")
+        try:
+            # Reading a file starts its snapshot. Main goes first: a task
+            # archived in between then shows up in both copies, never in
+            # neither.
+            for name, _ in copies:
+                source.execute(f"SELECT 1 FROM {name}.sqlite_master LIMIT 1").fetchall()
+            for name, path in copies:
+                _copy(source, path, name, pages, sleep, progress, cancel)
+        finally:
+            source.execute("ROLLBACK")
+        return
+
+    # The first copy fixes the point in time. Tasks only move from main to
+    # the archive, so the pair matches as long as the later files did not
+    # change until their own copies were done.
+    def versions() -> list[int]:
+        return [source.execute(f"PRAGMA {name}.data_version").fetchone()[0] for name, _ in copies[1:]]
+
+    for _attempt in range(MAX_ATTEMPTS):
+        before = versions()
+        for name, path in copies:
+            _copy(source, path, name, pages, sleep, progress, cancel)
+        if versions() == before:
+            return
+    raise sqlite3.OperationalError("the database kept changing during the backup; try again later")
+
+
+# copy the live database (and its archive, when there is one) to dest
+def backup_database(
+    dest: Path | str,
+    pages: int = BACKUP_PAGES,
+    sleep: float = BACKUP_SLEEP,
+    progress: Progress | None = None,
+    cancel: threading.Event | None = None,
+) -> Path:
+    if pages < 1:
+        raise ValueError("pages per step must be at least 1")
+    if sleep < 0:
+        raise ValueError("sleep cannot be negative")
+    dest = Path(dest)
+    if dest.resolve() in (db.DB_PATH.resolve(), db.archive_path().resolve()):
+        raise ValueError("cannot back up the database onto itself")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    copies = [("main", dest)]
+    # A connection of our own: a long backup must not hold a pool slot.
+    with closing(db.get_connection()) as source:
+        try:
+            while True:
+                had_archive = db._use_archive(source)
+                if had_archive:
+                    copies = [("main", dest), ("archive", archive_copy_path(dest))]
+                partials = [(name, _partial(path)) for name, path in copies]
+                _copy_consistent(source, partials, pages, sleep, progress, cancel)
+                # The first archive run creates the archive; if that happened
+                # mid-copy, main may already lack the tasks it moved.
+                if had_archive or not db._use_archive(source):
+                    break
+            for _name, path in copies:
+                os.replace(_partial(path), path)
+        except BaseException:
+            for _name, path in copies:
+                _partial(path).unlink(missing_ok=True)
+            raise
+    if len(copies) == 1:
+        archive_copy_path(dest).unlink(missing_ok=True)
+    return dest
+
+
+def snapshot_dir() -> Path:
+    return db.DATA_DIR / "backups"
+
+
+# snapshot files in directory, oldest first (the names sort by time)
+def list_snapshots(directory: Path | str | None = None) -> list[Path]:
+    directory = snapshot_dir() if directory is None else Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path for path in directory.glob(f"{SNAPSHOT_PREFIX}*.db") if not path.stem.endswith("-archive")
+    )
+
+
+# take a timestamped backup, then delete all but the newest keep snapshots
+def take_snapshot(
+    directory: Path | str | None = None,
+    keep: int = SNAPSHOT_KEEP,
+    pages: int = BACKUP_PAGES,
+    sleep: float = BACKUP_SLEEP,
+    progress: Progress | None = None,
+    cancel: threading.Event | None = None,
+) -> Path:
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+    directory = snapshot_dir() if directory is None else Path(directory)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+    path = backup_database(directory / f"{SNAPSHOT_PREFIX}{stamp}.db", pages, sleep, progress, cancel)
+    rotate_snapshots(directory, keep)
+    return path
+
+
+# delete all but the newest keep snapshots; returns the deleted files
+def rotate_snapshots(directory: Path | str | None = None, keep: int = SNAPSHOT_KEEP) -> list[Path]:
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+    snapshots = list_snapshots(directory)
+    expired = snapshots[:-keep]
+    for path in expired:
+        path.unlink(missing_ok=True)
+        archive_copy_path(path).unlink(missing_ok=True)
+    return expired
+
+
+# copy a backup into a new data folder (never over an existing database),
+# check it and bring its schema up to date; returns the new taskflow.db
+def restore(snapshot: Path | str, data_dir: Path | str) -> Path:
+    snapshot = Path(snapshot)
+    if not snapshot.is_file():
+        raise ValueError(f"no backup file at {snapshot}")
+    target = Path(data_dir) / "taskflow.db"
+    target_archive = archive_copy_path(target)
+    if target.exists() or target_archive.exists():
+        raise ValueError(f"{data_dir} already holds a database; restore into a new folder")
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    copies = [(snapshot, target)]
+    if archive_copy_path(snapshot).is_file():
+        copies.append((archive_copy_path(snapshot), target_archive))
+    try:
+        for source_path, dest in copies:
+            with closing(sqlite3.connect(source_path.resolve().as_uri() + "?mode=ro", uri=True)) as source:
+                try:
+                    check = source.execute("PRAGMA quick_check").fetchone()[0]
+                except sqlite3.DatabaseError as exc:
+                    raise ValueError(f"{source_path} is not a TaskFlow backup: {exc}") from None
+                if check != "ok":
+                    raise ValueError(f"{source_path} is damaged: {check}")
+                _copy(source, dest, "main", BACKUP_PAGES, 0, None, None)
+
+        # Snapshots from older versions get the newer migrations here. Only
+        # the restored files are touched: no archive copy, no archive file.
+        with closing(sqlite3.connect(target)) as conn:
+            conn.execute("PRAGMA foreign_keys = ON;")
+            migrate(conn)
+            if len(copies) > 1:
+                conn.execute("ATTACH DATABASE ? AS archive", (str(target_archive),))
+                migrate(conn, ARCHIVE_MIGRATIONS, "archive")
+    except BaseException:
+        target.unlink(missing_ok=True)
+        target_archive.unlink(missing_ok=True)
+        raise
+    return target
+
+
+# takes a snapshot every interval seconds on a background thread
+class SnapshotScheduler:
+    def __init__(
+        self,
+        interval: float,
+        directory: Path | str | None = None,
+        keep: int = SNAPSHOT_KEEP,
+        pages: int = BACKUP_PAGES,
+        sleep: float = BACKUP_SLEEP,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("snapshot interval must be positive")
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.interval = interval
+        self.directory = directory
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self.last_snapshot: Path | None = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="taskflow-snapshots", daemon=True)
+
+    def start(self) -> "SnapshotScheduler":
+        self._thread.start()
+        return self
+
+    # stop the timer; a snapshot in progress is cancelled and removed
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # block until the scheduler stops (or timeout passes)
+    def wait(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "SnapshotScheduler":
+        return self.start()
+
+    def __exit__(self, *_exc: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_snapshot = take_snapshot(
+                    self.directory, self.keep, self.pages, self.sleep, cancel=self._stop
+                )
+            except BackupCancelled:
+                return
+            except Exception as exc:
+                # Keep the timer alive; the next snapshot may well succeed.
+                print(f"Warning: snapshot failed: {exc!r}", file=sys.stderr)
+
+
+# TASKFLOW_SNAPSHOT_MINUTES=<n> takes a snapshot every n minutes while the
+# app runs; TASKFLOW_SNAPSHOT_KEEP and TASKFLOW_SNAPSHOT_DIR override the
+# defaults. Returns the started scheduler, or None.
+def start_from_env() -> SnapshotScheduler | None:
+    minutes = os.environ.get("TASKFLOW_SNAPSHOT_MINUTES")
+    if not minutes:
+        return None
+    keep = int(os.environ.get("TASKFLOW_SNAPSHOT_KEEP", str(SNAPSHOT_KEEP)))
+    directory = os.environ.get("TASKFLOW_SNAPSHOT_DIR") or None
+    return SnapshotScheduler(float(minutes) * 60, directory, keep).start()
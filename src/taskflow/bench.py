@@ -0,0 +1,297 @@
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+from taskflow import db
+
+# Benchmark suite for the public taskflow.db functions.
+# It seeds a scratch database with a reproducible data set (same --seed, same
+# rows), times each operation call by call, and reports p50/p95/p99 latency
+# and ops/sec. Save a run with --output and check a later one against it with
+# --compare; the exit code is non-zero when something got slower.
+#
+#   python -m taskflow.bench --tasks 100000 --output before.json
+#   python -m taskflow.bench --tasks 100000 --compare before.json
+
+_STATUSES = ("todo", "doing", "done")
+# Title words; the title-filter benchmarks search for the first one.
+_WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel")
+_SEARCH = _WORDS[0]
+_SEED_CHUNK = 50_000
+_EPOCH = datetime(2024, 1, 1)
+
+
+def _seed(rng: random.Random, users: int, tasks: int) -> tuple[list[int], list[int]]:
+    # Bulk-load users and tasks with SQL; created_at is spread over a year so
+    # the list order is not just insertion order.
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT INTO users (name) VALUES (?)", ((f"user {i}",) for i in range(users)))
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+
+        sql = "INSERT INTO tasks (title, description, status, assignee_id, created_at) VALUES (?, ?, ?, ?, ?)"
+        for start in range(0, tasks, _SEED_CHUNK):
+            rows = []
+            for i in range(start, min(start + _SEED_CHUNK, tasks)):
+                created_at = _EPOCH + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                rows.append(
+                    (
+                        f"task {i} {rng.choice(_WORDS)}",
+                        None if rng.random() < 0.5 else f"description {i}",
+                        rng.choice(_STATUSES),
+                        None if rng.random() < 0.1 else rng.choice(user_ids),
+                        created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    )
+                )
+            conn.executemany(sql, rows)
+        conn.commit()
+        task_ids = [row[0] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+    return user_ids, task_ids
+
+
+def _benchmarks(
+    rng: random.Random, user_ids: list[int], task_ids: list[int]
+) -> list[tuple[str, Callable[[], object], int | None]]:
+    # (name, zero-argument call, max calls or None) triples, reads first and
+    # destructive ones last. Random inputs are drawn from rng so every run
+    # issues the same calls.
+    filter_user = user_ids[0] if user_ids else None
+    first_page = db.list_tasks_page(limit=100)
+    after = (first_page[-1][4], first_page[-1][0]) if first_page else None
+
+    def pick_task() -> int:
+        return rng.choice(task_ids)
+
+    def pick_user() -> int | None:
+        return rng.choice(user_ids) if user_ids else None
+
+    benchmarks: list[tuple[str, Callable[[], object]]] = [
+        ("list_users", db.list_users),
+        ("user_directory", db.user_directory),
+        ("task_stats", db.task_stats),
+    ]
+    for status in (None, "todo"):
+        for assignee_id in (None, filter_user):
+            for title_query in (None, _SEARCH):
+                label = "status={} assignee={} title={}".format(
+                    status or "-", "user" if assignee_id else "-", title_query or "-"
+                )
+                filters = (status, assignee_id, title_query)
+                benchmarks.append((f"list_tasks[{label}]", lambda f=filters: db.list_tasks(*f)))
+                benchmarks.append((f"count_tasks[{label}]", lambda f=filters: db.count_tasks(*f)))
+                benchmarks.append(
+                    (f"list_tasks_page[{label}]", lambda f=filters: db.list_tasks_page(*f, after=after, limit=100))
+                )
+    benchmarks += [
+        ("list_tasks_by_statuses[todo]", lambda: db.list_tasks_by_statuses(["todo"])),
+        ("list_tasks_by_statuses[todo,doing]", lambda: db.list_tasks_by_statuses(["todo", "doing"])),
+        ("get_task", lambda: db.get_task(pick_task())),
+        ("get_task_row", lambda: db.get_task_row(pick_task(), None, None, None)),
+        ("add_user", lambda: db.add_user(f"bench user {rng.random()}")),
+        ("add_task", lambda: db.add_task(f"bench {rng.choice(_WORDS)}", None, pick_user())),
+        ("update_task", lambda: db.update_task(pick_task(), f"edited {rng.choice(_WORDS)}", "edited", pick_user())),
+        ("update_task_status", lambda: db.update_task_status(pick_task(), rng.choice(_STATUSES))),
+        ("update_task_assignee", lambda: db.update_task_assignee(pick_task(), pick_user())),
+        (
+            "add_tasks_many[100]",
+            lambda: db.add_tasks_many([(f"bulk {rng.choice(_WORDS)}", None, pick_user()) for _ in range(100)]),
+        ),
+        (
+            "update_status_many[100]",
+            lambda: db.update_status_many([(pick_task(), rng.choice(_STATUSES)) for _ in range(100)]),
+        ),
+    ]
+
+    # Deletes consume rows, so each call takes the next victim off a list and
+    # is capped at the victims available (one goes to the warm-up call).
+    # Half the seeded tasks and users are kept for the benchmarks above.
+    victims = rng.sample(task_ids, len(task_ids) // 2)
+    single_victims, batch_victims = victims[: len(victims) // 2], victims[len(victims) // 2 :]
+    doomed_users = rng.sample(user_ids, len(user_ids) // 2)
+
+    def delete_tasks_many() -> list[bool]:
+        return db.delete_tasks_many([batch_victims.pop() for _ in range(100)])
+
+    consuming = [
+        ("delete_task", lambda: db.delete_task(single_victims.pop()), len(single_victims) - 1),
+        ("delete_tasks_many[100]", delete_tasks_many, len(batch_victims) // 100 - 1),
+        # ON DELETE SET NULL unassigns every task of the deleted user.
+        ("delete_user[cascade]", lambda: db.delete_user(doomed_users.pop()), len(doomed_users) - 1),
+    ]
+    return [(name, call, None) for name, call in benchmarks] + consuming
+
+
+def _percentile(sorted_samples: list[float], pct: float) -> float:
+    # nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples) + 0.5) - 1))
+    return sorted_samples[index]
+
+
+def _summarize(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        "ops": len(samples),
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+        "mean_ms": total / len(samples) * 1000,
+        "ops_per_sec": len(samples) / total if total else float("inf"),
+    }
+
+
+def _time(call: Callable[[], object], ops: int, max_seconds: float) -> list[float]:
+    # One untimed warm-up call, then up to `ops` timed calls or max_seconds,
+    # whichever comes first (slow full-table reads on big data sets).
+    call()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(ops):
+        start = time.perf_counter()
+        call()
+        end = time.perf_counter()
+        samples.append(end - start)
+        if end > deadline:
+            break
+    return samples
+
+
+def run(
+    users: int = 100,
+    tasks: int = 10_000,
+    ops: int = 200,
+    max_seconds: float = 5.0,
+    seed: int = 0,
+    only: str | None = None,
+    list_cache: bool = False,
+    profile: str | None = None,
+    log: Callable[[str], None] = print,
+) -> dict:
+    if users < 2 or tasks < 2:
+        raise ValueError("need at least 2 users and 2 tasks")
+    if ops < 1:
+        raise ValueError("ops must be at least 1")
+
+    rng = random.Random(seed)
+    old_dir, old_path, old_cache = db.DATA_DIR, db.DB_PATH, db.LIST_CACHE_SIZE
+    old_profile = db.STORAGE_PROFILE
+    if profile is not None:
+        db.configure_storage(profile)
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATA_DIR = Path(tmp)
+        db.DB_PATH = db.DATA_DIR / "bench.db"
+        # Measure the queries, not the result cache, unless asked to.
+        if not list_cache:
+            db.LIST_CACHE_SIZE = 0
+        try:
+            started = time.perf_counter()
+            user_ids, task_ids = _seed(rng, users, tasks)
+            log(f"seeded {users} users / {tasks} tasks in {time.perf_counter() - started:.1f}s")
+
+            results = {}
+            for name, call, limit in _benchmarks(rng, user_ids, task_ids):
+                if only is not None and only not in name:
+                    continue
+                if limit is not None and limit < 1:
+                    log(f"{name:<56} skipped (data set too small)")
+                    continue
+                calls = ops if limit is None else min(ops, limit)
+                results[name] = _summarize(_time(call, calls, max_seconds))
+                log(_format_row(name, results[name]))
+        finally:
+            db.close_pool()
+            db.clear_list_cache()
+            db.DATA_DIR, db.DB_PATH, db.LIST_CACHE_SIZE = old_dir, old_path, old_cache
+            storage_profile = db.STORAGE_PROFILE
+            db.configure_storage(old_profile)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "users": users,
+            "tasks": tasks,
+            "ops": ops,
+            "seed": seed,
+            "list_cache": list_cache,
+            "storage_profile": storage_profile,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def _format_row(name: str, result: dict[str, float]) -> str:
+    return (
+        f"{name:<56} p50 {result['p50_ms']:9.3f}ms  p95 {result['p95_ms']:9.3f}ms  "
+        f"p99 {result['p99_ms']:9.3f}ms  {result['ops_per_sec']:10.1f} ops/s"
+    )
+
+
+# return (name, baseline p50, current p50, change) for benchmarks slower than threshold;
+# differences under min_delta_ms are timer noise on sub-millisecond calls and are ignored
+def compare(
+    baseline: dict, current: dict, threshold: float = 0.2, min_delta_ms: float = 0.05
+) -> list[tuple[str, float, float, float]]:
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or before["p50_ms"] <= 0:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        if change > threshold and result["p50_ms"] - before["p50_ms"] > min_delta_ms:
+            regressions.append((name, before["p50_ms"], result["p50_ms"], change))
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m taskflow.bench", description="Benchmark taskflow.db.")
+    parser.add_argument("--users", type=int, default=100, help="users to seed (default 100)")
+    parser.add_argument("--tasks", type=int, default=10_000, help="tasks to seed, e.g. 1000 to 1000000 (default 10000)")
+    parser.add_argument("--ops", type=int, default=200, help="timed calls per benchmark (default 200)")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="time cap per benchmark (default 5)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for data and inputs (default 0)")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--list-cache", action="store_true", help="leave the list_tasks result cache on")
+    parser.add_argument(
+        "--profile",
+        choices=[name for name in db.STORAGE_PROFILES if name != "readonly"],
+        help="storage profile (default: TASKFLOW_PROFILE)",
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON from an earlier --output run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown vs baseline (default 0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore p50 slowdowns smaller than this (default 0.05)")
+    args = parser.parse_args(argv)
+
+    report = run(args.users, args.tasks, args.ops, args.max_seconds, args.seed, args.only, args.list_cache, args.profile)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"results written to {args.output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if (baseline["meta"]["users"], baseline["meta"]["tasks"]) != (args.users, args.tasks):
+            print("warning: baseline was seeded with a different data set size")
+        regressions = compare(baseline, report, args.threshold, args.min_delta_ms)
+        for name, before, after, change in regressions:
+            print(f"SLOWER {name}: p50 {before:.3f}ms -> {after:.3f}ms (+{change:.0%})")
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,506 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from taskflow import backup, db
+
+# Headless commands: `taskflow <command> ...` (no command starts the GUI).
+#
+#   taskflow import tasks.csv --create-users
+#   taskflow export backup.jsonl --status done
+#   taskflow list --assignee 3 --search report
+#   taskflow set-status done 12 13 14
+#   taskflow stats --json
+#   taskflow archive --days 90
+#   taskflow changes --since 1200
+#   taskflow schedule 12 --priority high --due 2025-03-01T17:00
+#   taskflow next --assignee 3
+#   taskflow overdue
+#   taskflow compact-changes --keep 10000
+#
+# import and export stream: rows are read and written in chunks (batched
+# inserts, fetchmany reads), so memory use does not grow with the data set.
+
+# columns written by export and understood by import
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "status",
+    "assignee_id",
+    "assignee",
+    "created_at",
+    "updated_at",
+    "due_at",
+    "priority",
+]
+# get_task rows, as reported by `changes`
+TASK_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "status",
+    "assignee_id",
+    "created_at",
+    "updated_at",
+    "due_at",
+    "priority",
+]
+LIST_FIELDS = ["id", "title", "status", "assignee", "created_at"]
+FORMATS = ("csv", "jsonl")
+
+
+def _format_for(path: str, given: str | None) -> str:
+    # --format wins; otherwise go by the file extension (csv for stdin/stdout).
+    if given is not None:
+        return given
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "csv"
+
+
+@contextmanager
+def _open(path: str, mode: str) -> Iterator[TextIO]:
+    # "-" means stdin/stdout.
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8", newline="") as handle:
+        yield handle
+
+
+def _read_records(handle: TextIO, fmt: str) -> Iterator[tuple[int, dict]]:
+    # yield (line number, record) one at a time
+    if fmt == "csv":
+        reader = csv.DictReader(handle)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(handle, start=1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"line {line_number}: invalid JSON ({exc.msg})") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"line {line_number}: expected a JSON object")
+            yield line_number, record
+
+
+class _RowWriter:
+    def __init__(self, handle: TextIO, fmt: str, fields: list[str]) -> None:
+        self.fields = fields
+        self.fmt = fmt
+        self.handle = handle
+        if fmt == "csv":
+            self._csv = csv.writer(handle)
+            self._csv.writerow(fields)
+
+    def write(self, row: tuple) -> None:
+        if self.fmt == "csv":
+            self._csv.writerow(["" if value is None else value for value in row])
+        else:
+            self.handle.write(json.dumps(dict(zip(self.fields, row)), ensure_ascii=False) + "\n")
+
+
+def _text(record: dict, key: str) -> str | None:
+    # CSV has no NULL; an empty cell means "not set".
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value)
+    return value if value.strip() else None
+
+
+class _AssigneeResolver:
+    # Map an import record to a user id: the assignee name wins (ids differ
+    # between databases), then assignee_id. Unknown names are created with
+    # --create-users, otherwise imported as unassigned.
+    def __init__(self, create_users: bool) -> None:
+        self.create_users = create_users
+        self.by_name = {name: user_id for user_id, name in db.list_users()}
+        self.unknown: set[str] = set()
+
+    def __call__(self, record: dict) -> int | None:
+        name = _text(record, "assignee")
+        if name is not None:
+            name = name.strip()
+            if name not in self.by_name:
+                if not self.create_users:
+                    self.unknown.add(name)
+                    return None
+                self.by_name[name] = db.add_user(name)
+            return self.by_name[name]
+
+        raw = _text(record, "assignee_id")
+        if raw is None:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValueError(f"assignee_id must be a number, got {raw!r}") from None
+
+
+def _priority(record: dict) -> int | None:
+    # A name (as written by export) or its number; empty means normal.
+    raw = _text(record, "priority")
+    if raw is None:
+        return None
+    raw = raw.strip().lower()
+    if raw in db.PRIORITIES:
+        return db.PRIORITIES.index(raw)
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"priority must be one of {', '.join(db.PRIORITIES)}, got {raw!r}") from None
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    fmt = _format_for(args.file, args.format)
+    resolve = _AssigneeResolver(args.create_users)
+    imported = 0
+    batch: list[tuple] = []
+    first_line = None
+
+    def flush() -> None:
+        nonlocal imported
+        try:
+            imported += db.import_tasks(batch)
+        except ValueError as exc:
+            raise ValueError(f"rows from line {first_line}: {exc}") from None
+        batch.clear()
+
+    try:
+        with _open(args.file, "r") as handle:
+            for line_number, record in _read_records(handle, fmt):
+                title = _text(record, "title")
+                if title is None:
+                    raise ValueError(f"line {line_number}: title is required")
+                try:
+                    assignee_id = resolve(record)
+                    priority = _priority(record)
+                except ValueError as exc:
+                    raise ValueError(f"line {line_number}: {exc}") from None
+                if first_line is None:
+                    first_line = line_number
+                batch.append(
+                    (
+                        title,
+                        _text(record, "description"),
+                        _text(record, "status"),
+                        assignee_id,
+                        _text(record, "created_at"),
+                        _text(record, "due_at"),
+                        priority,
+                    )
+                )
+                if len(batch) >= args.batch_size:
+                    flush()
+                    first_line = None
+            if batch:
+                flush()
+    except ValueError:
+        # Earlier batches are committed; say how far we got.
+        print(f"Imported {imported} task(s) before the error.", file=sys.stderr)
+        raise
+
+    for name in sorted(resolve.unknown):
+        print(f"Warning: no user named {name!r}; imported their tasks as unassigned", file=sys.stderr)
+    print(f"Imported {imported} task(s).", file=sys.stderr)
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    fmt = _format_for(args.file, args.format)
+    rows = db.iter_task_details(args.status, args.assignee, args.search, chunk_size=args.batch_size)
+    count = 0
+    with closing(rows), _open(args.file, "w") as handle:
+        writer = _RowWriter(handle, fmt, EXPORT_FIELDS)
+        for row in rows:
+            # priority by name, as `schedule --priority` takes it
+            writer.write(row[:-1] + (db.PRIORITIES[row[-1]],))
+            count += 1
+    if args.file != "-":
+        print(f"Exported {count} task(s) to {args.file}.", file=sys.stderr)
+    return 0
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    rows = db.iter_tasks(args.status, args.assignee, args.search, chunk_size=args.batch_size)
+    with closing(rows):
+        if args.limit is not None:
+            rows = islice(rows, args.limit)
+        if args.format == "table":
+            for task_id, title, status, assignee, created_at in rows:
+                print(f"{task_id:>7}  {status:<5}  {assignee or '-':<20}  {created_at}  {title}")
+        else:
+            writer = _RowWriter(sys.stdout, args.format, LIST_FIELDS)
+            for row in rows:
+                writer.write(row)
+    return 0
+
+
+def cmd_set_status(args: argparse.Namespace) -> int:
+    results = db.update_status_many([(task_id, args.status) for task_id in args.task_ids])
+    missing = [task_id for task_id, changed in zip(args.task_ids, results) if not changed]
+    print(f"Updated {len(results) - len(missing)} task(s).")
+    if missing:
+        print("Not found: " + ", ".join(str(task_id) for task_id in missing), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    stats = db.task_stats()
+    names = db.user_directory()
+    if args.json:
+        by_assignee = {names.get(user_id, f"#{user_id}"): count for user_id, count in stats.by_assignee.items()}
+        print(json.dumps({**stats._asdict(), "by_assignee": by_assignee}, indent=2))
+        return 0
+
+    print(f"{'total':<24}{stats.total:>8}")
+    for status, count in stats.by_status.items():
+        print(f"{status:<24}{count:>8}")
+    print(f"{'unassigned':<24}{stats.unassigned:>8}")
+    for user_id, count in sorted(stats.by_assignee.items(), key=lambda item: -item[1]):
+        label = f"{names.get(user_id, '?')} (#{user_id})"
+        print(f"  {label:<22}{count:>8}")
+    return 0
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    before = datetime.now(timezone.utc) - timedelta(days=args.days)
+    moved = db.archive_done_tasks(before, batch_size=args.batch_size)
+    print(f"Archived {moved} task(s) to {db.archive_path()}.")
+    return 0
+
+
+def cmd_schedule(args: argparse.Namespace) -> int:
+    # Change only what was given; the other field keeps its current value.
+    current = db.get_task_schedule(args.task_id)
+    if current is None:
+        print(f"Not found: {args.task_id}", file=sys.stderr)
+        return 1
+    priority, due_at = current
+    if args.priority is not None:
+        priority = db.PRIORITIES.index(args.priority)
+    if args.due is not None:
+        due_at = None if args.due == "none" else args.due
+    if args.priority is None and args.due is None:
+        print(f"{db.PRIORITIES[priority]}  {due_at or '-'}")
+        return 0
+    if not db.set_task_schedule(args.task_id, priority, due_at):
+        print(f"Not found: {args.task_id}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _print_scheduled(rows: list[tuple]) -> None:
+    names = db.user_directory()
+    for task_id, title, status, assignee_id, priority, due_at in rows:
+        assignee = names.get(assignee_id, "-")
+        print(f"{task_id:>7}  {db.PRIORITIES[priority]:<6}  {due_at or '-':<19}  {status:<5}  {assignee:<20}  {title}")
+
+
+def cmd_next(args: argparse.Namespace) -> int:
+    _print_scheduled(db.next_tasks(args.assignee, args.limit))
+    return 0
+
+
+def cmd_overdue(args: argparse.Namespace) -> int:
+    _print_scheduled(db.overdue_tasks(args.limit))
+    return 0
+
+
+def cmd_changes(args: argparse.Namespace) -> int:
+    # One JSON object: the new seq to pass next time, and the deltas.
+    changes = db.changes_since(args.since)
+    print(
+        json.dumps(
+            {
+                "seq": changes.seq,
+                "reset": changes.reset,
+                "tasks": [dict(zip(TASK_FIELDS, row)) for row in changes.tasks],
+                "deleted_tasks": changes.deleted_tasks,
+                "users": [{"id": user_id, "name": name} for user_id, name in changes.users],
+                "deleted_users": changes.deleted_users,
+            }
+        )
+    )
+    return 0
+
+
+def cmd_compact_changes(args: argparse.Namespace) -> int:
+    removed = db.compact_changes(args.keep)
+    print(f"Removed {removed} change log entries.")
+    return 0
+
+
+def _print_progress(copied: int, total: int) -> None:
+    print(f"\r{copied}/{total} pages", end="", file=sys.stderr, flush=True)
+
+
+def cmd_backup(args: argparse.Namespace) -> int:
+    progress = _print_progress if sys.stderr.isatty() else None
+    path = backup.backup_database(args.file, args.pages, args.sleep / 1000, progress)
+    if progress is not None:
+        print(file=sys.stderr)
+    print(f"Backed up {db.DB_PATH} to {path}.")
+    return 0
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+    if args.list:
+        for path in backup.list_snapshots(args.dir):
+            print(path)
+        return 0
+    if args.every is None:
+        print(f"Saved snapshot {backup.take_snapshot(args.dir, args.keep)}.")
+        return 0
+    # Run until interrupted, like the GUI does with TASKFLOW_SNAPSHOT_MINUTES.
+    with backup.SnapshotScheduler(args.every * 60, args.dir, args.keep) as scheduler:
+        print(f"Taking a snapshot every {args.every:g} minute(s); press Ctrl+C to stop.", file=sys.stderr)
+        try:
+            while True:
+                scheduler.wait(1.0)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def cmd_restore(args: argparse.Namespace) -> int:
+    path = backup.restore(args.snapshot, args.target)
+    print(f"Restored {args.snapshot} to {path}; open it with --data-dir {args.target}.")
+    return 0
+
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive number")
+    return number
+
+
+def _add_filters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--status", choices=["todo", "doing", "done"], help="only tasks with this status")
+    parser.add_argument("--assignee", type=_positive, metavar="USER_ID", help="only tasks assigned to this user")
+    parser.add_argument("--search", metavar="TEXT", help="only tasks whose title contains TEXT")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="taskflow", description="TaskFlow (run without a command for the GUI).")
+    parser.add_argument("--data-dir", type=Path, help="folder holding taskflow.db (default: the app's data folder)")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    sub = commands.add_parser("import", help="add tasks from a CSV or JSONL file")
+    sub.add_argument("file", help="input file, or - for stdin")
+    sub.add_argument("--format", choices=FORMATS, help="file format (default: from the extension, else csv)")
+    sub.add_argument("--batch-size", type=_positive, default=5000, help="rows per transaction (default 5000)")
+    sub.add_argument("--create-users", action="store_true", help="add users named in the file that do not exist")
+    sub.set_defaults(handler=cmd_import)
+
+    sub = commands.add_parser("export", help="write tasks to a CSV or JSONL file")
+    sub.add_argument("file", help="output file, or - for stdout")
+    sub.add_argument("--format", choices=FORMATS, help="file format (default: from the extension, else csv)")
+    sub.add_argument("--batch-size", type=_positive, default=5000, help="rows fetched at a time (default 5000)")
+    _add_filters(sub)
+    sub.set_defaults(handler=cmd_export)
+
+    sub = commands.add_parser("list", help="print tasks")
+    sub.add_argument("--format", choices=("table",) + FORMATS, default="table")
+    sub.add_argument("--limit", type=_positive, help="print at most this many tasks")
+    sub.add_argument("--batch-size", type=_positive, default=500, help="rows fetched at a time (default 500)")
+    _add_filters(sub)
+    sub.set_defaults(handler=cmd_list)
+
+    sub = commands.add_parser("set-status", help="change the status of tasks")
+    sub.add_argument("status", choices=["todo", "doing", "done"])
+    sub.add_argument("task_ids", type=_positive, nargs="+", metavar="task_id")
+    sub.set_defaults(handler=cmd_set_status)
+
+    sub = commands.add_parser("archive", help="move old done tasks to the archive database")
+    sub.add_argument("--days", type=float, default=30, help="archive tasks done and unchanged for this many days (default 30)")
+    sub.add_argument("--batch-size", type=_positive, default=500, help="tasks moved per transaction (default 500)")
+    sub.set_defaults(handler=cmd_archive)
+
+    sub = commands.add_parser("schedule", help="set a task's priority and deadline")
+    sub.add_argument("task_id", type=_positive)
+    sub.add_argument("--priority", choices=db.PRIORITIES, help="new priority (default: unchanged)")
+    sub.add_argument("--due", metavar="WHEN", help="ISO date/time (UTC unless it has an offset), or none to clear")
+    sub.set_defaults(handler=cmd_schedule)
+
+    sub = commands.add_parser("next", help="an assignee's next open tasks, most urgent first")
+    sub.add_argument("--assignee", type=_positive, metavar="USER_ID", help="user id (default: unassigned tasks)")
+    sub.add_argument("--limit", type=_positive, default=10)
+    sub.set_defaults(handler=cmd_next)
+
+    sub = commands.add_parser("overdue", help="open tasks past their deadline")
+    sub.add_argument("--limit", type=_positive, default=100)
+    sub.set_defaults(handler=cmd_overdue)
+
+    sub = commands.add_parser("changes", help="print tasks and users changed since a change seq (JSON)")
+    sub.add_argument("--since", type=int, default=0, metavar="SEQ", help="the seq printed by the previous call (default 0)")
+    sub.set_defaults(handler=cmd_changes)
+
+    sub = commands.add_parser("compact-changes", help="trim the change log")
+    sub.add_argument("--keep", type=int, default=db.CHANGES_MAX_ENTRIES, help="newest entries to keep (default 10000)")
+    sub.set_defaults(handler=cmd_compact_changes)
+
+    sub = commands.add_parser("backup", help="copy the database to a file while it is in use")
+    sub.add_argument("file", type=Path, help="backup file (the archive goes next to it)")
+    sub.add_argument("--pages", type=_positive, default=backup.BACKUP_PAGES, help="pages copied per step (default 256)")
+    sub.add_argument("--sleep", type=float, default=backup.BACKUP_SLEEP * 1000, metavar="MS", help="pause between steps (default 50)")
+    sub.set_defaults(handler=cmd_backup)
+
+    sub = commands.add_parser("snapshot", help="take a rotated backup in the data folder's backups directory")
+    sub.add_argument("--dir", type=Path, help="snapshot folder (default: backups in the data folder)")
+    sub.add_argument("--keep", type=_positive, default=backup.SNAPSHOT_KEEP, help="newest snapshots to keep (default 7)")
+    sub.add_argument("--every", type=float, metavar="MINUTES", help="keep running and take a snapshot every MINUTES")
+    sub.add_argument("--list", action="store_true", help="print the snapshots, oldest first")
+    sub.set_defaults(handler=cmd_snapshot)
+
+    sub = commands.add_parser("restore", help="copy a backup into a new data folder")
+    sub.add_argument("snapshot", type=Path, help="backup or snapshot file")
+    sub.add_argument("target", type=Path, help="data folder to create (must not hold a database)")
+    sub.set_defaults(handler=cmd_restore)
+
+    sub = commands.add_parser("stats", help="task counts by status and assignee")
+    sub.add_argument("--json", action="store_true", help="print JSON")
+    sub.set_defaults(handler=cmd_stats)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.data_dir is not None:
+        db.DATA_DIR = args.data_dir
+        db.DB_PATH = args.data_dir / "taskflow.db"
+    try:
+        return args.handler(args)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    except sqlite3.Error as exc:
+        # e.g. a write under the readonly profile, or a database locked past the busy timeout
+        print(f"Database error: {exc}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader went away (e.g. `taskflow list | head`); stop quietly.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,45 @@
+import atexit
 import os
+import queue
 import sqlite3
 import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from taskflow.migrations import ARCHIVE_MIGRATIONS, LATEST_VERSION, get_version, migrate
+from taskflow.pool import ConnectionPool
+from taskflow.queries import (
+    DEFAULT_PRIORITY,
+    PRIORITIES,
+    UNCHANGED,
+    begin_write,
+    chunks,
+    clean_schedule,
+    clean_task_fields,
+    clean_timestamp,
+    existing_ids,
+    resolve_assignee,
+    schedule_assignments,
+    task_filter_clauses,
+    task_list_query,
+)
+from taskflow.records import (
+    Task,
+    TaskColumns,
+    TaskSummary,
+    User,
+    task_factory,
+    task_summary_factory,
+    user_factory,
+)
+
+if TYPE_CHECKING:
+    # concurrent.futures pulls in logging; only the write queue needs it (see _put)
+    from concurrent.futures import Future
 
 def _get_data_dir() -> Path:
     # Keep local ./data for dev runs, but use a user-writable folder in frozen apps.
@@ -21,8 +59,45 @@ DATA_DIR = _get_data_dir()
 # full path to the database file
 DB_PATH = DATA_DIR / "taskflow.db"
 
-# open a connection and make sure foreign keys are enabled
-def get_connection() -> sqlite3.Connection:
+# connection pool settings (override with env vars or configure_pool())
+POOL_SIZE = int(os.environ.get("TASKFLOW_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.environ.get("TASKFLOW_POOL_TIMEOUT", "5.0"))
+
+# Named storage profiles: PRAGMAs applied when a connection opens.
+# Pick one with TASKFLOW_PROFILE or configure_storage(); see storage_info().
+STORAGE_PROFILES: dict[str, dict[str, str | int]] = {
+    # SQLite's defaults: rollback journal and an fsync on every commit.
+    "durable": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    # WAL lets readers run alongside the writer, and NORMAL drops the
+    # per-commit fsync (a power cut can lose the last commits, but never
+    # corrupts the file). Bigger page cache, memory-mapped reads, in-memory temp tables.
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # negative = KiB, so ~64 MB
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    # Opened with mode=ro plus query_only: reporting tools, inspecting a live db.
+    "readonly": {
+        "query_only": "ON",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+STORAGE_PROFILE = os.environ.get("TASKFLOW_PROFILE", "durable")
+# seconds a connection waits on a locked database before "database is locked"
+BUSY_TIMEOUT = float(os.environ.get("TASKFLOW_BUSY_TIMEOUT", "5.0"))
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _ensure_data_dir() -> None:
     global DATA_DIR, DB_PATH
     try:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -32,39 +107,234 @@ def get_connection() -> sqlite3.Connection:
         fallback_dir.mkdir(parents=True, exist_ok=True)
         DATA_DIR = fallback_dir
         DB_PATH = DATA_DIR / "taskflow.db"
-    conn = sqlite3.connect(DB_PATH)
+
+
+def _profile_settings() -> dict[str, str | int]:
+    if STORAGE_PROFILE not in STORAGE_PROFILES:
+        names = ", ".join(STORAGE_PROFILES)
+        raise ValueError(f"unknown storage profile {STORAGE_PROFILE!r} (expected one of: {names})")
+    return STORAGE_PROFILES[STORAGE_PROFILE]
+
+
+# open a connection with foreign keys on and the storage profile applied
+def _open_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    settings = _profile_settings()
+    if STORAGE_PROFILE == "readonly":
+        # mode=ro never creates the file and rejects every write.
+        uri = DB_PATH.resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT, check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, check_same_thread=check_same_thread)
     conn.execute("PRAGMA foreign_keys = ON;")
+    for name, value in settings.items():
+        # journal_mode is stored in the file; it is set once per pool in _prepare_database.
+        if name != "journal_mode":
+            conn.execute(f"PRAGMA {name} = {value}")
+    _use_archive(conn)
+    return conn
+
+
+# the archive database file, next to DB_PATH (see archive_done_tasks)
+def archive_path() -> Path:
+    return DB_PATH.with_name(f"{DB_PATH.stem}-archive{DB_PATH.suffix}")
+
+
+# Attach the archive file to conn as "archive" unless it already is, and
+# return whether archive.* can be used. The file is only attached once it
+# exists (create=True makes it, see archive_done_tasks), so a database that
+# never archives gets no archive file. Call it outside a transaction: a
+# connection opened before the file existed attaches it on first use.
+def _use_archive(conn: sqlite3.Connection, create: bool = False) -> bool:
+    if any(row[1] == "archive" for row in conn.execute("PRAGMA database_list")):
+        return True
+    path = archive_path()
+    exists = path.exists()
+    if not exists and not create:
+        return False
+    if STORAGE_PROFILE == "readonly":
+        conn.execute("ATTACH DATABASE ? AS archive", (path.resolve().as_uri() + "?mode=ro",))
+        return True
+
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    settings = _profile_settings()
+    if "synchronous" in settings:
+        # synchronous is per attached file, so repeat it for the archive.
+        conn.execute(f"PRAGMA archive.synchronous = {settings['synchronous']}")
+    if not exists:
+        _set_journal_mode(conn, "archive")
+        migrate(conn, ARCHIVE_MIGRATIONS, "archive")
+    return True
+
+
+def _set_journal_mode(conn: sqlite3.Connection, schema: str) -> None:
+    mode = _profile_settings().get("journal_mode")
+    if mode is None:
+        return
+    try:
+        conn.execute(f"PRAGMA {schema}.journal_mode = {mode}")
+    except sqlite3.OperationalError:
+        # Leaving WAL needs exclusive access; if another process has the
+        # file open we keep its current mode (storage_info() shows it).
+        pass
+
+
+def _prepare_database(conn: sqlite3.Connection) -> None:
+    _set_journal_mode(conn, "main")
+    if _use_archive(conn):
+        _set_journal_mode(conn, "archive")
+
+    if STORAGE_PROFILE == "readonly":
+        if get_version(conn) < LATEST_VERSION:
+            raise RuntimeError("database schema is out of date; open it once with a writable profile")
+        return
     initialize_db(conn)
+
+
+# open a standalone connection and make sure foreign keys are enabled
+# (the db functions below use the shared pool instead; the caller closes this one)
+def get_connection() -> sqlite3.Connection:
+    _ensure_data_dir()
+    conn = _open_connection()
+    _prepare_database(conn)
     return conn
 
 
+# return the shared pool, opening it (and the schema) on first use
+def open_pool() -> ConnectionPool:
+    global _pool
+    pool = _pool
+    # Fast path: no lock once the pool is open for the current DB_PATH.
+    if pool is not None and not pool.closed and pool.path == DB_PATH:
+        return pool
+
+    with _pool_lock:
+        if _pool is not None and not _pool.closed and _pool.path == DB_PATH:
+            return _pool
+        if _pool is not None:
+            # DB_PATH was changed (tests, tools); drop connections to the old file.
+            _pool.close()
+
+        # Directory setup, journal mode and migrations happen once per pool;
+        # the hot path does no DDL.
+        _ensure_data_dir()
+        pool = ConnectionPool(
+            DB_PATH,
+            size=POOL_SIZE,
+            timeout=POOL_TIMEOUT,
+            factory=lambda: _open_connection(check_same_thread=False),
+        )
+        try:
+            with pool.connection() as conn:
+                _prepare_database(conn)
+        except BaseException:
+            pool.close()
+            raise
+        _pool = pool
+        _invalidate_users()
+        clear_list_cache()
+        return pool
+
+
+# close every pooled connection; the next db call reopens the pool
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+    clear_list_cache()
+
+
+# change pool size / acquire timeout; takes effect on the next db call
+def configure_pool(size: int | None = None, timeout: float | None = None) -> None:
+    global POOL_SIZE, POOL_TIMEOUT
+    if size is not None:
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        POOL_SIZE = size
+    if timeout is not None:
+        if timeout < 0:
+            raise ValueError("pool timeout cannot be negative")
+        POOL_TIMEOUT = timeout
+    close_pool()
+
+
+# pick a storage profile and/or busy timeout; takes effect on the next db call
+def configure_storage(profile: str | None = None, busy_timeout: float | None = None) -> None:
+    global STORAGE_PROFILE, BUSY_TIMEOUT
+    if profile is not None:
+        if profile not in STORAGE_PROFILES:
+            names = ", ".join(STORAGE_PROFILES)
+            raise ValueError(f"unknown storage profile {profile!r} (expected one of: {names})")
+        STORAGE_PROFILE = profile
+    if busy_timeout is not None:
+        if busy_timeout < 0:
+            raise ValueError("busy timeout cannot be negative")
+        BUSY_TIMEOUT = busy_timeout
+    close_pool()
+
+
+_SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+_TEMP_STORE_NAMES = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+
+
+# report the profile in effect and the settings SQLite actually applied
+def storage_info() -> dict[str, object]:
+    info: dict[str, object] = {"profile": STORAGE_PROFILE, "path": str(DB_PATH)}
+    with connection() as conn:
+        for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout", "query_only"):
+            info[name] = conn.execute(f"PRAGMA {name}").fetchone()[0]
+    info["synchronous"] = _SYNCHRONOUS_NAMES.get(info["synchronous"], info["synchronous"])
+    info["temp_store"] = _TEMP_STORE_NAMES.get(info["temp_store"], info["temp_store"])
+    info["query_only"] = bool(info["query_only"])
+    return info
+
+
+# borrow a pooled connection: `with db.connection() as conn: ...`
+# Uncommitted work is rolled back when the outermost block exits.
+def connection():
+    return open_pool().connection()
+
+
+# bring the schema up to date (see taskflow.migrations)
 def initialize_db(conn: sqlite3.Connection) -> None:
-    # These are safe to run every time (CREATE TABLE IF NOT EXISTS).
-    # users table
-    create_users_sql = """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE
-        );
-    """
+    migrate(conn)
+    if _use_archive(conn):
+        migrate(conn, ARCHIVE_MIGRATIONS, "archive")
 
-    # tasks table
-    create_tasks_sql = """
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            status TEXT NOT NULL DEFAULT 'todo' CHECK(status IN('todo', 'doing', 'done')),
-            assignee_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
-            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            updated_at DATETIME
-        );
-    """
+# In-process cache of the users table for list_users() / user_directory().
+# Triggers bump table_versions.version for 'users' on every change (see
+# migration 3), so one primary-key read tells us whether the cache is stale,
+# including after writes from other connections or processes.
+_users_lock = threading.Lock()
+_users_cache: list[tuple[int, str]] | None = None
+_users_by_id: dict[int, str] = {}
+_users_version: int | None = None
+
+
+def _invalidate_users() -> None:
+    global _users_cache, _users_version
+    with _users_lock:
+        _users_cache = None
+        _users_version = None
+
+
+def _cached_users() -> tuple[list[tuple[int, str]], dict[int, str]]:
+    global _users_cache, _users_by_id, _users_version
+    with connection() as conn:
+        version = conn.execute("SELECT version FROM table_versions WHERE name = 'users'").fetchone()[0]
+        with _users_lock:
+            if _users_cache is not None and _users_version == version:
+                return _users_cache, _users_by_id
+        # Version is read first: a write landing in between just makes the
+        # next call reload again, never serves stale rows.
+        users = conn.execute("SELECT id, name FROM users ORDER BY id").fetchall()
+    with _users_lock:
+        _users_cache = users
+        _users_by_id = dict(users)
+        _users_version = version
+        return users, _users_by_id
 
-    cur = conn.cursor()
-    cur.execute(create_users_sql)
-    cur.execute(create_tasks_sql)
-    conn.commit()
 
 # add a user and return the new id
 def add_user(name: str) -> int:
@@ -74,38 +344,48 @@ def add_user(name: str) -> int:
         raise ValueError("name cannot be empty")
 
     # connect and insert
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute("INSERT INTO users (name) VALUES (?)", (name,))
         conn.commit()
-        return cur.lastrowid
-    finally:
-        conn.close()
+    _invalidate_users()
+    return cur.lastrowid
 
-# return all users as (id, name)
+# return all users as (id, name), served from the user cache when unchanged
 def list_users() -> list[tuple[int, str]]:
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT id, name FROM users ORDER BY id")
-        return cur.fetchall()
-    finally:
-        conn.close()
+    users, _by_id = _cached_users()
+    return list(users)
+
+# return {user_id: name} from the same cache (read-only; do not modify)
+def user_directory() -> dict[int, str]:
+    _users, by_id = _cached_users()
+    return by_id
 
 # delete a user by id and return True if something was deleted
 def delete_user(user_id: int) -> bool:
-    conn = get_connection()
-    try:
+    with connection() as conn:
+        begin_write(conn)
         cur = conn.cursor()
         cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
         conn.commit()
-        return cur.rowcount > 0
-    finally:
-        conn.close()
+        # ON DELETE SET NULL by hand for archived tasks (no foreign keys across
+        # files), in its own transaction: see archive_done_tasks.
+        if cur.rowcount > 0 and _use_archive(conn):
+            begin_write(conn)
+            conn.execute("UPDATE archive.tasks SET assignee_id = NULL WHERE assignee_id = ?", (user_id,))
+            conn.commit()
+    _invalidate_users()
+    return cur.rowcount > 0
 
-# add a task and return the new id
-def add_task(title: str, description: str | None, assignee_id: int | None):
+# add a task and return the new id; priority and due_at (None: normal, no
+# deadline) are stored in the same insert
+def add_task(
+    title: str,
+    description: str | None,
+    assignee_id: int | None,
+    priority: int | None = None,
+    due_at: datetime | str | None = None,
+):
     # Title is required; description can be empty/None.
     title = title.strip()
     if not title:
@@ -117,29 +397,24 @@ def add_task(title: str, description: str | None, assignee_id: int | None):
         if description == "":
             description = None
 
-    # If assignee doesn't exist, store NULL and warn the user.
-    if assignee_id is not None:
-        if assignee_id < 1:
-            raise ValueError("assignee id must be a positive number")
-        user_ids = {uid for uid, _ in list_users()}
-        if assignee_id not in user_ids:
-            print(f"Warning: no user with id {assignee_id}; storing assignee as NULL")
-            assignee_id = None
+    if assignee_id is not None and assignee_id < 1:
+        raise ValueError("assignee id must be a positive number")
+    priority, due_at = clean_schedule(DEFAULT_PRIORITY if priority is None else priority, due_at)
 
     # connect and insert
-    conn = get_connection()
-    try:
+    with connection() as conn:
+        begin_write(conn)
+        # If assignee doesn't exist, store NULL and warn the user.
+        assignee_id = resolve_assignee(conn, assignee_id)
         cur = conn.cursor()
         sql = """    
-        INSERT INTO tasks (title, description, assignee_id)
-        VALUES (?, ?, ?)
+        INSERT INTO tasks (title, description, assignee_id, priority, due_at)
+        VALUES (?, ?, ?, ?, ?)
         """
-        cur.execute(sql, (title, description, assignee_id))         
+        cur.execute(sql, (title, description, assignee_id, priority, due_at))         
 
         conn.commit()
         return cur.lastrowid
-    finally:
-        conn.close()    
 
 # update a task status by id
 def update_task_status(task_id: int, status: str) -> bool:
@@ -148,8 +423,7 @@ def update_task_status(task_id: int, status: str) -> bool:
     if status not in {"todo", "doing", "done"}:
         raise ValueError("status must be one of: todo, doing, done")
 
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             "UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
@@ -157,22 +431,16 @@ def update_task_status(task_id: int, status: str) -> bool:
         )
         conn.commit()
         return cur.rowcount > 0
-    finally:
-        conn.close()
 
 # update task assignee by id (set to None to unassign)
 def update_task_assignee(task_id: int, assignee_id: int | None) -> bool:
     # Allow clearing assignee with None.
-    if assignee_id is not None:
-        if assignee_id < 1:
-            raise ValueError("assignee id must be a positive number")
-        user_ids = {uid for uid, _ in list_users()}
-        if assignee_id not in user_ids:
-            print(f"Warning: no user with id {assignee_id}; storing assignee as NULL")
-            assignee_id = None
+    if assignee_id is not None and assignee_id < 1:
+        raise ValueError("assignee id must be a positive number")
 
-    conn = get_connection()
-    try:
+    with connection() as conn:
+        begin_write(conn)
+        assignee_id = resolve_assignee(conn, assignee_id)
         cur = conn.cursor()
         cur.execute(
             "UPDATE tasks SET assignee_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
@@ -180,62 +448,246 @@ def update_task_assignee(task_id: int, assignee_id: int | None) -> bool:
         )
         conn.commit()
         return cur.rowcount > 0
-    finally:
-        conn.close()
 
-# list tasks as (title, status, assignee_name)
+# --- task statistics -----------------------------------------------------
+# Triggers on tasks keep task_status_counts / task_assignee_counts current
+# (see migration 4), so stats cost a read of two tiny tables, never a scan.
+TaskStats = namedtuple("TaskStats", ["total", "by_status", "by_assignee", "unassigned"])
+
+
+# task counts: total, {status: n}, {assignee_id: n} and the unassigned count
+def task_stats() -> TaskStats:
+    # One statement, so both tables are read from the same snapshot.
+    sql = """
+        SELECT 'status', status, count FROM task_status_counts
+        UNION ALL
+        SELECT 'assignee', assignee_id, count FROM task_assignee_counts
+    """
+    with connection() as conn:
+        rows = conn.execute(sql).fetchall()
+
+    by_status = {"todo": 0, "doing": 0, "done": 0}
+    by_assignee: dict[int, int] = {}
+    unassigned = 0
+    for kind, key, count in rows:
+        if kind == "status":
+            by_status[key] = count
+        elif key == 0:
+            unassigned = count
+        else:
+            by_assignee[key] = count
+    return TaskStats(sum(by_status.values()), by_status, by_assignee, unassigned)
+
+# --- list_tasks result cache ----------------------------------------------
+# Bounded LRU of query results, keyed by the normalized SQL + parameters, for
+# list_tasks, list_tasks_page and count_tasks, so flipping between recent
+# filter views does not touch the disk.
+#
+# Invalidation: before using the cache we read PRAGMA data_version (changes
+# by any *other* connection, in this process or another) and total_changes
+# (changes made through *this* connection) on the connection we hold. If
+# either moved since this connection last looked, the cache is cleared.
+LIST_CACHE_SIZE = int(os.environ.get("TASKFLOW_LIST_CACHE_SIZE", "64"))
+# results bigger than this are returned but not kept
+LIST_CACHE_MAX_ROWS = 50_000
+
+ListCacheInfo = namedtuple("ListCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+_list_cache: OrderedDict[tuple, list] = OrderedDict()
+_list_cache_lock = threading.Lock()
+_list_cache_seen: dict[int, tuple[int, int]] = {}
+# bumped on every clear so a query that raced with a write is not stored
+_list_cache_generation = 0
+_list_cache_hits = 0
+_list_cache_misses = 0
+
+
+def clear_list_cache() -> None:
+    global _list_cache_generation
+    with _list_cache_lock:
+        _list_cache.clear()
+        _list_cache_seen.clear()
+        _list_cache_generation += 1
+
+
+def list_cache_info() -> ListCacheInfo:
+    with _list_cache_lock:
+        return ListCacheInfo(_list_cache_hits, _list_cache_misses, LIST_CACHE_SIZE, len(_list_cache))
+
+
+def _cached_query(sql: str, params: list[object]) -> list:
+    global _list_cache_generation, _list_cache_hits, _list_cache_misses
+    key = (sql, tuple(params))
+    with connection() as conn:
+        if LIST_CACHE_SIZE <= 0:
+            return conn.execute(sql, params).fetchall()
+
+        marker = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with _list_cache_lock:
+            # A connection we have not seen before counts as "changed".
+            if _list_cache_seen.get(id(conn)) != marker:
+                _list_cache_seen[id(conn)] = marker
+                _list_cache.clear()
+                _list_cache_generation += 1
+            rows = _list_cache.get(key)
+            if rows is not None:
+                _list_cache.move_to_end(key)
+                _list_cache_hits += 1
+                return list(rows)
+            _list_cache_misses += 1
+            generation = _list_cache_generation
+
+        rows = conn.execute(sql, params).fetchall()
+
+    with _list_cache_lock:
+        if generation == _list_cache_generation and len(rows) <= LIST_CACHE_MAX_ROWS:
+            _list_cache[key] = rows
+            while len(_list_cache) > LIST_CACHE_SIZE:
+                _list_cache.popitem(last=False)
+    # Callers get their own list so they cannot change the cached one.
+    return list(rows)
+
+
+# count the tasks list_tasks would return for the same filters
+def count_tasks(
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+    include_archived: bool = False,
+) -> int:
+    where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+    archived = 0
+    if include_archived:
+        with connection() as conn:
+            if _use_archive(conn):
+                sql = "SELECT COUNT(*) FROM archive.tasks AS tasks"
+                if where_clauses:
+                    sql += " WHERE " + " AND ".join(where_clauses)
+                archived = _cached_query(sql, params)[0][0]
+
+    # No filter, or a single status/assignee filter: read the maintained counters.
+    if not where_clauses:
+        return archived + task_stats().total
+    if len(where_clauses) == 1 and where_clauses[0] == "tasks.status = ?":
+        return archived + task_stats().by_status.get(params[0], 0)
+    if len(where_clauses) == 1 and where_clauses[0] == "tasks.assignee_id = ?":
+        return archived + task_stats().by_assignee.get(params[0], 0)
+
+    sql = "SELECT COUNT(*) FROM tasks"
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+
+    return archived + _cached_query(sql, params)[0][0]
+
+
+# list tasks as (id, title, status, assignee_name, created_at)
 def list_tasks(
     status: str | None = None,
     assignee_id: int | None = None,
     title_query: str | None = None,
+    include_archived: bool = False,
 ) -> list[tuple[int, str, str, str | None, str]]:
-    # Filters are optional; we only add WHERE clauses when provided.
-    if status is not None:
-        status = status.strip().lower()
-        if status not in {"todo", "doing", "done"}:
-            raise ValueError("status must be one of: todo, doing, done")
+    # Served from the result cache when the same filters were used recently.
+    with connection() as conn:
+        if include_archived and _use_archive(conn):
+            sql, params = _archive_union_query(status, assignee_id, title_query)
+        else:
+            sql, params = task_list_query(status, assignee_id, title_query)
+        return _cached_query(sql, params)
 
-    if assignee_id is not None:
-        if assignee_id < 1:
-            raise ValueError("assignee id must be a positive number")
 
-    if title_query is not None:
-        title_query = title_query.strip()
-        if title_query == "":
-            title_query = None
+# one list_tasks row by id, or None if the task is gone or no longer matches the filters
+def get_task_row(
+    task_id: int,
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+) -> tuple[int, str, str, str | None, str] | None:
+    # Lets the UI patch a single row after an edit instead of re-running list_tasks.
+    where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+    where_clauses.insert(0, "tasks.id = ?")
+    params.insert(0, task_id)
+    sql = """
+        SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
+        FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
+        WHERE """ + " AND ".join(where_clauses)
 
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
-        sql = """
-            SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
-            FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
-        """
-        where_clauses = []
-        params: list[object] = []
+        cur.execute(sql, params)
+        return cur.fetchone()
 
-        if status is not None:
-            where_clauses.append("tasks.status = ?")
-            params.append(status)
 
-        if assignee_id is not None:
-            where_clauses.append("tasks.assignee_id = ?")
-            params.append(assignee_id)
+# one page of list_tasks; pass the last row's (created_at, id) as `after` for the next page
+def list_tasks_page(
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+    after: tuple[str, int] | None = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[tuple[int, str, str, str | None, str]]:
+    if limit < 1:
+        raise ValueError("limit must be a positive number")
+    if offset < 0:
+        raise ValueError("offset cannot be negative")
 
-        if title_query is not None:
-            where_clauses.append("tasks.title LIKE ?")
-            like_value = f"%{title_query}%"
-            params.append(like_value)
+    # Prefer `after` for sequential paging; `offset` still walks the skipped
+    # rows and is meant for jumps (e.g. dragging a scrollbar).
+    sql, params = task_list_query(status, assignee_id, title_query, after)
+    sql += " LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    return _cached_query(sql, params)
 
-        if where_clauses:
-            sql += " WHERE " + " AND ".join(where_clauses)
 
-        sql += " ORDER BY tasks.created_at, tasks.id"
+# stream list_tasks rows, fetching chunk_size rows at a time
+def iter_tasks(
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+    chunk_size: int = 500,
+):
+    if chunk_size < 1:
+        raise ValueError("chunk size must be a positive number")
+
+    # Validate before the first next() so bad filters fail at the call site.
+    sql, params = task_list_query(status, assignee_id, title_query)
+    return _iter_rows(sql, params, chunk_size)
+
+
+# stream every column of the matching tasks, in list_tasks order, as
+# (id, title, description, status, assignee_id, assignee_name, created_at, updated_at)
+def iter_task_details(
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+    chunk_size: int = 500,
+):
+    if chunk_size < 1:
+        raise ValueError("chunk size must be a positive number")
 
+    where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+    sql = """
+        SELECT tasks.id, tasks.title, tasks.description, tasks.status, tasks.assignee_id,
+               users.name, tasks.created_at, tasks.updated_at, tasks.due_at, tasks.priority
+        FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
+    """
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+    sql += " ORDER BY tasks.created_at, tasks.id"
+    return _iter_rows(sql, params, chunk_size)
+
+
+def _iter_rows(sql: str, params: list[object], chunk_size: int):
+    # The pooled connection stays borrowed until the generator is exhausted or closed.
+    with connection() as conn:
+        cur = conn.cursor()
         cur.execute(sql, params)
-        return cur.fetchall()
-    finally:
-        conn.close()
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
 
 
 def list_tasks_by_statuses(statuses: list[str]) -> list[tuple[int, str, str, str | None, str]]:
@@ -248,41 +700,50 @@ def list_tasks_by_statuses(statuses: list[str]) -> list[tuple[int, str, str, str
         value = status.strip().lower()
         if value not in {"todo", "doing", "done"}:
             raise ValueError("status must be one of: todo, doing, done")
-        normalized.append(value)
+        if value not in normalized:
+            normalized.append(value)
 
-    placeholders = ", ".join(["?"] * len(normalized))
-    sql = f"""
+    # One indexed branch per status merged with UNION ALL. Each branch is
+    # already in (created_at, id) order, so SQLite merges them without the
+    # temp B-tree sort that `status IN (...)` would need.
+    branch = """
         SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
         FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
-        WHERE tasks.status IN ({placeholders})
-        ORDER BY tasks.created_at, tasks.id
+        WHERE tasks.status = ?
     """
+    sql = " UNION ALL ".join([branch] * len(normalized)) + " ORDER BY 5, 1"
 
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(sql, normalized)
         return cur.fetchall()
-    finally:
-        conn.close()
 
-def get_task(task_id: int) -> tuple[int, str, str | None, str, int | None, str, str | None] | None:
+# (id, title, description, status, assignee_id, created_at, updated_at, due_at, priority)
+def get_task(
+    task_id: int,
+) -> tuple[int, str, str | None, str, int | None, str, str | None, str | None, int] | None:
     # Returns the raw task row so the UI can prefill the edit dialog.
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         sql = """
-            SELECT id, title, description, status, assignee_id, created_at, updated_at
+            SELECT id, title, description, status, assignee_id, created_at, updated_at, due_at, priority
             FROM tasks
             WHERE id = ?
         """
         cur.execute(sql, (task_id,))
         return cur.fetchone()
-    finally:
-        conn.close()
 
 
-def update_task(task_id: int, title: str, description: str | None, assignee_id: int | None) -> bool:
+# priority and due_at are changed in the same write unless left UNCHANGED
+# (due_at None clears the deadline)
+def update_task(
+    task_id: int,
+    title: str,
+    description: str | None,
+    assignee_id: int | None,
+    priority=UNCHANGED,
+    due_at=UNCHANGED,
+) -> bool:
     # Update title/description/assignee in one place so UI doesn't duplicate logic.
     title = title.strip()
     if not title:
@@ -294,37 +755,687 @@ def update_task(task_id: int, title: str, description: str | None, assignee_id:
         if description == "":
             description = None
 
-    if assignee_id is not None:
-        if assignee_id < 1:
-            raise ValueError("assignee id must be a positive number")
-        user_ids = {uid for uid, _ in list_users()}
-        if assignee_id not in user_ids:
-            print(f"Warning: no user with id {assignee_id}; storing assignee as NULL")
-            assignee_id = None
+    if assignee_id is not None and assignee_id < 1:
+        raise ValueError("assignee id must be a positive number")
+    schedule_sql, schedule = schedule_assignments(priority, due_at)
+    assignments = ["title = ?", "description = ?", "assignee_id = ?", "updated_at = CURRENT_TIMESTAMP", *schedule_sql]
 
-    conn = get_connection()
-    try:
+    with connection() as conn:
+        begin_write(conn)
+        assignee_id = resolve_assignee(conn, assignee_id)
         cur = conn.cursor()
         cur.execute(
-            """
+            f"""
             UPDATE tasks
-            SET title = ?, description = ?, assignee_id = ?, updated_at = CURRENT_TIMESTAMP
+            SET {", ".join(assignments)}
             WHERE id = ?
             """,
-            (title, description, assignee_id, task_id),
+            (title, description, assignee_id, *schedule, task_id),
         )
         conn.commit()
         return cur.rowcount > 0
-    finally:
-        conn.close()
 
 
 def delete_task(task_id: int) -> bool:
-    conn = get_connection()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
         conn.commit()
         return cur.rowcount > 0
-    finally:
-        conn.close()
+
+
+# --- typed records ---------------------------------------------------------
+# Same queries as list_tasks / get_task / list_users, returning the __slots__
+# records from taskflow.records instead of tuples. These read straight from
+# the database in chunks (not through the list_tasks result cache), so a big
+# result never exists as tuples and records at the same time.
+
+
+# list_tasks as TaskSummary records (task.id, task.title, task.status, task.assignee, task.created_at)
+def list_task_records(
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+) -> list[TaskSummary]:
+    sql, params = task_list_query(status, assignee_id, title_query)
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = task_summary_factory()
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+# get_task as a Task record, or None if there is no such task
+def get_task_record(task_id: int) -> Task | None:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = task_factory()
+        cur.execute(
+            """
+            SELECT id, title, description, status, assignee_id, created_at, updated_at, due_at, priority
+            FROM tasks
+            WHERE id = ?
+            """,
+            (task_id,),
+        )
+        return cur.fetchone()
+
+
+# list_users as User records (read from the users table, not the user cache)
+def list_user_records() -> list[User]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = user_factory
+        cur.execute("SELECT id, name FROM users ORDER BY id")
+        return cur.fetchall()
+
+
+# list_tasks in columnar form (see taskflow.records.TaskColumns): built chunk by
+# chunk, so peak memory stays near the size of the columns themselves
+def list_tasks_columnar(
+    status: str | None = None,
+    assignee_id: int | None = None,
+    title_query: str | None = None,
+    chunk_size: int = 5000,
+) -> TaskColumns:
+    if chunk_size < 1:
+        raise ValueError("chunk size must be a positive number")
+
+    sql, params = task_list_query(status, assignee_id, title_query)
+    columns = TaskColumns()
+    strings: dict = {}
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            columns.extend(rows, strings)
+    return columns
+
+
+# --- archive ---------------------------------------------------------------
+# Done tasks that have not changed since a cutoff can be moved out of `tasks`
+# into a second SQLite file (archive_path()), attached to each connection as
+# "archive" once it exists (see _use_archive). The live table, its indexes and the stats counters then only
+# hold current work however much history piles up; pass include_archived=True
+# to list_tasks / count_tasks to read both. Archived tasks are history: the
+# other functions (get_task, update_task, ...) only see live tasks.
+
+
+# the list_tasks query over live and archived tasks: one index-ordered branch
+# per table, merged by SQLite (no sort of the combined rows)
+def _archive_union_query(
+    status: str | None,
+    assignee_id: int | None,
+    title_query: str | None,
+) -> tuple[str, list[object]]:
+    where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+    where = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+    branches = [
+        f"""
+        SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
+        FROM {schema}.tasks AS tasks LEFT JOIN main.users AS users ON tasks.assignee_id = users.id
+        {where}
+        """
+        for schema in ("main", "archive")
+    ]
+    return " UNION ALL ".join(branches) + " ORDER BY 5, 1", params * 2
+
+
+# columns an archived task keeps (archive.tasks adds archived_at)
+_ARCHIVED_COLUMNS = ("id", "title", "description", "status", "assignee_id", "created_at", "updated_at", "due_at", "priority")
+
+
+# move done tasks last changed before `before` (datetime or ISO string, UTC)
+# into the archive, batch_size tasks at a time; returns how many moved
+def archive_done_tasks(before: datetime | str, batch_size: int = 500) -> int:
+    if batch_size < 1:
+        raise ValueError("batch size must be a positive number")
+    cutoff = clean_timestamp(before, "before")
+    columns = ", ".join(_ARCHIVED_COLUMNS)
+    unchanged = " AND ".join(f"copy.{column} IS tasks.{column}" for column in _ARCHIVED_COLUMNS)
+
+    # A commit that spans the main and archive files is not atomic (not at all
+    # in WAL mode), so each step below commits one file and is safe to repeat
+    # after a crash: a task is never lost, and never stays in both files.
+    with connection() as conn:
+        # 0. A task in both files is a copy an interrupted run left behind,
+        #    and the live row wins: drop it, whether or not the task still
+        #    qualifies. (Seeks by the live ids; the archive is not scanned.)
+        if _use_archive(conn):
+            _commit_one(conn, "DELETE FROM archive.tasks WHERE id IN (SELECT id FROM main.tasks)", ())
+    moved = 0
+    while True:
+        with connection() as conn:
+            _use_archive(conn, create=True)
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT id FROM tasks
+                    WHERE status = 'done' AND COALESCE(updated_at, created_at) < ?
+                    LIMIT ?
+                    """,
+                    (cutoff, batch_size),
+                )
+            ]
+            deleted = dropped = 0
+            for chunk in chunks(ids):
+                placeholders = ", ".join("?" for _ in chunk)
+                # 1. Copy to the archive; OR IGNORE skips copies an interrupted run left.
+                _commit_one(
+                    conn,
+                    f"""
+                    INSERT OR IGNORE INTO archive.tasks ({columns})
+                    SELECT {columns} FROM main.tasks WHERE id IN ({placeholders})
+                    """,
+                    chunk,
+                )
+                # 2. Delete from main only the tasks whose archive copy matches them.
+                deleted += _commit_one(
+                    conn,
+                    f"""
+                    DELETE FROM main.tasks
+                    WHERE id IN ({placeholders})
+                      AND EXISTS (SELECT 1 FROM archive.tasks AS copy WHERE copy.id = tasks.id AND {unchanged})
+                    """,
+                    chunk,
+                )
+                # 3. A task changed in between stays live; drop its stale copy
+                #    (the next batch copies it again if it still qualifies).
+                dropped += _commit_one(
+                    conn,
+                    f"""
+                    DELETE FROM archive.tasks
+                    WHERE id IN ({placeholders})
+                      AND EXISTS (SELECT 1 FROM main.tasks AS live WHERE live.id = tasks.id)
+                    """,
+                    chunk,
+                )
+        moved += deleted
+        if dropped:
+            continue  # go round again for the tasks whose stale copies were dropped
+        if len(ids) < batch_size or not deleted:
+            return moved
+
+
+# run one write statement in its own transaction; returns its rowcount
+def _commit_one(conn: sqlite3.Connection, sql: str, params) -> int:
+    begin_write(conn)
+    try:
+        rowcount = conn.execute(sql, params).rowcount
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return rowcount
+
+
+# --- bulk writes ---------------------------------------------------------
+# Each bulk call validates everything up front, looks up assignees once,
+# and writes all rows with executemany inside a single transaction.
+
+# replace assignee ids (at position `index` in each row) that no longer exist with NULL
+def _drop_missing_assignees(conn: sqlite3.Connection, rows: list[tuple], index: int) -> list[tuple]:
+    # One user lookup for the whole batch instead of list_users() per row.
+    wanted = {row[index] for row in rows if row[index] is not None}
+    known = existing_ids(conn, "users", wanted)
+    for missing in sorted(wanted - known):
+        print(f"Warning: no user with id {missing}; storing assignee as NULL")
+    if wanted - known:
+        rows = [row[:index] + (None,) + row[index + 1 :] if row[index] not in known else row for row in rows]
+    return rows
+
+
+# add many tasks at once and return their new ids (in input order)
+def add_tasks_many(tasks) -> list[int]:
+    # tasks: iterable of (title, description, assignee_id)
+    rows = [clean_task_fields(title, description, assignee_id) for title, description, assignee_id in tasks]
+
+    if not rows:
+        return []
+
+    with connection() as conn:
+        try:
+            begin_write(conn)
+            rows = _drop_missing_assignees(conn, rows, 2)
+
+            cur = conn.cursor()
+            cur.executemany(
+                "INSERT INTO tasks (title, description, assignee_id) VALUES (?, ?, ?)",
+                rows,
+            )
+            # We hold the write lock and tasks uses AUTOINCREMENT, so the batch
+            # got consecutive ids ending at last_insert_rowid().
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+# add tasks that keep their status and created_at (e.g. rows from an export);
+# returns how many were added
+def import_tasks(tasks) -> int:
+    # tasks: iterable of (title, description, status, assignee_id, created_at,
+    # due_at, priority); status None means 'todo', created_at None means now,
+    # priority None means normal
+    rows = []
+    for title, description, status, assignee_id, created_at, due_at, priority in tasks:
+        title, description, assignee_id = clean_task_fields(title, description, assignee_id)
+        status = (status or "todo").strip().lower()
+        if status not in {"todo", "doing", "done"}:
+            raise ValueError("status must be one of: todo, doing, done")
+        if created_at:
+            created_at = clean_timestamp(created_at, "created_at")
+        priority, due_at = clean_schedule(DEFAULT_PRIORITY if priority is None else priority, due_at or None)
+        rows.append((title, description, status, assignee_id, created_at or None, due_at, priority))
+
+    if not rows:
+        return 0
+
+    with connection() as conn:
+        try:
+            begin_write(conn)
+            rows = _drop_missing_assignees(conn, rows, 3)
+            conn.executemany(
+                """
+                INSERT INTO tasks (title, description, status, assignee_id, created_at, due_at, priority)
+                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return len(rows)
+
+
+# update many task statuses at once; returns True/False per input row
+def update_status_many(updates) -> list[bool]:
+    # updates: iterable of (task_id, status)
+    rows = []
+    for task_id, status in updates:
+        status = status.strip().lower()
+        if status not in {"todo", "doing", "done"}:
+            raise ValueError("status must be one of: todo, doing, done")
+        rows.append((status, task_id))
+
+    if not rows:
+        return []
+
+    with connection() as conn:
+        try:
+            begin_write(conn)
+            existing = existing_ids(conn, "tasks", [task_id for _, task_id in rows])
+            conn.executemany(
+                "UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                rows,
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    return [task_id in existing for _, task_id in rows]
+
+
+# delete many tasks at once; returns True/False per input id
+def delete_tasks_many(task_ids) -> list[bool]:
+    ids = list(task_ids)
+    if not ids:
+        return []
+
+    with connection() as conn:
+        try:
+            begin_write(conn)
+            existing = existing_ids(conn, "tasks", ids)
+            conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in ids])
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    # A repeated id only counts as deleted the first time, like separate calls.
+    results = []
+    for task_id in ids:
+        results.append(task_id in existing)
+        existing.discard(task_id)
+    return results
+
+
+# --- deadlines and priorities ----------------------------------------------
+# Every task has a priority (0-3, see PRIORITIES in taskflow.queries) and an
+# optional due_at (UTC text, like created_at). The scheduler queries read the
+# partial indexes from migration 7, which only hold open tasks (status != 'done'):
+# each is an index seek plus `limit` rows, however many tasks there are.
+
+
+# set a task's priority and deadline (None clears it); returns True if the task exists
+def set_task_schedule(task_id: int, priority: int, due_at: datetime | str | None) -> bool:
+    priority, due_at = clean_schedule(priority, due_at)
+    with connection() as conn:
+        cur = conn.execute(
+            "UPDATE tasks SET priority = ?, due_at = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (priority, due_at, task_id),
+        )
+        conn.commit()
+        return cur.rowcount > 0
+
+
+# (priority, due_at) of a task, or None if it does not exist
+def get_task_schedule(task_id: int) -> tuple[int, str | None] | None:
+    with connection() as conn:
+        return conn.execute("SELECT priority, due_at FROM tasks WHERE id = ?", (task_id,)).fetchone()
+
+
+# an assignee's next open tasks (None: the unassigned ones): highest priority
+# first, then earliest deadline (tasks without one last), then oldest, as
+# (id, title, status, assignee_id, priority, due_at)
+def next_tasks(assignee_id: int | None, limit: int = 10) -> list[tuple[int, str, str, int | None, int, str | None]]:
+    if assignee_id is not None and assignee_id < 1:
+        raise ValueError("assignee id must be a positive number")
+    if limit < 1:
+        raise ValueError("limit must be a positive number")
+
+    # The ORDER BY repeats the idx_tasks_next columns, so rows come straight off the index.
+    sql = """
+        SELECT id, title, status, assignee_id, priority, due_at
+        FROM tasks
+        WHERE assignee_id IS ? AND status != 'done'
+        ORDER BY priority DESC, due_at IS NULL, due_at, created_at, id
+        LIMIT ?
+    """
+    with connection() as conn:
+        return conn.execute(sql, (assignee_id, limit)).fetchall()
+
+
+# open tasks due before `before` (and at or after `after`, if given; datetimes
+# or ISO strings, UTC), earliest first, as
+# (id, title, status, assignee_id, priority, due_at)
+def due_before(
+    before: datetime | str, limit: int = 100, after: datetime | str | None = None
+) -> list[tuple[int, str, str, int | None, int, str | None]]:
+    if limit < 1:
+        raise ValueError("limit must be a positive number")
+    # due_at >= '' holds for every deadline, so no `after` means no lower bound.
+    lower = "" if after is None else clean_timestamp(after, "after")
+    sql = """
+        SELECT id, title, status, assignee_id, priority, due_at
+        FROM tasks
+        WHERE status != 'done' AND due_at IS NOT NULL AND due_at >= ? AND due_at < ?
+        ORDER BY due_at, id
+        LIMIT ?
+    """
+    with connection() as conn:
+        return conn.execute(sql, (lower, clean_timestamp(before, "before"), limit)).fetchall()
+
+
+# open tasks whose deadline has passed, most overdue first
+def overdue_tasks(limit: int = 100) -> list[tuple[int, str, str, int | None, int, str | None]]:
+    return due_before(datetime.now(timezone.utc), limit)
+
+
+# --- change feed -----------------------------------------------------------
+# Triggers append a (kind, op, row_id) entry to task_changes for every insert,
+# update and delete on tasks and users (see migration 6), from any connection
+# or process. A consumer remembers the seq it last saw and asks for what
+# changed since, which costs O(changes) instead of re-reading every task:
+#
+#   seq = db.change_seq()
+#   ... later ...
+#   changes = db.changes_since(seq)
+#   if changes.reset: reload everything
+#   seq = changes.seq
+#
+# Entries are not needed once every consumer has moved past them. The log
+# trims itself to its newest CHANGE_LOG_LIMIT (100,000) entries (migration 8);
+# compact_changes() trims it further, e.g. from a nightly job.
+Changes = namedtuple("Changes", ["seq", "reset", "tasks", "deleted_tasks", "users", "deleted_users"])
+
+# changes_since gives up (reset=True) past this many log entries; a full
+# reload is cheaper than patching that many rows one by one
+CHANGES_MAX_ENTRIES = 10_000
+
+
+# the newest change seq (0 for a new database); a starting point for changes_since
+def change_seq() -> int:
+    with connection() as conn:
+        return conn.execute("SELECT ifnull(MAX(seq), 0) FROM task_changes").fetchone()[0]
+
+
+# what changed after `seq`: the current get_task rows of tasks inserted or
+# updated, ids of deleted tasks, and the same for users as (id, name).
+# Each row appears once however often it changed. reset=True means the log
+# no longer reaches back to `seq` (compacted) or has too many entries; the
+# caller should reload everything and continue from the returned seq.
+def changes_since(seq: int, max_entries: int = CHANGES_MAX_ENTRIES) -> Changes:
+    if seq < 0:
+        raise ValueError("seq cannot be negative")
+    with connection() as conn:
+        # One read transaction, so the log and the rows come from the same snapshot.
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN")
+        try:
+            # Two subqueries: each is a single b-tree seek, where MAX and MIN
+            # side by side in one SELECT would scan the whole log.
+            latest, oldest = conn.execute(
+                "SELECT (SELECT MAX(seq) FROM task_changes), (SELECT MIN(seq) FROM task_changes)"
+            ).fetchone()
+            # Entries before `oldest` may have been compacted away. An empty
+            # log has never had an entry (compaction keeps the newest one).
+            current = latest or 0
+            if (oldest is not None and seq < oldest - 1) or seq > current:
+                return Changes(current, True, [], [], [], [])
+
+            entries = conn.execute(
+                "SELECT seq, kind, row_id FROM task_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, max_entries + 1),
+            ).fetchall()
+            if len(entries) > max_entries:
+                return Changes(current, True, [], [], [], [])
+
+            task_ids = list(dict.fromkeys(row_id for _seq, kind, row_id in entries if kind == "task"))
+            user_ids = list(dict.fromkeys(row_id for _seq, kind, row_id in entries if kind == "user"))
+            tasks = []
+            for chunk in chunks(task_ids):
+                placeholders = ", ".join("?" for _ in chunk)
+                tasks.extend(
+                    conn.execute(
+                        f"""
+                        SELECT id, title, description, status, assignee_id, created_at, updated_at, due_at, priority
+                        FROM tasks WHERE id IN ({placeholders})
+                        """,
+                        chunk,
+                    )
+                )
+            users = []
+            for chunk in chunks(user_ids):
+                placeholders = ", ".join("?" for _ in chunk)
+                users.extend(conn.execute(f"SELECT id, name FROM users WHERE id IN ({placeholders})", chunk))
+        finally:
+            if own_transaction:
+                conn.rollback()
+
+    # Rows that changed and are gone now were deleted.
+    live_tasks = {row[0] for row in tasks}
+    live_users = {row[0] for row in users}
+    return Changes(
+        entries[-1][0] if entries else seq,
+        False,
+        sorted(tasks),
+        [task_id for task_id in task_ids if task_id not in live_tasks],
+        sorted(users),
+        [user_id for user_id in user_ids if user_id not in live_users],
+    )
+
+
+# drop all but the newest `keep` change log entries; returns how many were removed
+# (the newest entry always stays: it records how far the log has got)
+def compact_changes(keep: int = CHANGES_MAX_ENTRIES) -> int:
+    if keep < 0:
+        raise ValueError("keep cannot be negative")
+    with connection() as conn:
+        cur = conn.execute(
+            "DELETE FROM task_changes WHERE seq <= (SELECT MAX(seq) FROM task_changes) - ?",
+            (max(keep, 1),),
+        )
+        conn.commit()
+        return cur.rowcount
+
+
+# --- write-behind queue ----------------------------------------------------
+# Optional group commit for many small updates: callers enqueue a change and
+# get a Future back; one writer thread applies everything that arrived within
+# flush_interval (or up to batch_size changes) in a single transaction, so a
+# burst of status flips costs one commit instead of one per change.
+
+class WriteQueue:
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.05) -> None:
+        if batch_size < 1:
+            raise ValueError("batch size must be at least 1")
+        if flush_interval < 0:
+            raise ValueError("flush interval cannot be negative")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="taskflow-writer", daemon=True)
+        self._thread.start()
+
+    # queue a status change; the Future resolves to True/False like update_task_status
+    def update_status(self, task_id: int, status: str) -> "Future":
+        status = status.strip().lower()
+        if status not in {"todo", "doing", "done"}:
+            raise ValueError("status must be one of: todo, doing, done")
+        return self._put("status", (task_id, status))
+
+    # queue an assignee change; the Future resolves like update_task_assignee
+    def update_assignee(self, task_id: int, assignee_id: int | None) -> "Future":
+        if assignee_id is not None and assignee_id < 1:
+            raise ValueError("assignee id must be a positive number")
+        return self._put("assignee", (task_id, assignee_id))
+
+    # block until everything queued so far is committed
+    def flush(self, timeout: float | None = None) -> None:
+        self._put("flush", ()).result(timeout)
+
+    # flush, then stop the writer thread
+    def close(self, timeout: float | None = None) -> None:
+        try:
+            done = self._put("stop", ())
+        except RuntimeError:
+            return  # already closed
+        done.result(timeout)
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "WriteQueue":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _put(self, kind: str, args: tuple) -> "Future":
+        from concurrent.futures import Future
+
+        future = Future()
+        # Check and enqueue under one lock, so nothing can be queued behind
+        # the stop marker, where the writer thread would never see it.
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("write queue is closed")
+            self._queue.put((kind, args, future))
+            self._closed = kind == "stop"
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Gather more changes until the interval passes or the batch is full.
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] in ("status", "assignee"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # flush/stop markers end a batch; they resolve after it commits.
+            marker = batch.pop() if batch[-1][0] in ("flush", "stop") else None
+            if batch:
+                self._commit(batch)
+            if marker is not None:
+                marker[2].set_result(None)
+                if marker[0] == "stop":
+                    return
+
+    def _commit(self, batch: list) -> None:
+        # Skip changes whose Future was cancelled before we got to them.
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            results = []
+            with connection() as conn:
+                try:
+                    begin_write(conn)
+                    for kind, args, _future in batch:
+                        if kind == "status":
+                            task_id, status = args
+                            cur = conn.execute(
+                                "UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                                (status, task_id),
+                            )
+                        else:
+                            task_id, assignee_id = args
+                            assignee_id = resolve_assignee(conn, assignee_id)
+                            cur = conn.execute(
+                                "UPDATE tasks SET assignee_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                                (assignee_id, task_id),
+                            )
+                        results.append(cur.rowcount > 0)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+        except Exception as exc:
+            # The batch is one transaction, so a failure fails every change in it.
+            for _kind, _args, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (_kind, _args, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+_write_queue: WriteQueue | None = None
+_write_queue_lock = threading.Lock()
+
+
+# the shared write queue, started on first use and flushed at interpreter exit
+def get_write_queue() -> WriteQueue:
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue()
+            atexit.register(close_write_queue)
+        return _write_queue
+
+
+def close_write_queue() -> None:
+    global _write_queue
+    with _write_queue_lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.close()
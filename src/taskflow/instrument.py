@@ -0,0 +1,424 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+from taskflow import db
+
+# Opt-in instrumentation for taskflow.db.
+#
+# enable() swaps every public db function for a timed wrapper and makes
+# db.connection() hand out timing proxies around the pooled connections.
+# Each call and each statement is recorded in an in-memory latency histogram;
+# statements at or above the slow-query threshold are also kept in a short
+# slow-query log. disable() puts the original functions back, so a disabled
+# layer costs nothing.
+#
+# A statement's time is the time spent inside its execute call plus the
+# fetch calls that read its rows, so Python work between fetches (e.g. an
+# iter_tasks consumer) is not counted. rows_changed counts rows written by a
+# statement, including those written by the triggers it fired; rows_returned
+# counts rows a SELECT handed back; calls record how many rows a list result
+# held.
+#
+#   from taskflow import instrument
+#   instrument.enable(slow_query_ms=50)
+#   ...
+#   print(instrument.snapshot()["statements"])
+
+# Bucket upper bounds in milliseconds; the last bucket catches everything slower.
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# how many slow queries to keep (oldest are dropped)
+SLOW_LOG_SIZE = 200
+
+# db functions that manage connections/settings rather than query data
+_PLUMBING = {
+    "connection",
+    "get_connection",
+    "open_pool",
+    "close_pool",
+    "configure_pool",
+    "configure_storage",
+    "initialize_db",
+}
+
+SlowQuery = namedtuple("SlowQuery", ["sql", "duration_ms", "rows_changed", "rows_returned", "caller", "at"])
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    # upper bound of the bucket holding the pct-th percentile (capped at the max seen)
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self) -> dict[str, object]:
+        labels = [f"<={bound:g}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g}"]
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_originals: dict[str, Callable] = {}
+# timing proxies by id of the pooled connection (sqlite3 connections are not
+# weak-referenceable); one per connection so id(conn) stays stable for db's caches
+_proxies: dict[int, "_TimedConnection"] = {}
+_slow_query_ms = 100.0
+_on_slow: Callable[[SlowQuery], None] | None = None
+
+_calls: dict[str, Histogram] = {}
+_call_rows: dict[str, int] = {}
+_statements: dict[str, Histogram] = {}
+_statement_rows: dict[str, int] = {}
+_statement_returned: dict[str, int] = {}
+_statement_callers: dict[str, dict[str, int]] = {}
+_slow_log: deque[SlowQuery] = deque(maxlen=SLOW_LOG_SIZE)
+_since = time.time()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LIST_RE = re.compile(r"\?(?:\s*,\s*\?){2,}")
+
+
+# collapse whitespace, literals and long IN (?, ?, ...) lists so the same
+# statement with other values or list lengths shares one entry
+def normalize_sql(sql: str) -> str:
+    sql = " ".join(sql.split())
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _LIST_RE.sub("?, ...", sql)
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+# start recording; statements taking at least slow_query_ms go to the slow-query
+# log and, if given, to on_slow (called on the thread that ran the statement)
+def enable(slow_query_ms: float = 100.0, on_slow: Callable[[SlowQuery], None] | None = None) -> None:
+    global _slow_query_ms, _on_slow
+    if slow_query_ms < 0:
+        raise ValueError("slow query threshold cannot be negative")
+    _slow_query_ms = slow_query_ms
+    _on_slow = on_slow
+    if is_enabled():
+        return
+
+    for name, value in list(vars(db).items()):
+        if name.startswith("_") or name in _PLUMBING:
+            continue
+        if inspect.isfunction(value) and value.__module__ == db.__name__:
+            _originals[name] = value
+            setattr(db, name, _timed(name, value))
+    _originals["connection"] = db.connection
+    db.connection = _traced_connection
+
+
+# stop recording and restore the original functions (collected data is kept)
+def disable() -> None:
+    for name, original in _originals.items():
+        setattr(db, name, original)
+    _originals.clear()
+    _proxies.clear()
+
+
+# drop everything recorded so far
+def reset() -> None:
+    global _since
+    with _lock:
+        _calls.clear()
+        _call_rows.clear()
+        _statements.clear()
+        _statement_rows.clear()
+        _statement_returned.clear()
+        _statement_callers.clear()
+        _slow_log.clear()
+        _since = time.time()
+
+
+# everything recorded since the last reset, as plain JSON-friendly data
+def snapshot() -> dict[str, object]:
+    with _lock:
+        calls = {name: {**hist.as_dict(), "rows": _call_rows.get(name, 0)} for name, hist in _calls.items()}
+        statements = {
+            sql: {
+                **hist.as_dict(),
+                "rows_changed": _statement_rows.get(sql, 0),
+                "rows_returned": _statement_returned.get(sql, 0),
+                "callers": dict(_statement_callers.get(sql, {})),
+            }
+            for sql, hist in _statements.items()
+        }
+        slow = [record._asdict() for record in _slow_log]
+    return {
+        "enabled": is_enabled(),
+        "since": _since,
+        "slow_query_ms": _slow_query_ms,
+        "calls": calls,
+        "statements": statements,
+        "slow_queries": slow,
+    }
+
+
+# write snapshot() to a JSON file
+def export_json(path: Path | str) -> None:
+    Path(path).write_text(json.dumps(snapshot(), indent=2) + "\n", encoding="utf-8")
+
+
+# TASKFLOW_METRICS=<file> turns instrumentation on and writes the snapshot to
+# that file at exit; TASKFLOW_SLOW_QUERY_MS sets the threshold
+def enable_from_env() -> bool:
+    path = os.environ.get("TASKFLOW_METRICS")
+    if not path:
+        return False
+    slow_query_ms = float(os.environ.get("TASKFLOW_SLOW_QUERY_MS", "100"))
+    enable(slow_query_ms, on_slow=_print_slow)
+    atexit.register(export_json, path)
+    return True
+
+
+def _print_slow(record: SlowQuery) -> None:
+    print(f"Slow query ({record.duration_ms:.1f} ms in {record.caller}): {record.sql}")
+
+
+def _stack() -> list[str]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _timed(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            stack.pop()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        rows = len(result) if isinstance(result, list) else 0
+        with _lock:
+            _calls.setdefault(name, Histogram()).add(elapsed_ms)
+            _call_rows[name] = _call_rows.get(name, 0) + rows
+        if inspect.isgenerator(result):
+            return _traced_iter(name, result)
+        return result
+
+    return wrapper
+
+
+def _traced_iter(name: str, iterator):
+    # Attribute statements run while the generator is consumed to its function.
+    stack = _stack()
+    while True:
+        stack.append(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stack.pop()
+        yield item
+
+
+@contextmanager
+def _traced_connection():
+    original = _originals.get("connection", db.connection)
+    with original() as conn:
+        proxy = _proxies.get(id(conn))
+        if proxy is None or proxy._conn is not conn:
+            proxy = _proxies[id(conn)] = _TimedConnection(conn)
+        # Cursors still open when this block exits are recorded then.
+        blocks = _blocks()
+        blocks.append([])
+        try:
+            yield proxy
+        finally:
+            for cursor in blocks.pop():
+                cursor._finish()
+
+
+def _blocks() -> list[list["_TimedCursor"]]:
+    blocks = getattr(_local, "blocks", None)
+    if blocks is None:
+        blocks = _local.blocks = []
+    return blocks
+
+
+# Stands in for a pooled connection: statements run through _TimedCursor,
+# everything else goes to the real connection.
+class _TimedConnection:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        object.__setattr__(self, "_conn", conn)
+
+    def cursor(self) -> "_TimedCursor":
+        return _TimedCursor(self._conn)
+
+    def execute(self, sql: str, parameters=()) -> "_TimedCursor":
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> "_TimedCursor":
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def __enter__(self) -> "_TimedConnection":
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc: object):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        setattr(self._conn, name, value)
+
+
+class _TimedCursor:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        object.__setattr__(self, "_cursor", conn.cursor())
+        object.__setattr__(self, "_conn", conn)
+        # [sql, elapsed_ms, rows_changed, rows_returned, caller] of the open statement
+        object.__setattr__(self, "_pending", None)
+        blocks = _blocks()
+        if blocks:
+            blocks[-1].append(self)
+
+    def execute(self, sql: str, parameters=()) -> "_TimedCursor":
+        return self._run(self._cursor.execute, sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> "_TimedCursor":
+        return self._run(self._cursor.executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._returned(1)
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list:
+        rows = self._fetch(self._cursor.fetchmany, self._cursor.arraysize if size is None else size)
+        self._returned(len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> list:
+        rows = self._fetch(self._cursor.fetchall)
+        self._returned(len(rows))
+        self._finish()
+        return rows
+
+    def __iter__(self) -> "_TimedCursor":
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        setattr(self._cursor, name, value)
+
+    def _run(self, method: Callable, sql: str, parameters) -> "_TimedCursor":
+        self._finish()
+        caller = _stack()[-1] if _stack() else "(none)"
+        changes_before = self._conn.total_changes
+        start = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            object.__setattr__(
+                self, "_pending", [sql, elapsed_ms, self._conn.total_changes - changes_before, 0, caller]
+            )
+        if self._cursor.description is None:
+            self._finish()  # no result rows to wait for
+        return self
+
+    def _fetch(self, method: Callable, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[1] += (time.perf_counter() - start) * 1000
+
+    def _returned(self, rows: int) -> None:
+        if self._pending is not None:
+            self._pending[3] += rows
+
+    def _finish(self) -> None:
+        pending = self._pending
+        if pending is not None:
+            object.__setattr__(self, "_pending", None)
+            _record(*pending)
+
+
+def _record(sql: str, elapsed_ms: float, rows_changed: int, rows_returned: int, caller: str) -> None:
+    key = normalize_sql(sql)
+    slow = None
+    with _lock:
+        _statements.setdefault(key, Histogram()).add(elapsed_ms)
+        _statement_rows[key] = _statement_rows.get(key, 0) + rows_changed
+        _statement_returned[key] = _statement_returned.get(key, 0) + rows_returned
+        callers = _statement_callers.setdefault(key, {})
+        callers[caller] = callers.get(caller, 0) + 1
+        if elapsed_ms >= _slow_query_ms:
+            slow = SlowQuery(" ".join(sql.split()), elapsed_ms, rows_changed, rows_returned, caller, time.time())
+            _slow_log.append(slow)
+    if slow is not None and _on_slow is not None:
+        _on_slow(slow)
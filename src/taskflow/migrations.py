@@ -0,0 +1,334 @@
+import sqlite3
+
+# entries the change log keeps at most (migration 8; changing it needs a new migration)
+CHANGE_LOG_LIMIT = 100_000
+
+# Numbered schema migrations, tracked with PRAGMA user_version.
+# Append new migrations at the end and never edit one that has shipped:
+# a database at version N has run exactly migrations 1..N.
+MIGRATIONS: list[tuple[int, str, list[str]]] = [
+    (
+        1,
+        "users and tasks tables",
+        [
+            # IF NOT EXISTS so databases created before migrations existed
+            # (user_version 0, tables already there) upgrade cleanly.
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT,
+                status TEXT NOT NULL DEFAULT 'todo' CHECK(status IN('todo', 'doing', 'done')),
+                assignee_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "indexes for the task list access paths",
+        [
+            # list_tasks with no filter (or only a title filter) walks this in order.
+            "CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at, id)",
+            # status filter, and each branch of list_tasks_by_statuses.
+            "CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at, id)",
+            # assignee filter; also serves the ON DELETE SET NULL lookup in delete_user.
+            "CREATE INDEX IF NOT EXISTS idx_tasks_assignee_created ON tasks (assignee_id, created_at, id)",
+        ],
+    ),
+    (
+        3,
+        "change counter for the users table",
+        [
+            # One row per tracked table; triggers bump it on every change so
+            # caches can check freshness with a single primary-key read.
+            """
+            CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('users', 0)",
+            """
+            CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'users';
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'users';
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'users';
+            END
+            """,
+        ],
+    ),
+    (
+        4,
+        "trigger-maintained task counts by status and assignee",
+        [
+            # task_stats() reads these instead of counting the tasks table.
+            """
+            CREATE TABLE IF NOT EXISTS task_status_counts (
+                status TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            # assignee_id 0 holds the unassigned tasks (real ids start at 1).
+            # Rows are removed when their count drops to zero.
+            """
+            CREATE TABLE IF NOT EXISTS task_assignee_counts (
+                assignee_id INTEGER PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            # Seed from the rows already there.
+            "INSERT OR IGNORE INTO task_status_counts (status, count) VALUES ('todo', 0), ('doing', 0), ('done', 0)",
+            """
+            UPDATE task_status_counts
+            SET count = (SELECT COUNT(*) FROM tasks WHERE tasks.status = task_status_counts.status)
+            """,
+            """
+            INSERT OR REPLACE INTO task_assignee_counts (assignee_id, count)
+            SELECT ifnull(assignee_id, 0), COUNT(*) FROM tasks GROUP BY 1
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_counts_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_status_counts (status, count) VALUES (NEW.status, 1)
+                    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+                INSERT INTO task_assignee_counts (assignee_id, count) VALUES (ifnull(NEW.assignee_id, 0), 1)
+                    ON CONFLICT (assignee_id) DO UPDATE SET count = count + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_counts_delete AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_status_counts SET count = count - 1 WHERE status = OLD.status;
+                UPDATE task_assignee_counts SET count = count - 1 WHERE assignee_id = ifnull(OLD.assignee_id, 0);
+                DELETE FROM task_assignee_counts WHERE assignee_id = ifnull(OLD.assignee_id, 0) AND count <= 0;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_counts_status AFTER UPDATE OF status ON tasks
+            WHEN OLD.status IS NOT NEW.status
+            BEGIN
+                UPDATE task_status_counts SET count = count - 1 WHERE status = OLD.status;
+                INSERT INTO task_status_counts (status, count) VALUES (NEW.status, 1)
+                    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+            END
+            """,
+            # Also fires for ON DELETE SET NULL when a user is deleted.
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_counts_assignee AFTER UPDATE OF assignee_id ON tasks
+            WHEN OLD.assignee_id IS NOT NEW.assignee_id
+            BEGIN
+                UPDATE task_assignee_counts SET count = count - 1 WHERE assignee_id = ifnull(OLD.assignee_id, 0);
+                DELETE FROM task_assignee_counts WHERE assignee_id = ifnull(OLD.assignee_id, 0) AND count <= 0;
+                INSERT INTO task_assignee_counts (assignee_id, count) VALUES (ifnull(NEW.assignee_id, 0), 1)
+                    ON CONFLICT (assignee_id) DO UPDATE SET count = count + 1;
+            END
+            """,
+        ],
+    ),
+    (
+        5,
+        "index for finding archivable tasks",
+        [
+            # archive_done_tasks: done tasks whose last change is before a cutoff.
+            """
+            CREATE INDEX IF NOT EXISTS idx_tasks_done_changed
+            ON tasks (COALESCE(updated_at, created_at)) WHERE status = 'done'
+            """,
+        ],
+    ),
+    (
+        6,
+        "change log for tasks and users",
+        [
+            # Append-only feed read by db.changes_since(). seq only grows
+            # (AUTOINCREMENT never reuses a value, even after compaction).
+            # The triggers record which row changed; readers fetch its current values.
+            """
+            CREATE TABLE IF NOT EXISTS task_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL CHECK(kind IN('task', 'user')),
+                op TEXT NOT NULL CHECK(op IN('insert', 'update', 'delete')),
+                row_id INTEGER NOT NULL,
+                changed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_changes (kind, op, row_id) VALUES ('task', 'insert', NEW.id);
+            END
+            """,
+            # Also fires for ON DELETE SET NULL when a user is deleted.
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_update AFTER UPDATE ON tasks
+            BEGIN
+                INSERT INTO task_changes (kind, op, row_id) VALUES ('task', 'update', NEW.id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_delete AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO task_changes (kind, op, row_id) VALUES ('task', 'delete', OLD.id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS users_changes_insert AFTER INSERT ON users
+            BEGIN
+                INSERT INTO task_changes (kind, op, row_id) VALUES ('user', 'insert', NEW.id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS users_changes_update AFTER UPDATE ON users
+            BEGIN
+                INSERT INTO task_changes (kind, op, row_id) VALUES ('user', 'update', NEW.id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS users_changes_delete AFTER DELETE ON users
+            BEGIN
+                INSERT INTO task_changes (kind, op, row_id) VALUES ('user', 'delete', OLD.id);
+            END
+            """,
+        ],
+    ),
+    (
+        7,
+        "task deadlines and priorities",
+        [
+            # due_at: UTC text like created_at, NULL for no deadline.
+            "ALTER TABLE tasks ADD COLUMN due_at DATETIME",
+            # 0 low, 1 normal, 2 high, 3 urgent (db.PRIORITIES)
+            "ALTER TABLE tasks ADD COLUMN priority INTEGER NOT NULL DEFAULT 1 CHECK(priority BETWEEN 0 AND 3)",
+            # next_tasks: an assignee's open tasks, most urgent first, then
+            # earliest deadline (no deadline last). Done tasks are left out
+            # of both indexes, so they stay small as tasks get finished.
+            """
+            CREATE INDEX IF NOT EXISTS idx_tasks_next
+            ON tasks (assignee_id, priority DESC, due_at IS NULL, due_at, created_at, id)
+            WHERE status != 'done'
+            """,
+            # due_before / overdue_tasks: open tasks by deadline.
+            """
+            CREATE INDEX IF NOT EXISTS idx_tasks_due
+            ON tasks (due_at) WHERE status != 'done' AND due_at IS NOT NULL
+            """,
+        ],
+    ),
+    (
+        8,
+        "cap the change log",
+        [
+            # Every 1000th entry trims the log to its newest CHANGE_LOG_LIMIT
+            # entries (a rowid range delete), so it cannot grow without bound
+            # when nobody runs db.compact_changes(). Readers further behind
+            # than that get reset=True from changes_since and reload.
+            f"""
+            CREATE TRIGGER IF NOT EXISTS task_changes_cap AFTER INSERT ON task_changes
+            WHEN NEW.seq % 1000 = 0
+            BEGIN
+                DELETE FROM task_changes WHERE seq <= NEW.seq - {CHANGE_LOG_LIMIT};
+            END
+            """,
+        ],
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Schema of the archive database, attached to connections as "archive" once
+# the file exists (see db.archive_done_tasks). Numbered separately, in the
+# archive file's own user_version. Archived rows keep their task id; there is
+# no foreign key (SQLite has none across files), delete_user clears
+# assignee_id itself.
+ARCHIVE_MIGRATIONS: list[tuple[int, str, list[str]]] = [
+    (
+        1,
+        "archived tasks",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS archive.tasks (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT,
+                status TEXT NOT NULL,
+                assignee_id INTEGER,
+                created_at DATETIME NOT NULL,
+                updated_at DATETIME,
+                archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            # The same access paths as the live table, so each branch of
+            # list_tasks(include_archived=True) reads in order.
+            "CREATE INDEX IF NOT EXISTS archive.idx_tasks_created ON tasks (created_at, id)",
+            "CREATE INDEX IF NOT EXISTS archive.idx_tasks_status_created ON tasks (status, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS archive.idx_tasks_assignee_created ON tasks (assignee_id, created_at, id)",
+        ],
+    ),
+    (
+        2,
+        "deadlines and priorities of archived tasks",
+        [
+            "ALTER TABLE archive.tasks ADD COLUMN due_at DATETIME",
+            "ALTER TABLE archive.tasks ADD COLUMN priority INTEGER NOT NULL DEFAULT 1",
+        ],
+    ),
+]
+
+
+def get_version(conn: sqlite3.Connection, schema: str = "main") -> int:
+    return conn.execute(f"PRAGMA {schema}.user_version").fetchone()[0]
+
+
+# apply pending migrations in one transaction and return the schema version
+def migrate(
+    conn: sqlite3.Connection,
+    migrations: list[tuple[int, str, list[str]]] = MIGRATIONS,
+    schema: str = "main",
+) -> int:
+    latest = migrations[-1][0]
+    # Cheap check first so an up-to-date database costs a single PRAGMA read.
+    if get_version(conn, schema) >= latest:
+        return get_version(conn, schema)
+
+    if conn.in_transaction:
+        raise RuntimeError("cannot migrate inside an open transaction")
+
+    # IMMEDIATE takes the write lock up front, so two processes starting at
+    # the same time cannot both apply the same migration.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the lock; another process may have migrated already.
+        version = get_version(conn, schema)
+        for number, _description, statements in migrations:
+            if number <= version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            version = number
+        # PRAGMA does not accept bound parameters; version is always an int here.
+        conn.execute(f"PRAGMA {schema}.user_version = {int(version)}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return version
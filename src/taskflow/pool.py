@@ -0,0 +1,142 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no pooled connection frees up within the timeout."""
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when a closed pool is asked for a connection."""
+
+
+# A small pool of long-lived sqlite3 connections.
+# Each thread borrows one connection at a time; nested borrows on the same
+# thread get the same connection back, so db helpers can call each other
+# without deadlocking a size-1 pool.
+class ConnectionPool:
+    def __init__(
+        self,
+        path: Path | str,
+        size: int = 5,
+        timeout: float = 5.0,
+        setup: Callable[[sqlite3.Connection], None] | None = None,
+        factory: Callable[[], sqlite3.Connection] | None = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        if timeout < 0:
+            raise ValueError("pool timeout cannot be negative")
+
+        self.path = Path(path)
+        self.size = size
+        self.timeout = timeout
+        self._setup = setup
+        self._factory = factory
+
+        # LIFO so the most recently used (warm) connection is handed out first.
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _connect(self) -> sqlite3.Connection:
+        # A factory must also pass check_same_thread=False: a connection may be
+        # reused by another thread after it is returned to the pool.
+        if self._factory is not None:
+            conn = self._factory()
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA foreign_keys = ON;")
+        if self._setup is not None:
+            self._setup(conn)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def acquire(self, timeout: float | None = None) -> sqlite3.Connection:
+        if self._closed:
+            raise PoolClosedError("connection pool is closed")
+
+        # Re-entrant: hand back the connection this thread already holds.
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        wait = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            raise PoolTimeoutError(f"no database connection available after {wait:g}s")
+
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if getattr(self._local, "conn", None) is not conn:
+            raise ValueError("connection was not acquired by this thread")
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+
+        try:
+            # Never hand out a connection with a half-finished transaction.
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close(self) -> None:
+        # Close idle connections now; busy ones are closed when released.
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
@@ -0,0 +1,197 @@
+import sqlite3
+from datetime import datetime, timezone
+
+# Validation and SQL building for the tasks and users tables, shared by the
+# SQLite backends (taskflow.db, taskflow.sharded) and checked the same way by
+# taskflow.storage.MemoryStorage. Nothing here opens a connection or knows
+# where the database lives; the callers pass theirs in.
+
+
+def resolve_assignee(conn: sqlite3.Connection, assignee_id: int | None) -> int | None:
+    # Single indexed EXISTS on the caller's connection (and transaction),
+    # instead of loading every user to check one id.
+    if assignee_id is None:
+        return None
+    cur = conn.execute("SELECT EXISTS(SELECT 1 FROM users WHERE id = ?)", (assignee_id,))
+    if not cur.fetchone()[0]:
+        print(f"Warning: no user with id {assignee_id}; storing assignee as NULL")
+        return None
+    return assignee_id
+
+
+# validate and normalize the list_tasks filters; None means "no filter"
+# (a blank title_query is no filter too)
+def clean_task_filters(
+    status: str | None,
+    assignee_id: int | None,
+    title_query: str | None,
+) -> tuple[str | None, int | None, str | None]:
+    if status is not None:
+        status = status.strip().lower()
+        if status not in {"todo", "doing", "done"}:
+            raise ValueError("status must be one of: todo, doing, done")
+
+    if assignee_id is not None:
+        if assignee_id < 1:
+            raise ValueError("assignee id must be a positive number")
+
+    if title_query is not None:
+        title_query = title_query.strip()
+        if title_query == "":
+            title_query = None
+    return status, assignee_id, title_query
+
+
+# turn the list_tasks filters into WHERE clauses + params (validating them)
+def task_filter_clauses(
+    status: str | None,
+    assignee_id: int | None,
+    title_query: str | None,
+) -> tuple[list[str], list[object]]:
+    # Filters are optional; we only add WHERE clauses when provided.
+    status, assignee_id, title_query = clean_task_filters(status, assignee_id, title_query)
+
+    where_clauses = []
+    params: list[object] = []
+
+    if status is not None:
+        where_clauses.append("tasks.status = ?")
+        params.append(status)
+
+    if assignee_id is not None:
+        where_clauses.append("tasks.assignee_id = ?")
+        params.append(assignee_id)
+
+    if title_query is not None:
+        where_clauses.append("tasks.title LIKE ?")
+        like_value = f"%{title_query}%"
+        params.append(like_value)
+
+    return where_clauses, params
+
+
+# build the list_tasks query; shared by list_tasks, list_tasks_page and iter_tasks
+def task_list_query(
+    status: str | None,
+    assignee_id: int | None,
+    title_query: str | None,
+    after: tuple[str, int] | None = None,
+) -> tuple[str, list[object]]:
+    where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+
+    sql = """
+        SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
+        FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
+    """
+
+    if after is not None:
+        # Keyset cursor: continue strictly after the last row of the previous page.
+        # The row-value comparison lets SQLite seek into the (…, created_at, id) indexes.
+        after_created_at, after_id = after
+        where_clauses.append("(tasks.created_at, tasks.id) > (?, ?)")
+        params.extend([after_created_at, after_id])
+
+    if where_clauses:
+        sql += " WHERE " + " AND ".join(where_clauses)
+
+    sql += " ORDER BY tasks.created_at, tasks.id"
+    return sql, params
+
+
+# SQLite caps the number of bound parameters per statement, so IN (...)
+# lookups are split into chunks of this size.
+IN_CHUNK = 500
+
+
+def chunks(values: list, size: int = IN_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def existing_ids(conn: sqlite3.Connection, table: str, ids) -> set[int]:
+    # table is always one of our own table names, never user input.
+    wanted = list(set(ids))
+    found: set[int] = set()
+    for chunk in chunks(wanted):
+        placeholders = ", ".join(["?"] * len(chunk))
+        cur = conn.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", chunk)
+        found.update(row[0] for row in cur)
+    return found
+
+
+def begin_write(conn: sqlite3.Connection) -> None:
+    # Take the write lock before reading, so lookups and writes see the same data.
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+# validate and normalize one task's fields (title, description, assignee_id)
+def clean_task_fields(
+    title: str, description: str | None, assignee_id: int | None
+) -> tuple[str, str | None, int | None]:
+    title = title.strip()
+    if not title:
+        raise ValueError("title cannot be empty")
+    if description is not None:
+        description = description.strip()
+        if description == "":
+            description = None
+    if assignee_id is not None and assignee_id < 1:
+        raise ValueError("assignee id must be a positive number")
+    return title, description, assignee_id
+
+
+# --- deadlines and priorities ----------------------------------------------
+
+# priority names, indexed by the stored value
+PRIORITIES = ("low", "normal", "high", "urgent")
+DEFAULT_PRIORITY = 1
+
+
+class _Unchanged:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "UNCHANGED"
+
+
+# the default of update_task's priority and due_at: keep the stored value
+UNCHANGED = _Unchanged()
+
+
+# a datetime or ISO string as text in the CURRENT_TIMESTAMP format (UTC), so
+# comparisons and the created_at order work on the stored values
+def clean_timestamp(value: datetime | str, name: str) -> str:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an ISO date/time, got {value!r}") from None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def clean_priority(priority: int) -> int:
+    if not 0 <= priority < len(PRIORITIES):
+        raise ValueError(f"priority must be between 0 and {len(PRIORITIES) - 1}")
+    return priority
+
+
+# priority and due_at as stored (due_at None means no deadline)
+def clean_schedule(priority: int, due_at: datetime | str | None) -> tuple[int, str | None]:
+    return clean_priority(priority), None if due_at is None else clean_timestamp(due_at, "due_at")
+
+
+# SET clauses + params for update_task's priority and due_at, leaving out
+# the ones that are UNCHANGED
+def schedule_assignments(priority, due_at) -> tuple[list[str], list[object]]:
+    assignments: list[str] = []
+    params: list[object] = []
+    if priority is not UNCHANGED:
+        assignments.append("priority = ?")
+        params.append(clean_priority(priority))
+    if due_at is not UNCHANGED:
+        assignments.append("due_at = ?")
+        params.append(None if due_at is None else clean_timestamp(due_at, "due_at"))
+    return assignments, params
@@ -0,0 +1,164 @@
+import sqlite3
+from array import array
+
+# Compact typed rows for taskflow.db.
+# The record classes use __slots__ (no per-row __dict__), and the row
+# factories share one string object for repeated values such as status and
+# assignee names, so a big result holds each distinct string once.
+# Records compare equal to each other field by field and unpack like the
+# tuples the older db functions return (`task_id, title, *_ = task`).
+
+
+class _Record:
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+# one row of tasks (what get_task returns)
+class Task(_Record):
+    __slots__ = (
+        "id",
+        "title",
+        "description",
+        "status",
+        "assignee_id",
+        "created_at",
+        "updated_at",
+        "due_at",
+        "priority",
+    )
+    _fields = __slots__
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        description: str | None,
+        status: str,
+        assignee_id: int | None,
+        created_at: str,
+        updated_at: str | None,
+        due_at: str | None,
+        priority: int,
+    ) -> None:
+        self.id = id
+        self.title = title
+        self.description = description
+        self.status = status
+        self.assignee_id = assignee_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.due_at = due_at
+        self.priority = priority
+
+
+# one task list row (what list_tasks returns), with the assignee's name
+class TaskSummary(_Record):
+    __slots__ = ("id", "title", "status", "assignee", "created_at")
+    _fields = __slots__
+
+    def __init__(self, id: int, title: str, status: str, assignee: str | None, created_at: str) -> None:
+        self.id = id
+        self.title = title
+        self.status = status
+        self.assignee = assignee
+        self.created_at = created_at
+
+
+class User(_Record):
+    __slots__ = ("id", "name")
+    _fields = __slots__
+
+    def __init__(self, id: int, name: str) -> None:
+        self.id = id
+        self.name = name
+
+
+# row factories: set on a cursor (cursor.row_factory = ...) before executing
+def task_factory():
+    strings: dict[str, str] = {}
+
+    def factory(_cursor: sqlite3.Cursor, row: tuple) -> Task:
+        task_id, title, description, status, assignee_id, created_at, updated_at, due_at, priority = row
+        return Task(
+            task_id,
+            title,
+            description,
+            strings.setdefault(status, status),
+            assignee_id,
+            created_at,
+            updated_at,
+            due_at,
+            priority,
+        )
+
+    return factory
+
+
+def task_summary_factory():
+    strings: dict[str | None, str | None] = {}
+
+    def factory(_cursor: sqlite3.Cursor, row: tuple) -> TaskSummary:
+        task_id, title, status, assignee, created_at = row
+        return TaskSummary(
+            task_id, title, strings.setdefault(status, status), strings.setdefault(assignee, assignee), created_at
+        )
+
+    return factory
+
+
+def user_factory(_cursor: sqlite3.Cursor, row: tuple) -> User:
+    return User(*row)
+
+
+# A task list stored by column: ids in a machine-int array, status and
+# assignee as shared strings. Roughly half the memory of a list of row
+# tuples for large results; index it or iterate it for TaskSummary records.
+class TaskColumns:
+    __slots__ = ("ids", "titles", "statuses", "assignees", "created_at")
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.titles: list[str] = []
+        self.statuses: list[str] = []
+        self.assignees: list[str | None] = []
+        self.created_at: list[str] = []
+
+    # append rows shaped like list_tasks rows
+    def extend(self, rows, strings: dict) -> None:
+        for task_id, title, status, assignee, created_at in rows:
+            self.ids.append(task_id)
+            self.titles.append(title)
+            self.statuses.append(strings.setdefault(status, status))
+            self.assignees.append(strings.setdefault(assignee, assignee))
+            self.created_at.append(created_at)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> TaskSummary:
+        return TaskSummary(
+            self.ids[index], self.titles[index], self.statuses[index], self.assignees[index], self.created_at[index]
+        )
+
+    def __iter__(self):
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return f"TaskColumns({len(self)} rows)"
@@ -0,0 +1,530 @@
+import heapq
+import itertools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from taskflow import db
+from taskflow.migrations import migrate
+from taskflow.pool import ConnectionPool
+from taskflow.queries import (
+    DEFAULT_PRIORITY,
+    UNCHANGED,
+    begin_write,
+    clean_schedule,
+    clean_task_fields,
+    existing_ids,
+    resolve_assignee,
+    schedule_assignments,
+    task_filter_clauses,
+    task_list_query,
+)
+
+# Sharded storage: tasks spread over N SQLite files, each with its own write
+# lock, so writes that land on different shards run in parallel.
+#
+# - Partitioning is by task id: shard k (0-based) owns the ids k+1, k+1+N,
+#   k+1+2N, ... Each shard hands out its own ids (the next one after its
+#   sqlite_sequence entry), so routing a task id needs no lookup.
+# - New tasks go to the shards round-robin; add_tasks_many splits a batch
+#   over all shards and writes the parts in parallel.
+# - Users are replicated to every shard with the same id, so assignee checks
+#   and ON DELETE SET NULL stay local to each shard. User writes lock all
+#   shards (in shard order, so two writers cannot deadlock).
+# - Reads that span tasks (list_tasks, counts, stats) fan out over a thread
+#   pool and merge the per-shard results in (created_at, id) order.
+#
+# The methods have the same names, arguments and results as the functions
+# in taskflow.db:
+#
+#   store = ShardedDatabase("data/shards", shards=4)
+#   task_id = store.add_task("Write report", None, None)
+#   rows = store.list_tasks(status="todo")
+#
+# The number of shards is fixed when the files are created; opening them
+# with a different count raises ValueError.
+
+T = TypeVar("T")
+
+_SHARD_INFO = """
+    CREATE TABLE IF NOT EXISTS shard_info (
+        shard INTEGER NOT NULL,
+        shards INTEGER NOT NULL
+    )
+"""
+
+
+def _merge_key(row: tuple) -> tuple[str, int]:
+    # list_tasks rows: (id, title, status, assignee_name, created_at)
+    return row[4], row[0]
+
+
+class ShardedDatabase:
+    def __init__(
+        self,
+        directory: Path | str,
+        shards: int = 4,
+        pool_size: int = 2,
+        profile: str = "fast",
+        workers: int | None = None,
+    ) -> None:
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        if profile not in db.STORAGE_PROFILES or profile == "readonly":
+            raise ValueError(f"unknown or read-only storage profile {profile!r}")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shards = shards
+        self.profile = profile
+        self.paths = [self.directory / f"taskflow-shard-{index}.db" for index in range(shards)]
+        self._pools = [
+            ConnectionPool(path, size=pool_size, timeout=db.POOL_TIMEOUT, factory=lambda path=path: self._connect(path))
+            for path in self.paths
+        ]
+        self._executor = ThreadPoolExecutor(workers or shards, thread_name_prefix="taskflow-shard")
+        self._round_robin = itertools.count()
+        self._round_robin_lock = threading.Lock()
+
+        try:
+            for index, pool in enumerate(self._pools):
+                with pool.connection() as conn:
+                    self._prepare_shard(conn, index)
+        except BaseException:
+            self.close()
+            raise
+
+    def _connect(self, path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=db.BUSY_TIMEOUT, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        for name, value in db.STORAGE_PROFILES[self.profile].items():
+            if name != "journal_mode":
+                conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _prepare_shard(self, conn: sqlite3.Connection, index: int) -> None:
+        mode = db.STORAGE_PROFILES[self.profile].get("journal_mode")
+        if mode is not None:
+            conn.execute(f"PRAGMA journal_mode = {mode}")
+        migrate(conn)
+        conn.execute(_SHARD_INFO)
+        row = conn.execute("SELECT shard, shards FROM shard_info").fetchone()
+        if row is None:
+            conn.execute("INSERT INTO shard_info (shard, shards) VALUES (?, ?)", (index, self.shards))
+            conn.commit()
+        elif row != (index, self.shards):
+            raise ValueError(f"{self.paths[index]} is shard {row[0]} of {row[1]}, not {index} of {self.shards}")
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        for pool in self._pools:
+            pool.close()
+
+    def __enter__(self) -> "ShardedDatabase":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    # --- routing -------------------------------------------------------------
+
+    def shard_of(self, task_id: int) -> int:
+        return (task_id - 1) % self.shards
+
+    def _next_shard(self) -> int:
+        with self._round_robin_lock:
+            return next(self._round_robin) % self.shards
+
+    def _next_task_ids(self, conn: sqlite3.Connection, index: int, count: int) -> list[int]:
+        # Call inside the write transaction. sqlite_sequence remembers the
+        # largest id ever used, so ids are never reused after a delete.
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+        first = index + 1 if row is None else row[0] + self.shards
+        return [first + offset * self.shards for offset in range(count)]
+
+    def _on_shard(self, index: int, work: Callable[[sqlite3.Connection], T]) -> T:
+        with self._pools[index].connection() as conn:
+            return work(conn)
+
+    def _on_all(self, work: Callable[[int, sqlite3.Connection], T], shards=None) -> list[T]:
+        # Run work(index, conn) on each shard in parallel; results in shard order.
+        indexes = range(self.shards) if shards is None else shards
+        futures = [
+            self._executor.submit(self._on_shard, index, lambda conn, index=index: work(index, conn))
+            for index in indexes
+        ]
+        return [future.result() for future in futures]
+
+    # --- users (replicated) --------------------------------------------------
+
+    def _write_all_shards(self, work: Callable[[int, sqlite3.Connection], T]) -> list[T]:
+        # Lock every shard in order, apply work to each, then commit them all.
+        # Shards are separate files, so a crash between commits can leave them
+        # out of step; the next user write repeats on every shard anyway.
+        with ExitStack() as stack:
+            conns = [stack.enter_context(pool.connection()) for pool in self._pools]
+            try:
+                results = []
+                for index, conn in enumerate(conns):
+                    begin_write(conn)
+                    results.append(work(index, conn))
+                for conn in conns:
+                    conn.commit()
+            except BaseException:
+                for conn in conns:
+                    conn.rollback()
+                raise
+            return results
+
+    def add_user(self, name: str) -> int:
+        name = name.strip()
+        if not name:
+            raise ValueError("name cannot be empty")
+
+        user_id: int | None = None
+
+        def insert(index: int, conn: sqlite3.Connection) -> None:
+            nonlocal user_id
+            if index == 0:
+                user_id = conn.execute("INSERT INTO users (name) VALUES (?)", (name,)).lastrowid
+            else:
+                conn.execute("INSERT INTO users (id, name) VALUES (?, ?)", (user_id, name))
+
+        self._write_all_shards(insert)
+        return user_id
+
+    def list_users(self) -> list[tuple[int, str]]:
+        return self._on_shard(0, lambda conn: conn.execute("SELECT id, name FROM users ORDER BY id").fetchall())
+
+    def user_directory(self) -> dict[int, str]:
+        return dict(self.list_users())
+
+    def delete_user(self, user_id: int) -> bool:
+        def delete(_index: int, conn: sqlite3.Connection) -> bool:
+            return conn.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount > 0
+
+        return self._write_all_shards(delete)[0]
+
+    # --- single tasks (routed by id) ----------------------------------------
+
+    def add_task(
+        self,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        priority: int | None = None,
+        due_at: datetime | str | None = None,
+    ):
+        title, description, assignee_id = clean_task_fields(title, description, assignee_id)
+        priority, due_at = clean_schedule(DEFAULT_PRIORITY if priority is None else priority, due_at)
+        index = self._next_shard()
+
+        def insert(conn: sqlite3.Connection) -> int:
+            begin_write(conn)
+            resolved = resolve_assignee(conn, assignee_id)
+            (task_id,) = self._next_task_ids(conn, index, 1)
+            conn.execute(
+                "INSERT INTO tasks (id, title, description, assignee_id, priority, due_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (task_id, title, description, resolved, priority, due_at),
+            )
+            conn.commit()
+            return task_id
+
+        return self._on_shard(index, insert)
+
+    def _write_task(self, task_id: int, sql: str, params: tuple, assignee_at: int | None = None) -> bool:
+        # assignee_at: position in params of an assignee id to check inside
+        # the write transaction (unknown users are stored as NULL)
+        if task_id < 1:
+            return False
+
+        def write(conn: sqlite3.Connection) -> bool:
+            begin_write(conn)
+            values = list(params)
+            if assignee_at is not None:
+                values[assignee_at] = resolve_assignee(conn, values[assignee_at])
+            changed = conn.execute(sql, values).rowcount > 0
+            conn.commit()
+            return changed
+
+        return self._on_shard(self.shard_of(task_id), write)
+
+    def update_task_status(self, task_id: int, status: str) -> bool:
+        status = status.strip().lower()
+        if status not in {"todo", "doing", "done"}:
+            raise ValueError("status must be one of: todo, doing, done")
+        return self._write_task(
+            task_id, "UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (status, task_id)
+        )
+
+    def update_task_assignee(self, task_id: int, assignee_id: int | None) -> bool:
+        if assignee_id is not None and assignee_id < 1:
+            raise ValueError("assignee id must be a positive number")
+        return self._write_task(
+            task_id,
+            "UPDATE tasks SET assignee_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (assignee_id, task_id),
+            assignee_at=0,
+        )
+
+    def update_task(
+        self,
+        task_id: int,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        priority=UNCHANGED,
+        due_at=UNCHANGED,
+    ) -> bool:
+        title, description, assignee_id = clean_task_fields(title, description, assignee_id)
+        schedule_sql, schedule = schedule_assignments(priority, due_at)
+        assignments = ["title = ?", "description = ?", "assignee_id = ?", "updated_at = CURRENT_TIMESTAMP", *schedule_sql]
+        return self._write_task(
+            task_id,
+            f"UPDATE tasks SET {', '.join(assignments)} WHERE id = ?",
+            (title, description, assignee_id, *schedule, task_id),
+            assignee_at=2,
+        )
+
+    def delete_task(self, task_id: int) -> bool:
+        return self._write_task(task_id, "DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def get_task(
+        self, task_id: int
+    ) -> tuple[int, str, str | None, str, int | None, str, str | None, str | None, int] | None:
+        if task_id < 1:
+            return None
+        sql = """
+            SELECT id, title, description, status, assignee_id, created_at, updated_at, due_at, priority
+            FROM tasks
+            WHERE id = ?
+        """
+        return self._on_shard(self.shard_of(task_id), lambda conn: conn.execute(sql, (task_id,)).fetchone())
+
+    def get_task_row(
+        self,
+        task_id: int,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> tuple[int, str, str, str | None, str] | None:
+        where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+        if task_id < 1:
+            return None
+        sql = """
+            SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
+            FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
+            WHERE """ + " AND ".join(["tasks.id = ?"] + where_clauses)
+        return self._on_shard(self.shard_of(task_id), lambda conn: conn.execute(sql, [task_id] + params).fetchone())
+
+    # --- task lists (fan out + merge) ---------------------------------------
+
+    def _fan_out_list(self, sql: str, params: list[object]) -> list[tuple]:
+        results = self._on_all(lambda _index, conn: conn.execute(sql, params).fetchall())
+        return list(heapq.merge(*results, key=_merge_key))
+
+    def list_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> list[tuple[int, str, str, str | None, str]]:
+        sql, params = task_list_query(status, assignee_id, title_query)
+        return self._fan_out_list(sql, params)
+
+    def list_tasks_page(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        after: tuple[str, int] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[tuple[int, str, str, str | None, str]]:
+        if limit < 1:
+            raise ValueError("limit must be a positive number")
+        if offset < 0:
+            raise ValueError("offset cannot be negative")
+        # Any shard may hold every row of the page, so each returns offset + limit.
+        sql, params = task_list_query(status, assignee_id, title_query, after)
+        rows = self._fan_out_list(sql + " LIMIT ?", params + [offset + limit])
+        return rows[offset : offset + limit]
+
+    def iter_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        chunk_size: int = 500,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk size must be a positive number")
+        sql, params = task_list_query(status, assignee_id, title_query)
+        return heapq.merge(*(self._iter_shard(pool, sql, params, chunk_size) for pool in self._pools), key=_merge_key)
+
+    @staticmethod
+    def _iter_shard(pool: ConnectionPool, sql: str, params: list[object], chunk_size: int):
+        with pool.connection() as conn:
+            cur = conn.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+
+    def list_tasks_by_statuses(self, statuses: list[str]) -> list[tuple[int, str, str, str | None, str]]:
+        if not statuses:
+            return []
+        normalized = []
+        for status in statuses:
+            value = status.strip().lower()
+            if value not in {"todo", "doing", "done"}:
+                raise ValueError("status must be one of: todo, doing, done")
+            if value not in normalized:
+                normalized.append(value)
+        branch = """
+            SELECT tasks.id, tasks.title, tasks.status, users.name, tasks.created_at
+            FROM tasks LEFT JOIN users ON tasks.assignee_id = users.id
+            WHERE tasks.status = ?
+        """
+        sql = " UNION ALL ".join([branch] * len(normalized)) + " ORDER BY 5, 1"
+        return self._fan_out_list(sql, normalized)
+
+    def count_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> int:
+        where_clauses, params = task_filter_clauses(status, assignee_id, title_query)
+        if not where_clauses or (len(where_clauses) == 1 and title_query is None):
+            # Same shortcut as db.count_tasks: the trigger-maintained counters.
+            stats = self.task_stats()
+            if status is not None:
+                return stats.by_status.get(params[0], 0)
+            if assignee_id is not None:
+                return stats.by_assignee.get(assignee_id, 0)
+            return stats.total
+        sql = "SELECT COUNT(*) FROM tasks WHERE " + " AND ".join(where_clauses)
+        return sum(self._on_all(lambda _index, conn: conn.execute(sql, params).fetchone()[0]))
+
+    def task_stats(self) -> db.TaskStats:
+        sql = """
+            SELECT 'status', status, count FROM task_status_counts
+            UNION ALL
+            SELECT 'assignee', assignee_id, count FROM task_assignee_counts
+        """
+        by_status = {"todo": 0, "doing": 0, "done": 0}
+        by_assignee: dict[int, int] = {}
+        unassigned = 0
+        for rows in self._on_all(lambda _index, conn: conn.execute(sql).fetchall()):
+            for kind, key, count in rows:
+                if kind == "status":
+                    by_status[key] = by_status.get(key, 0) + count
+                elif key == 0:
+                    unassigned += count
+                else:
+                    by_assignee[key] = by_assignee.get(key, 0) + count
+        return db.TaskStats(sum(by_status.values()), by_status, by_assignee, unassigned)
+
+    # --- bulk writes (split per shard, written in parallel) ------------------
+
+    def add_tasks_many(self, tasks) -> list[int]:
+        rows = [clean_task_fields(title, description, assignee_id) for title, description, assignee_id in tasks]
+        if not rows:
+            return []
+
+        # Row i goes to shard (start + i) % N.
+        start = self._next_shard()
+        parts: dict[int, list[int]] = {}
+        for position in range(len(rows)):
+            parts.setdefault((start + position) % self.shards, []).append(position)
+
+        def insert(index: int, conn: sqlite3.Connection) -> list[int]:
+            positions = parts[index]
+            try:
+                begin_write(conn)
+                ids = self._next_task_ids(conn, index, len(positions))
+                part = [rows[position] for position in positions]
+                known = existing_ids(conn, "users", {row[2] for row in part if row[2] is not None})
+                conn.executemany(
+                    "INSERT INTO tasks (id, title, description, assignee_id) VALUES (?, ?, ?, ?)",
+                    [
+                        (task_id, title, description, assignee_id if assignee_id in known else None)
+                        for task_id, (title, description, assignee_id) in zip(ids, part)
+                    ],
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            return ids
+
+        task_ids = [0] * len(rows)
+        for index, ids in zip(parts, self._on_all(insert, shards=list(parts))):
+            for position, task_id in zip(parts[index], ids):
+                task_ids[position] = task_id
+        missing = {row[2] for row in rows if row[2] is not None} - set(self.user_directory())
+        for assignee_id in sorted(missing):
+            print(f"Warning: no user with id {assignee_id}; storing assignee as NULL")
+        return task_ids
+
+    def _by_shard(self, task_ids: list[int]) -> dict[int, list[int]]:
+        # input positions grouped by the shard that owns each task id
+        groups: dict[int, list[int]] = {}
+        for position, task_id in enumerate(task_ids):
+            if task_id >= 1:
+                groups.setdefault(self.shard_of(task_id), []).append(position)
+        return groups
+
+    def update_status_many(self, updates) -> list[bool]:
+        rows = []
+        for task_id, status in updates:
+            status = status.strip().lower()
+            if status not in {"todo", "doing", "done"}:
+                raise ValueError("status must be one of: todo, doing, done")
+            rows.append((status, task_id))
+        groups = self._by_shard([task_id for _, task_id in rows])
+
+        def update(index: int, conn: sqlite3.Connection) -> set[int]:
+            part = [rows[position] for position in groups[index]]
+            try:
+                begin_write(conn)
+                existing = existing_ids(conn, "tasks", [task_id for _, task_id in part])
+                conn.executemany("UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", part)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            return existing
+
+        existing = set().union(*self._on_all(update, shards=list(groups)))
+        return [task_id in existing for _, task_id in rows]
+
+    def delete_tasks_many(self, task_ids) -> list[bool]:
+        ids = list(task_ids)
+        groups = self._by_shard(ids)
+
+        def delete(index: int, conn: sqlite3.Connection) -> set[int]:
+            part = [ids[position] for position in groups[index]]
+            try:
+                begin_write(conn)
+                existing = existing_ids(conn, "tasks", part)
+                conn.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in part])
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            return existing
+
+        existing = set().union(*self._on_all(delete, shards=list(groups)))
+        # A repeated id only counts as deleted the first time, like db.delete_tasks_many.
+        results = []
+        for task_id in ids:
+            results.append(task_id in existing)
+            existing.discard(task_id)
+        return results
@@ -0,0 +1,514 @@
+import re
+import sqlite3
+import threading
+from bisect import bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Protocol
+
+from taskflow import db, queries
+
+# Storage backends with the task/user API of taskflow.db.
+#
+# - Storage: the interface (a typing.Protocol), i.e. the functions below.
+# - SqliteStorage: the taskflow.db functions themselves (the database at
+#   db.DB_PATH).
+# - MemoryStorage: pure Python, no disk I/O, for tests and benchmarks. It
+#   keeps the same ids, ordering, validation, warnings and ON DELETE SET NULL
+#   behaviour as SQLite; tests/test_storage_conformance.py checks that.
+# - taskflow.sharded.ShardedDatabase implements the same interface.
+#
+# The archive, change feed, typed records and write queue are SQLite-only
+# and not part of the interface.
+
+TaskRow = tuple[int, str, str, str | None, str]
+# (id, title, description, status, assignee_id, created_at, updated_at, due_at, priority)
+FullTaskRow = tuple[int, str, str | None, str, int | None, str, str | None, str | None, int]
+
+# the functions every backend provides
+METHODS = (
+    "add_user",
+    "list_users",
+    "user_directory",
+    "delete_user",
+    "add_task",
+    "update_task_status",
+    "update_task_assignee",
+    "update_task",
+    "delete_task",
+    "get_task",
+    "get_task_row",
+    "list_tasks",
+    "list_tasks_page",
+    "iter_tasks",
+    "count_tasks",
+    "task_stats",
+    "list_tasks_by_statuses",
+    "add_tasks_many",
+    "update_status_many",
+    "delete_tasks_many",
+)
+
+
+class Storage(Protocol):
+    def add_user(self, name: str) -> int: ...
+    def list_users(self) -> list[tuple[int, str]]: ...
+    def user_directory(self) -> dict[int, str]: ...
+    def delete_user(self, user_id: int) -> bool: ...
+    def add_task(
+        self,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        priority: int | None = None,
+        due_at: datetime | str | None = None,
+    ) -> int: ...
+
+    def update_task_status(self, task_id: int, status: str) -> bool: ...
+    def update_task_assignee(self, task_id: int, assignee_id: int | None) -> bool: ...
+
+    def update_task(
+        self,
+        task_id: int,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        priority=queries.UNCHANGED,
+        due_at=queries.UNCHANGED,
+    ) -> bool: ...
+
+    def delete_task(self, task_id: int) -> bool: ...
+    def get_task(self, task_id: int) -> FullTaskRow | None: ...
+
+    def get_task_row(
+        self,
+        task_id: int,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> TaskRow | None: ...
+
+    def list_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> list[TaskRow]: ...
+
+    def list_tasks_page(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        after: tuple[str, int] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[TaskRow]: ...
+
+    def iter_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        chunk_size: int = 500,
+    ) -> Iterator[TaskRow]: ...
+
+    def count_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> int: ...
+
+    def task_stats(self) -> db.TaskStats: ...
+    def list_tasks_by_statuses(self, statuses: list[str]) -> list[TaskRow]: ...
+    def add_tasks_many(self, tasks) -> list[int]: ...
+    def update_status_many(self, updates) -> list[bool]: ...
+    def delete_tasks_many(self, task_ids) -> list[bool]: ...
+
+
+class SqliteStorage:
+    # Looks each function up on every call (like taskflow.aio), so
+    # instrumentation and configure_* changes are picked up.
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name in METHODS:
+            return getattr(db, name)
+        raise AttributeError(f"{type(self).__name__!s} has no storage function {name!r}")
+
+
+_STATUSES = ("todo", "doing", "done")
+
+
+def _now() -> str:
+    # what CURRENT_TIMESTAMP stores: UTC, whole seconds
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _like_matcher(title_query: str) -> Callable[[str], bool]:
+    # SQLite's `title LIKE '%query%'`: % and _ in the query are wildcards and
+    # only ASCII letters match case-insensitively.
+    pattern = "".join(".*" if char == "%" else "." if char == "_" else re.escape(char) for char in title_query)
+    return re.compile(pattern, re.ASCII | re.IGNORECASE | re.DOTALL).search
+
+
+def _check_status(status: str) -> str:
+    status = status.strip().lower()
+    if status not in _STATUSES:
+        raise ValueError("status must be one of: todo, doing, done")
+    return status
+
+
+class MemoryStorage:
+    # tasks: id -> [title, description, status, assignee_id, created_at, updated_at, due_at, priority]
+    # Indexes: ids by status and by assignee (hash), and every task's
+    # (created_at, id) in a sorted list, which is the list_tasks order.
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._users: dict[int, str] = {}
+        self._user_ids_by_name: dict[str, int] = {}
+        self._tasks: dict[int, list] = {}
+        self._by_status: dict[str, set[int]] = {status: set() for status in _STATUSES}
+        self._by_assignee: dict[int | None, set[int]] = {}
+        self._order: list[tuple[str, int]] = []
+        # AUTOINCREMENT: ids are never reused, even after a delete
+        self._last_user_id = 0
+        self._last_task_id = 0
+
+    # --- users ---------------------------------------------------------------
+
+    def add_user(self, name: str) -> int:
+        name = name.strip()
+        if not name:
+            raise ValueError("name cannot be empty")
+        with self._lock:
+            if name in self._user_ids_by_name:
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: users.name")
+            self._last_user_id += 1
+            self._users[self._last_user_id] = name
+            self._user_ids_by_name[name] = self._last_user_id
+            return self._last_user_id
+
+    def list_users(self) -> list[tuple[int, str]]:
+        with self._lock:
+            return sorted(self._users.items())
+
+    def user_directory(self) -> dict[int, str]:
+        with self._lock:
+            return dict(self._users)
+
+    def delete_user(self, user_id: int) -> bool:
+        with self._lock:
+            name = self._users.pop(user_id, None)
+            if name is None:
+                return False
+            del self._user_ids_by_name[name]
+            # ON DELETE SET NULL (updated_at is left alone, as in SQLite)
+            for task_id in self._by_assignee.pop(user_id, set()):
+                self._tasks[task_id][3] = None
+                self._by_assignee.setdefault(None, set()).add(task_id)
+            return True
+
+    def _resolve_assignee(self, assignee_id: int | None) -> int | None:
+        if assignee_id is None or assignee_id in self._users:
+            return assignee_id
+        print(f"Warning: no user with id {assignee_id}; storing assignee as NULL")
+        return None
+
+    # --- single tasks --------------------------------------------------------
+
+    def _insert(
+        self,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        created_at: str,
+        due_at: str | None = None,
+        priority: int = queries.DEFAULT_PRIORITY,
+    ) -> int:
+        self._last_task_id += 1
+        task_id = self._last_task_id
+        self._tasks[task_id] = [title, description, "todo", assignee_id, created_at, None, due_at, priority]
+        self._by_status["todo"].add(task_id)
+        self._by_assignee.setdefault(assignee_id, set()).add(task_id)
+        # New tasks nearly always sort last, so this is usually an append.
+        key = (created_at, task_id)
+        if not self._order or self._order[-1] < key:
+            self._order.append(key)
+        else:
+            insort(self._order, key)
+        return task_id
+
+    def _set_status(self, task_id: int, status: str, now: str) -> None:
+        task = self._tasks[task_id]
+        self._by_status[task[2]].discard(task_id)
+        self._by_status[status].add(task_id)
+        task[2] = status
+        task[5] = now
+
+    def _set_assignee(self, task: list, task_id: int, assignee_id: int | None) -> None:
+        old = self._by_assignee[task[3]]
+        old.discard(task_id)
+        if not old:
+            del self._by_assignee[task[3]]
+        self._by_assignee.setdefault(assignee_id, set()).add(task_id)
+        task[3] = assignee_id
+
+    def _remove(self, task_id: int) -> None:
+        _title, _description, status, assignee_id, created_at, *_rest = self._tasks.pop(task_id)
+        self._by_status[status].discard(task_id)
+        assigned = self._by_assignee[assignee_id]
+        assigned.discard(task_id)
+        if not assigned:
+            del self._by_assignee[assignee_id]
+        del self._order[bisect_right(self._order, (created_at, task_id)) - 1]
+
+    def add_task(
+        self,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        priority: int | None = None,
+        due_at: datetime | str | None = None,
+    ) -> int:
+        title, description, assignee_id = queries.clean_task_fields(title, description, assignee_id)
+        priority, due_at = queries.clean_schedule(queries.DEFAULT_PRIORITY if priority is None else priority, due_at)
+        with self._lock:
+            return self._insert(title, description, self._resolve_assignee(assignee_id), _now(), due_at, priority)
+
+    def update_task_status(self, task_id: int, status: str) -> bool:
+        status = _check_status(status)
+        with self._lock:
+            if task_id not in self._tasks:
+                return False
+            self._set_status(task_id, status, _now())
+            return True
+
+    def update_task_assignee(self, task_id: int, assignee_id: int | None) -> bool:
+        if assignee_id is not None and assignee_id < 1:
+            raise ValueError("assignee id must be a positive number")
+        with self._lock:
+            assignee_id = self._resolve_assignee(assignee_id)
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            self._set_assignee(task, task_id, assignee_id)
+            task[5] = _now()
+            return True
+
+    def update_task(
+        self,
+        task_id: int,
+        title: str,
+        description: str | None,
+        assignee_id: int | None,
+        priority=queries.UNCHANGED,
+        due_at=queries.UNCHANGED,
+    ) -> bool:
+        title, description, assignee_id = queries.clean_task_fields(title, description, assignee_id)
+        if priority is not queries.UNCHANGED:
+            priority = queries.clean_priority(priority)
+        if due_at is not queries.UNCHANGED and due_at is not None:
+            due_at = queries.clean_timestamp(due_at, "due_at")
+        with self._lock:
+            assignee_id = self._resolve_assignee(assignee_id)
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            self._set_assignee(task, task_id, assignee_id)
+            task[0], task[1], task[5] = title, description, _now()
+            if due_at is not queries.UNCHANGED:
+                task[6] = due_at
+            if priority is not queries.UNCHANGED:
+                task[7] = priority
+            return True
+
+    def delete_task(self, task_id: int) -> bool:
+        with self._lock:
+            if task_id not in self._tasks:
+                return False
+            self._remove(task_id)
+            return True
+
+    def get_task(self, task_id: int) -> FullTaskRow | None:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return None if task is None else (task_id, *task)
+
+    # --- task lists ----------------------------------------------------------
+
+    def _row(self, task_id: int) -> TaskRow:
+        title, _description, status, assignee_id, created_at, *_rest = self._tasks[task_id]
+        return task_id, title, status, self._users.get(assignee_id), created_at
+
+    def _matching(
+        self,
+        status: str | None,
+        assignee_id: int | None,
+        title_query: str | None,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[int]:
+        # Yield matching ids in (created_at, id) order. Call with the lock held.
+        sets, matches_title = self._filters(status, assignee_id, title_query)
+        if sets and min(map(len, sets)) * 8 < len(self._order):
+            # Small index hit: sort just those tasks.
+            sets.sort(key=len)
+            keys = sorted((self._tasks[task_id][4], task_id) for task_id in sets[0].intersection(*sets[1:]))
+            sets = []
+        else:
+            keys = self._order
+        start = 0 if after is None else bisect_right(keys, tuple(after))
+        for index in range(start, len(keys)):
+            task_id = keys[index][1]
+            if all(task_id in ids for ids in sets) and (
+                matches_title is None or matches_title(self._tasks[task_id][0])
+            ):
+                yield task_id
+
+    def _filters(
+        self,
+        status: str | None,
+        assignee_id: int | None,
+        title_query: str | None,
+    ) -> tuple[list[set[int]], Callable[[str], bool] | None]:
+        # Return the index sets a task must be in and the title test (None
+        # without a title filter).
+        status, assignee_id, title_query = queries.clean_task_filters(status, assignee_id, title_query)
+        sets = []
+        if status is not None:
+            sets.append(self._by_status[status])
+        if assignee_id is not None:
+            sets.append(self._by_assignee.get(assignee_id, set()))
+        return sets, None if title_query is None else _like_matcher(title_query)
+
+    def get_task_row(
+        self,
+        task_id: int,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> TaskRow | None:
+        status, assignee_id, title_query = queries.clean_task_filters(status, assignee_id, title_query)
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if (
+                task is None
+                or (status is not None and task[2] != status)
+                or (assignee_id is not None and task[3] != assignee_id)
+                or (title_query is not None and not _like_matcher(title_query)(task[0]))
+            ):
+                return None
+            return self._row(task_id)
+
+    def list_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> list[TaskRow]:
+        with self._lock:
+            return [self._row(task_id) for task_id in self._matching(status, assignee_id, title_query)]
+
+    def list_tasks_page(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        after: tuple[str, int] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[TaskRow]:
+        if limit < 1:
+            raise ValueError("limit must be a positive number")
+        if offset < 0:
+            raise ValueError("offset cannot be negative")
+        with self._lock:
+            ids = self._matching(status, assignee_id, title_query, after)
+            return [self._row(task_id) for task_id, _ in zip(ids, range(offset + limit))][offset:]
+
+    def iter_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+        chunk_size: int = 500,
+    ) -> Iterator[TaskRow]:
+        if chunk_size < 1:
+            raise ValueError("chunk size must be a positive number")
+        # A snapshot, like a cursor over a read transaction.
+        return iter(self.list_tasks(status, assignee_id, title_query))
+
+    def count_tasks(
+        self,
+        status: str | None = None,
+        assignee_id: int | None = None,
+        title_query: str | None = None,
+    ) -> int:
+        with self._lock:
+            # Order does not matter here: count the smallest index set (or
+            # the intersection), testing titles only on those tasks.
+            sets, matches_title = self._filters(status, assignee_id, title_query)
+            if not sets:
+                ids = self._tasks
+            elif len(sets) == 1:
+                ids = sets[0]
+            else:
+                sets.sort(key=len)
+                ids = sets[0].intersection(*sets[1:])
+            if matches_title is None:
+                return len(ids)
+            return sum(1 for task_id in ids if matches_title(self._tasks[task_id][0]))
+
+    def task_stats(self) -> db.TaskStats:
+        with self._lock:
+            by_status = {status: len(ids) for status, ids in self._by_status.items()}
+            by_assignee = {user_id: len(ids) for user_id, ids in self._by_assignee.items() if user_id is not None}
+            unassigned = len(self._by_assignee.get(None, ()))
+        return db.TaskStats(len(self._tasks), by_status, by_assignee, unassigned)
+
+    def list_tasks_by_statuses(self, statuses: list[str]) -> list[TaskRow]:
+        if not statuses:
+            return []
+        wanted = {_check_status(status) for status in statuses}
+        with self._lock:
+            ids = set().union(*(self._by_status[status] for status in wanted))
+            if len(ids) * 8 < len(self._order):
+                # Small index hit: sort just those tasks (as in _matching).
+                keys = sorted((self._tasks[task_id][4], task_id) for task_id in ids)
+                return [self._row(task_id) for _, task_id in keys]
+            return [self._row(task_id) for _, task_id in self._order if task_id in ids]
+
+    # --- bulk writes ---------------------------------------------------------
+
+    def add_tasks_many(self, tasks) -> list[int]:
+        rows = [queries.clean_task_fields(title, description, assignee_id) for title, description, assignee_id in tasks]
+        if not rows:
+            return []
+        with self._lock:
+            wanted = {row[2] for row in rows if row[2] is not None}
+            for missing in sorted(wanted - self._users.keys()):
+                print(f"Warning: no user with id {missing}; storing assignee as NULL")
+            now = _now()
+            return [
+                self._insert(title, description, assignee_id if assignee_id in self._users else None, now)
+                for title, description, assignee_id in rows
+            ]
+
+    def update_status_many(self, updates) -> list[bool]:
+        rows = [(task_id, _check_status(status)) for task_id, status in updates]
+        with self._lock:
+            existing = [task_id in self._tasks for task_id, _ in rows]
+            now = _now()
+            for task_id, status in rows:
+                if task_id in self._tasks:
+                    self._set_status(task_id, status, now)
+            return existing
+
+    def delete_tasks_many(self, task_ids) -> list[bool]:
+        results = []
+        with self._lock:
+            for task_id in task_ids:
+                # A repeated id only counts as deleted the first time.
+                found = task_id in self._tasks
+                if found:
+                    self._remove(task_id)
+                results.append(found)
+        return results
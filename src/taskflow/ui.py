@@ -1,11 +1,26 @@
+import heapq
+import queue
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from tkinter import messagebox, simpledialog, ttk
 from typing import Callable
 
-from taskflow import db
+from taskflow import backup, db, instrument
 
 
 class TaskFlowApp(tk.Tk):
+    # Wait this long after the last keystroke before searching.
+    SEARCH_DEBOUNCE_MS = 300
+    # How often to ask the change feed what other windows/processes changed.
+    CHANGE_POLL_MS = 2000
+    # More changed tasks than this in one poll: reload the list instead of patching rows.
+    MAX_PATCHED_TASKS = 200
+    # Open tasks due within this window are kept in a heap and timed with after().
+    DEADLINE_WINDOW = timedelta(hours=24)
+    MAX_DEADLINES = 500
+
     def __init__(self) -> None:
         super().__init__()
         self.title("TaskFlow")
@@ -16,9 +31,25 @@ class TaskFlowApp(tk.Tk):
         self._assignee_filter_map: dict[str, int | None] = {"All": None}
         self._assignee_form_map: dict[str, int | None] = {"Unassigned": None}
 
+        # All db calls go through the worker so the window stays responsive.
+        self.worker = DbWorker(self)
+        self._search_after_id: str | None = None
+        self._last_search: str | None = None
+        self._change_seq = 0
+        self._changes_after_id: str | None = None
+        # (due_at, task_id, title) of open tasks not yet due, earliest first
+        self._deadlines: list[tuple[str, int, str]] = []
+        self._deadlines_until = ""
+        self._deadline_after_id: str | None = None
+        self._overdue: dict[int, str] = {}
+        self._overdue_capped = False
+
         self._build_ui()
+        # Read the change seq before loading, so nothing between the two is missed.
+        self.worker.submit("changes", db.change_seq, on_done=self._start_change_polling)
         self.refresh_users()
         self.refresh_tasks()
+        self.refresh_deadlines()
 
     def _build_ui(self) -> None:
         notebook = ttk.Notebook(self)
@@ -46,6 +77,9 @@ class TaskFlowApp(tk.Tk):
         self.status_filter.current(0)
         self.status_filter.pack(side=tk.LEFT, padx=5)
         self.status_filter.bind("<<ComboboxSelected>>", lambda _e: self.refresh_tasks())
+        # Live per-status counts, read from the trigger-maintained counters.
+        self.stats_label = ttk.Label(filter_frame, foreground="gray")
+        self.stats_label.pack(side=tk.LEFT, padx=(0, 5))
 
         ttk.Label(filter_frame, text="Assignee:").pack(side=tk.LEFT, padx=(10, 0))
         self.assignee_filter = ttk.Combobox(filter_frame, values=["All"], state="readonly")
@@ -56,6 +90,9 @@ class TaskFlowApp(tk.Tk):
         ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT, padx=(10, 0))
         self.search_entry = ttk.Entry(filter_frame, width=25)
         self.search_entry.pack(side=tk.LEFT, padx=5)
+        # Search as you type, debounced so we don't query on every keystroke.
+        self.search_entry.bind("<KeyRelease>", lambda _e: self._schedule_search())
+        self.search_entry.bind("<Return>", lambda _e: self.refresh_tasks())
 
         ttk.Button(filter_frame, text="Apply", command=self.refresh_tasks).pack(side=tk.LEFT)
         ttk.Button(filter_frame, text="Clear", command=self._clear_task_filters).pack(side=tk.LEFT, padx=5)
@@ -74,11 +111,12 @@ class TaskFlowApp(tk.Tk):
         self.tasks_tree.column("assignee", width=150)
         self.tasks_tree.column("created", width=160)
         self.tasks_tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        self.tasks_tree.bind("<<TreeviewSelect>>", lambda _e: self._update_task_buttons())
 
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tasks_tree.yview)
+        # The task list is virtual: the scrollbar pages through the database,
+        # and the Treeview only holds the rows currently in view.
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tasks_tree.configure(yscrollcommand=scrollbar.set)
+        self.task_list = VirtualTaskList(self.tasks_tree, scrollbar, self._update_task_buttons, self.worker)
 
         button_frame = ttk.Frame(self.tasks_tab)
         button_frame.pack(fill=tk.X, padx=10, pady=8)
@@ -98,6 +136,10 @@ class TaskFlowApp(tk.Tk):
         self.done_btn = ttk.Button(button_frame, text="Mark Done", command=lambda: self.set_status("done"), state=tk.DISABLED)
         self.done_btn.pack(side=tk.LEFT)
 
+        # Overdue tasks, updated by the deadline timer.
+        self.deadline_label = ttk.Label(button_frame, foreground="firebrick")
+        self.deadline_label.pack(side=tk.RIGHT)
+
     def _build_users_tab(self) -> None:
         tree_frame = ttk.Frame(self.users_tab)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -106,6 +148,7 @@ class TaskFlowApp(tk.Tk):
         self.users_tree.heading("name", text="Name")
         self.users_tree.column("name", width=300)
         self.users_tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self._users_rows = TreeRows(self.users_tree)
         self.users_tree.bind("<<TreeviewSelect>>", lambda _e: self._update_user_buttons())
 
         scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.users_tree.yview)
@@ -127,7 +170,7 @@ class TaskFlowApp(tk.Tk):
         self.refresh_tasks()
 
     def _update_task_buttons(self) -> None:
-        has_selection = bool(self.tasks_tree.selection())
+        has_selection = self.task_list.selected_id is not None
         state = tk.NORMAL if has_selection else tk.DISABLED
         self.edit_task_btn.config(state=state)
         self.delete_task_btn.config(state=state)
@@ -139,14 +182,21 @@ class TaskFlowApp(tk.Tk):
         has_selection = bool(self.users_tree.selection())
         self.delete_user_btn.config(state=(tk.NORMAL if has_selection else tk.DISABLED))
 
+    def _schedule_search(self) -> None:
+        # Restart the timer on every keystroke; query once typing pauses.
+        if self.search_entry.get().strip() == (self._last_search or ""):
+            return
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(self.SEARCH_DEBOUNCE_MS, self.refresh_tasks)
+
     def refresh_users(self) -> None:
-        for item in self.users_tree.get_children():
-            self.users_tree.delete(item)
+        self.worker.submit("users", db.list_users, on_done=self._show_users)
 
-        users = db.list_users()
-        for user_id, name in users:
-            # Store user_id as the item iid so we can fetch it later without showing it.
-            self.users_tree.insert("", tk.END, iid=str(user_id), values=(name,))
+    def _show_users(self, users: list[tuple[int, str]]) -> None:
+        # Store user_id as the item iid so we can fetch it later without showing it.
+        # Only rows that actually changed are touched in Tk.
+        self._users_rows.apply([(str(user_id), (name,)) for user_id, name in users])
 
         self._assignee_filter_map = {"All": None}
         self._assignee_form_map = {"Unassigned": None}
@@ -160,8 +210,9 @@ class TaskFlowApp(tk.Tk):
             self.assignee_filter.current(0)
 
     def refresh_tasks(self) -> None:
-        for item in self.tasks_tree.get_children():
-            self.tasks_tree.delete(item)
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
 
         status = self.status_filter.get()
         status_value = None if status == "All" else status
@@ -170,30 +221,112 @@ class TaskFlowApp(tk.Tk):
         assignee_id = self._assignee_filter_map.get(assignee_label)
 
         query = self.search_entry.get().strip() or None
+        self._last_search = query
 
-        try:
-            tasks = db.list_tasks(status=status_value, assignee_id=assignee_id, title_query=query)
-        except ValueError as exc:
-            messagebox.showerror("Error", str(exc))
-            return
+        # Runs in the background; a newer refresh supersedes this one.
+        self.task_list.reload((status_value, assignee_id, query))
+        self.refresh_stats()
 
-        for task_id, title, status, assignee_name, created_at in tasks:
-            # Keep task_id internally as iid, but only show friendly columns.
-            assignee_display = assignee_name or ""
-            self.tasks_tree.insert(
-                "",
-                tk.END,
-                iid=str(task_id),
-                values=(title, status, assignee_display, created_at),
-            )
+    def refresh_stats(self) -> None:
+        self.worker.submit("stats", db.task_stats, on_done=self._show_stats)
+
+    def _show_stats(self, stats: db.TaskStats) -> None:
+        by_status = stats.by_status
+        self.stats_label.config(
+            text=f"todo {by_status['todo']} · doing {by_status['doing']} · done {by_status['done']}"
+        )
+
+    def _start_change_polling(self, seq: int) -> None:
+        self._change_seq = seq
+        self._schedule_change_poll()
+
+    def _schedule_change_poll(self) -> None:
+        self._changes_after_id = self.after(self.CHANGE_POLL_MS, self._poll_changes)
+
+    def _poll_changes(self) -> None:
+        # Ask for what changed since the last poll (O(changes), not O(tasks)),
+        # then re-read just those tasks under the current filters.
+        self._changes_after_id = None
+        seq = self._change_seq
+        filters = self.task_list.filters
+
+        def job() -> tuple[db.Changes, dict[int, tuple | None] | None]:
+            changes = db.changes_since(seq)
+            task_ids = [row[0] for row in changes.tasks] + changes.deleted_tasks
+            if changes.reset or len(task_ids) > self.MAX_PATCHED_TASKS:
+                return changes, None
+            return changes, {task_id: db.get_task_row(task_id, *filters) for task_id in task_ids}
+
+        def on_done(result: tuple[db.Changes, dict[int, tuple | None] | None]) -> None:
+            changes, rows = result
+            self._change_seq = changes.seq
+            if changes.reset or changes.users or changes.deleted_users:
+                self.refresh_users()
+            if rows is None or filters != self.task_list.filters:
+                self.task_list.reload()
+                self.refresh_stats()
+                self.refresh_deadlines()
+            elif rows:
+                self.task_list.apply_changes(rows)
+                self._update_task_buttons()
+                self.refresh_stats()
+                self.refresh_deadlines()
+            self._schedule_change_poll()
+
+        # Errors (e.g. a locked database) just wait for the next poll.
+        self.worker.submit("changes", job, on_done=on_done, on_error=lambda _exc: self._schedule_change_poll())
+
+    def refresh_deadlines(self) -> None:
+        # Two index range reads: what is overdue now, and open tasks due
+        # within the window. Between reloads the timer runs off the
+        # in-memory heap without querying.
+        now = datetime.now(timezone.utc)
+        until = now + self.DEADLINE_WINDOW
 
-        self._update_task_buttons()
+        def job() -> tuple[list[tuple], list[tuple]]:
+            return db.overdue_tasks(self.MAX_DEADLINES), db.due_before(until, self.MAX_DEADLINES, after=now)
+
+        self.worker.submit(
+            "deadlines", job, on_done=lambda result: self._load_deadlines(*result, _db_time(until))
+        )
+
+    def _load_deadlines(self, overdue: list[tuple], upcoming: list[tuple], until: str) -> None:
+        self._overdue = {row[0]: row[1] for row in overdue}
+        self._overdue_capped = len(overdue) == self.MAX_DEADLINES
+        self._deadlines = [(due_at, task_id, title) for task_id, title, _status, _assignee, _priority, due_at in upcoming]
+        heapq.heapify(self._deadlines)
+        # A full result may stop short of the window; reload at its last deadline.
+        self._deadlines_until = upcoming[-1][5] if len(upcoming) == self.MAX_DEADLINES else until
+        self._deadline_reached()
+
+    def _deadline_reached(self) -> None:
+        if self._deadline_after_id is not None:
+            self.after_cancel(self._deadline_after_id)
+            self._deadline_after_id = None
+
+        now = _db_time(datetime.now(timezone.utc))
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _due_at, task_id, title = heapq.heappop(self._deadlines)
+            self._overdue[task_id] = title
+        if self._overdue:
+            titles = ", ".join(list(self._overdue.values())[:3])
+            more = "…" if len(self._overdue) > 3 else ""
+            count = f"{len(self._overdue)}+" if self._overdue_capped else len(self._overdue)
+            self.deadline_label.config(text=f"{count} overdue: {titles}{more}")
+        else:
+            self.deadline_label.config(text="")
+
+        # Sleep until the next deadline, or reload when the window runs out.
+        if self._deadlines:
+            wake_at, callback = self._deadlines[0][0], self._deadline_reached
+        else:
+            wake_at, callback = self._deadlines_until, self.refresh_deadlines
+        delay = _parse_db_time(wake_at) - datetime.now(timezone.utc)
+        # +1 ms: wake just after the deadline (timestamps have whole seconds).
+        self._deadline_after_id = self.after(max(0, int(delay.total_seconds() * 1000)) + 1, callback)
 
     def _get_selected_task_id(self) -> int | None:
-        selection = self.tasks_tree.selection()
-        if not selection:
-            return None
-        return int(selection[0])
+        return self.task_list.selected_id
 
     def _get_selected_user_id(self) -> int | None:
         selection = self.users_tree.selection()
@@ -205,13 +338,8 @@ class TaskFlowApp(tk.Tk):
         name = simpledialog.askstring("Add User", "Name:", parent=self)
         if not name:
             return
-        try:
-            db.add_user(name)
-        except Exception as exc:
-            messagebox.showerror("Error", str(exc))
-            return
-        self.refresh_users()
-        self.refresh_tasks()
+        # A new user cannot change any task row, so the task list stays as is.
+        self.worker.submit(None, db.add_user, name, on_done=lambda _user_id: self.refresh_users())
 
     def delete_user(self) -> None:
         user_id = self._get_selected_user_id()
@@ -225,7 +353,9 @@ class TaskFlowApp(tk.Tk):
         )
         if not confirm:
             return
-        deleted = db.delete_user(user_id)
+        self.worker.submit(None, db.delete_user, user_id, on_done=self._user_deleted)
+
+    def _user_deleted(self, deleted: bool) -> None:
         if not deleted:
             messagebox.showerror("Error", "User not found.")
             return
@@ -236,43 +366,46 @@ class TaskFlowApp(tk.Tk):
         dialog = TaskDialog(self, "Add Task", self._assignee_form_map)
         if not dialog.result:
             return
-        title, description, assignee_id = dialog.result
-        try:
-            db.add_task(title, description, assignee_id)
-        except Exception as exc:
-            messagebox.showerror("Error", str(exc))
-            return
-        self.refresh_tasks()
+        title, description, assignee_id, priority, due_at = dialog.result
+
+        def on_done(_task_id: int) -> None:
+            self.refresh_tasks()
+            self.refresh_deadlines()
+
+        self.worker.submit(None, db.add_task, title, description, assignee_id, priority, due_at, on_done=on_done)
 
     def edit_task(self) -> None:
         task_id = self._get_selected_task_id()
         if task_id is None:
             return
-        task = db.get_task(task_id)
-        if not task:
+        self.worker.submit(
+            "edit",
+            db.get_task_record,
+            task_id,
+            on_done=lambda task: self._edit_loaded_task(task_id, task),
+        )
+
+    def _edit_loaded_task(self, task_id: int, task: "db.Task | None") -> None:
+        if task is None:
             messagebox.showerror("Error", "Task not found.")
             return
-        _, title, description, _status, assignee_id, _created_at, _updated_at = task
         dialog = TaskDialog(
             self,
             "Edit Task",
             self._assignee_form_map,
-            title_text=title,
-            description=description,
-            assignee_id=assignee_id,
+            title_text=task.title,
+            description=task.description,
+            assignee_id=task.assignee_id,
+            priority=task.priority,
+            due_at=task.due_at,
         )
         if not dialog.result:
             return
-        new_title, new_description, new_assignee_id = dialog.result
-        try:
-            updated = db.update_task(task_id, new_title, new_description, new_assignee_id)
-        except Exception as exc:
-            messagebox.showerror("Error", str(exc))
-            return
-        if not updated:
-            messagebox.showerror("Error", "Task not found.")
-            return
-        self.refresh_tasks()
+        new_title, new_description, new_assignee_id, priority, due_at = dialog.result
+
+        self._write_task(
+            task_id, db.update_task, task_id, new_title, new_description, new_assignee_id, priority, due_at
+        )
 
     def delete_task(self) -> None:
         task_id = self._get_selected_task_id()
@@ -281,11 +414,7 @@ class TaskFlowApp(tk.Tk):
         confirm = messagebox.askyesno("Delete Task", "Delete the selected task?", parent=self)
         if not confirm:
             return
-        deleted = db.delete_task(task_id)
-        if not deleted:
-            messagebox.showerror("Error", "Task not found.")
-            return
-        self.refresh_tasks()
+        self._write_task(task_id, db.delete_task, task_id)
 
     def set_status(self, status: str) -> None:
         task_id = self._get_selected_task_id()
@@ -295,18 +424,513 @@ class TaskFlowApp(tk.Tk):
             confirm = messagebox.askyesno("Mark Done", "Mark this task as done?", parent=self)
             if not confirm:
                 return
-        try:
-            updated = db.update_task_status(task_id, status)
-        except Exception as exc:
-            messagebox.showerror("Error", str(exc))
+        self._write_task(task_id, db.update_task_status, task_id, status)
+
+    def _write_task(self, task_id: int, write: Callable[..., bool], *args: object) -> None:
+        # Run a single-task write in the background, then re-read just that
+        # task under the current filters and patch its row (it disappears if
+        # it was deleted or no longer matches).
+        filters = self.task_list.filters
+
+        def job() -> tuple[bool, tuple | None]:
+            changed = write(*args)
+            return changed, db.get_task_row(task_id, *filters)
+
+        def on_done(result: tuple[bool, tuple | None]) -> None:
+            changed, row = result
+            if filters == self.task_list.filters:
+                self.task_list.update_row(task_id, row)
+            else:
+                self.task_list.reload()
+            self._update_task_buttons()
+            self.refresh_stats()
+            self.refresh_deadlines()
+            if not changed:
+                messagebox.showerror("Error", "Task not found.")
+
+        self.worker.submit(None, job, on_done=on_done)
+
+
+# datetimes <-> the UTC text SQLite stores (CURRENT_TIMESTAMP format)
+def _db_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_db_time(text: str) -> datetime:
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+class TreeRows:
+    # Applies an ordered list of (iid, values) to a flat Treeview with the
+    # fewest Tk calls: stale items are deleted, changed ones updated, new ones
+    # inserted, and items moved only when out of place. We compare against our
+    # own copy of the values because Tk hands them back converted (e.g. "12" -> 12).
+    def __init__(self, tree: ttk.Treeview) -> None:
+        self.tree = tree
+        self.values: dict[str, tuple] = {}
+
+    def apply(self, rows: list[tuple[str, tuple]]) -> None:
+        wanted = {iid for iid, _ in rows}
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self.values.pop(iid, None)
+
+        current = list(self.tree.get_children())
+        for index, (iid, values) in enumerate(rows):
+            if iid not in self.values:
+                self.tree.insert("", index, iid=iid, values=values)
+                self.values[iid] = values
+                current.insert(index, iid)
+                continue
+            if self.values[iid] != values:
+                self.tree.item(iid, values=values)
+                self.values[iid] = values
+            if current[index] != iid:
+                self.tree.move(iid, "", index)
+                current.remove(iid)
+                current.insert(index, iid)
+
+    def update(self, iid: str, values: tuple) -> None:
+        # Patch one row in place if it is shown.
+        if iid in self.values and self.values[iid] != values:
+            self.tree.item(iid, values=values)
+            self.values[iid] = values
+
+
+class VirtualTaskList:
+    # Drives a Treeview that only ever holds the rows in view.
+    # Rows come from db.list_tasks_page one page at a time and are kept in a
+    # small LRU page cache; the scrollbar works in row positions, not Tk items.
+    # Selection is tracked by task id, so it survives scrolling off screen.
+    # With a DbWorker, queries run in the background and pages that are still
+    # loading show placeholder rows.
+    PAGE_SIZE = 200
+    MAX_CACHED_PAGES = 16
+    LOADING_ROW = ("Loading…", "", "", "")
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        scrollbar: ttk.Scrollbar,
+        on_select: Callable[[], None],
+        worker: "DbWorker | None" = None,
+    ) -> None:
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self._on_select = on_select
+        self._worker = worker
+
+        # (status, assignee_id, title_query) as passed to db.list_tasks_page
+        self.filters: tuple[str | None, int | None, str | None] = (None, None, None)
+        self.total = 0
+        self.first = 0
+        self.selected_id: int | None = None
+        # Row position of the selection, so keyboard moves work after it scrolled off screen.
+        self._selected_index: int | None = None
+
+        self._pages: OrderedDict[int, list[tuple[int, str, str, str | None, str]]] = OrderedDict()
+        # task id -> row position, for every row in a cached page
+        self._positions: dict[int, int] = {}
+        # Bumped on every reload so late page results for old data are ignored.
+        self._generation = 0
+        self._loading: set[int] = set()
+        self._shown = TreeRows(tree)
+        self._row_height: int | None = None
+        self._header_height = 0
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        tree.bind("<Configure>", lambda _e: self.render())
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda _e: self._scroll_and_break(-3))
+        tree.bind("<Button-5>", lambda _e: self._scroll_and_break(3))
+        tree.bind("<Up>", lambda _e: self._move_selection(-1))
+        tree.bind("<Down>", lambda _e: self._move_selection(1))
+        tree.bind("<Prior>", lambda _e: self._move_selection(-self.visible_rows()))
+        tree.bind("<Next>", lambda _e: self._move_selection(self.visible_rows()))
+        tree.bind("<Home>", lambda _e: self._move_selection(-self.total))
+        tree.bind("<End>", lambda _e: self._move_selection(self.total))
+
+    def reload(
+        self,
+        filters: tuple[str | None, int | None, str | None] | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+    ) -> None:
+        # Re-count and re-fetch the visible pages. New filters start from the
+        # top with no selection; the same filters keep the scroll position.
+        new_filters = self.filters if filters is None else filters
+        first = self.first if new_filters == self.filters else 0
+        args = (new_filters, first, self.visible_rows(), self.PAGE_SIZE)
+        on_done = lambda result: self._install(new_filters, *result)
+        if self._worker is None:
+            on_done(_fetch_task_window(*args))
+        else:
+            # One "tasks" channel: a newer reload (e.g. the next keystroke) supersedes this one.
+            self._worker.submit("tasks", _fetch_task_window, *args, on_done=on_done, on_error=on_error)
+
+    def _install(
+        self,
+        filters: tuple[str | None, int | None, str | None],
+        total: int,
+        first: int,
+        pages: dict[int, list[tuple[int, str, str, str | None, str]]],
+    ) -> None:
+        if filters != self.filters:
+            self.filters = filters
+            self.selected_id = None
+        # Positions may have shifted; the id is still tracked.
+        self._selected_index = None
+        self.total = total
+        self.first = first
+        self._generation += 1
+        self._pages.clear()
+        self._positions.clear()
+        self._loading.clear()
+        for page_index, page in pages.items():
+            self._store_page(page_index, page)
+        self.render()
+        self._on_select()
+
+    def clear_selection(self) -> None:
+        self.selected_id = None
+        self._selected_index = None
+        self.tree.selection_set(())
+
+    def visible_rows(self) -> int:
+        height = self.tree.winfo_height()
+        if height <= 1 or self._row_height is None:
+            # Not mapped or not measured yet; fall back to the configured height.
+            return max(1, int(self.tree.cget("height")))
+        return max(1, (height - self._header_height) // self._row_height)
+
+    def render(self) -> None:
+        visible = self.visible_rows()
+        self.first = max(0, min(self.first, self.total - visible))
+        rows = self._rows(self.first, min(self.total, self.first + visible))
+
+        # Keep task_id internally as iid, but only show friendly columns.
+        # Scrolling by a row costs one delete and one insert, not a rebuild.
+        self._shown.apply(rows)
+
+        if self.selected_id is not None and self.tree.exists(str(self.selected_id)):
+            self.tree.selection_set(str(self.selected_id))
+            self.tree.focus(str(self.selected_id))
+
+        self._update_scrollbar(visible)
+        self._measure_rows(rows)
+
+    @staticmethod
+    def _display(row: tuple[int, str, str, str | None, str]) -> tuple:
+        _task_id, title, status, assignee_name, created_at = row
+        return (title, status, assignee_name or "", created_at)
+
+    def update_row(self, task_id: int, row: tuple[int, str, str, str | None, str] | None) -> None:
+        # Patch one task after an edit. `row` is its fresh list_tasks row, or
+        # None if it was deleted or no longer matches the filters.
+        position = self._positions.get(task_id)
+        if position is None:
+            # Not in any cached page, so we cannot tell where it sits; re-fetch.
+            self.reload()
             return
-        if not updated:
-            messagebox.showerror("Error", "Task not found.")
+
+        page_index, offset = divmod(position, self.PAGE_SIZE)
+        if row is not None:
+            self._pages[page_index][offset] = row
+            self._shown.update(str(task_id), self._display(row))
             return
-        self.refresh_tasks()
+
+        # Removed: later rows move up by one, so drop this page and the ones
+        # after it; render() re-fetches only what is on screen.
+        self.total -= 1
+        for index in [index for index in self._pages if index >= page_index]:
+            self._drop_page(index)
+        if self.selected_id == task_id:
+            self.clear_selection()
+        self.render()
+
+    def apply_changes(self, rows: dict[int, tuple[int, str, str, str | None, str] | None]) -> None:
+        # Patch tasks changed elsewhere; `rows` maps task id -> fresh row
+        # (None if deleted or no longer matching). A task we have not loaded
+        # may belong on screen or change the total, so that means a reload.
+        if any(task_id not in self._positions for task_id in rows):
+            self.reload()
+            return
+        for task_id, row in rows.items():
+            self.update_row(task_id, row)
+
+    def _store_page(self, page_index: int, page: list[tuple[int, str, str, str | None, str]]) -> None:
+        self._pages[page_index] = page
+        start = page_index * self.PAGE_SIZE
+        for offset, row in enumerate(page):
+            self._positions[row[0]] = start + offset
+        while len(self._pages) > self.MAX_CACHED_PAGES:
+            self._drop_page(next(iter(self._pages)))
+
+    def _drop_page(self, page_index: int) -> None:
+        for row in self._pages.pop(page_index):
+            self._positions.pop(row[0], None)
+
+    def _measure_rows(self, rows: list[tuple[str, tuple]]) -> None:
+        # Learn the real row height from the first rendered row, then re-render
+        # once if more (or fewer) rows fit than we guessed.
+        if self._row_height is not None or not rows:
+            return
+        bbox = self.tree.bbox(rows[0][0])
+        if not bbox:
+            return
+        self._header_height = bbox[1]
+        self._row_height = max(1, bbox[3])
+        self.tree.after_idle(self.render)
+
+    def _update_scrollbar(self, visible: int) -> None:
+        if self.total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        low = self.first / self.total
+        high = min(1.0, (self.first + visible) / self.total)
+        self.scrollbar.set(low, high)
+
+    def _rows(self, start: int, end: int) -> list[tuple[str, tuple]]:
+        # (iid, values) for rows start..end; pages still loading become placeholders.
+        rows: list[tuple[str, tuple]] = []
+        index = start
+        while index < end:
+            page_index, offset = divmod(index, self.PAGE_SIZE)
+            page = self._page(page_index)
+            if page is None:
+                stop = min(end, (page_index + 1) * self.PAGE_SIZE)
+                rows.extend((f"loading-{i}", self.LOADING_ROW) for i in range(index, stop))
+                index = stop
+                continue
+            chunk = page[offset:offset + (end - index)]
+            if not chunk:
+                # Fewer rows than counted (deleted meanwhile); show what exists.
+                break
+            rows.extend((str(row[0]), self._display(row)) for row in chunk)
+            index += len(chunk)
+        return rows
+
+    def _page(self, page_index: int) -> list[tuple[int, str, str, str | None, str]] | None:
+        page = self._pages.get(page_index)
+        if page is not None:
+            self._pages.move_to_end(page_index)
+            return page
+
+        status, assignee_id, title_query = self.filters
+        previous = self._pages.get(page_index - 1)
+        if previous and len(previous) == self.PAGE_SIZE:
+            # Scrolling forward: seek from the previous page's last row (no OFFSET walk).
+            last = previous[-1]
+            kwargs = {"after": (last[4], last[0]), "limit": self.PAGE_SIZE}
+        else:
+            kwargs = {"limit": self.PAGE_SIZE, "offset": page_index * self.PAGE_SIZE}
+
+        if self._worker is None:
+            page = db.list_tasks_page(status, assignee_id, title_query, **kwargs)
+            self._store_page(page_index, page)
+            return page
+
+        if page_index not in self._loading:
+            self._loading.add(page_index)
+            generation = self._generation
+
+            def on_done(page: list[tuple[int, str, str, str | None, str]]) -> None:
+                if generation != self._generation:
+                    return
+                self._loading.discard(page_index)
+                self._store_page(page_index, page)
+                self.render()
+
+            def on_error(exc: BaseException) -> None:
+                self._loading.discard(page_index)
+                messagebox.showerror("Error", str(exc))
+
+            self._worker.submit(
+                f"page-{page_index}",
+                db.list_tasks_page,
+                status,
+                assignee_id,
+                title_query,
+                on_done=on_done,
+                on_error=on_error,
+                **kwargs,
+            )
+        return None
+
+    def scroll_to(self, first: int) -> None:
+        self.first = first
+        self.render()
+
+    def _scroll_and_break(self, rows: int) -> str:
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def _on_scrollbar(self, *args: str) -> None:
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = self.visible_rows() if args[2] == "pages" else 1
+            self.scroll_to(self.first + int(args[1]) * step)
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        # Windows reports multiples of 120 per notch, macOS small deltas.
+        notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_and_break(-3 * notches)
+
+    def _on_tree_select(self, _event: tk.Event | None = None) -> None:
+        selection = [iid for iid in self.tree.selection() if not iid.startswith("loading-")]
+        if selection:
+            self.selected_id = int(selection[0])
+            self._selected_index = self.first + self.tree.index(selection[0])
+        elif self.selected_id is not None and self.tree.exists(str(self.selected_id)):
+            # Deselected while still on screen. (Rows leaving the window on
+            # scroll also clear the Tk selection, but keep our selected_id.)
+            self.clear_selection()
+        self._on_select()
+
+    def _move_selection(self, delta: int) -> str:
+        if self.total == 0:
+            return "break"
+
+        current = self._selected_index
+        if self.selected_id is not None and self.tree.exists(str(self.selected_id)):
+            current = self.first + self.tree.index(str(self.selected_id))
+        if current is None:
+            # Nothing selected: arrows pick the top row, bigger jumps start from it.
+            target = self.first if abs(delta) == 1 else self.first + delta
+        else:
+            target = current + delta
+        target = max(0, min(self.total - 1, target))
+
+        # Scroll just enough to bring the target row into view.
+        visible = self.visible_rows()
+        if target < self.first:
+            self.first = target
+        elif target >= self.first + visible:
+            self.first = target - visible + 1
+        self.render()
+
+        children = self.tree.get_children()
+        position = target - self.first
+        if 0 <= position < len(children) and not children[position].startswith("loading-"):
+            self.selected_id = int(children[position])
+            self._selected_index = target
+            self.tree.selection_set(children[position])
+            self.tree.focus(children[position])
+            self._on_select()
+        return "break"
+
+
+def _fetch_task_window(
+    filters: tuple[str | None, int | None, str | None],
+    first: int,
+    visible: int,
+    page_size: int,
+) -> tuple[int, int, dict[int, list[tuple[int, str, str, str | None, str]]]]:
+    # Count plus the pages covering the window, in one round trip so a reload
+    # swaps the list in without flashing placeholder rows.
+    status, assignee_id, title_query = filters
+    total = db.count_tasks(status, assignee_id, title_query)
+    first = max(0, min(first, total - visible))
+    pages = {}
+    for page_index in range(first // page_size, (first + visible - 1) // page_size + 1):
+        pages[page_index] = db.list_tasks_page(
+            status, assignee_id, title_query, limit=page_size, offset=page_index * page_size
+        )
+    return total, first, pages
+
+
+class DbWorker:
+    # Runs db calls on a background thread so a slow query or a locked
+    # database never freezes the window. Results come back on the Tk thread
+    # by polling with after(). Calls can share a channel: a newer call on the
+    # same channel supersedes the older one, which is cancelled if it has not
+    # started yet and has its result dropped otherwise.
+    POLL_MS = 20
+
+    def __init__(self, root: tk.Misc) -> None:
+        self._root = root
+        # One thread keeps writes in submission order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="taskflow-db")
+        self._results: queue.SimpleQueue = queue.SimpleQueue()
+        self._latest: dict[str, Future] = {}
+        self._outstanding = 0
+        self._poll_id: str | None = None
+        self._closed = False
+
+    def submit(
+        self,
+        channel: str | None,
+        fn: Callable,
+        *args: object,
+        on_done: Callable[[object], None] | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+        **kwargs: object,
+    ) -> Future:
+        # channel=None means the call is never superseded (writes).
+        if channel is not None:
+            previous = self._latest.get(channel)
+            if previous is not None:
+                previous.cancel()
+
+        future = self._executor.submit(fn, *args, **kwargs)
+        if channel is not None:
+            self._latest[channel] = future
+        self._outstanding += 1
+        future.add_done_callback(
+            lambda done: self._results.put((channel, done, on_done, on_error))
+        )
+        self._schedule_poll()
+        return future
+
+    def _schedule_poll(self) -> None:
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self._root.after(self.POLL_MS, self._poll)
+
+    def _poll(self) -> None:
+        self._poll_id = None
+        while True:
+            try:
+                channel, future, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if channel is not None:
+                if self._latest.get(channel) is not future:
+                    continue  # superseded
+                del self._latest[channel]
+            if future.cancelled():
+                continue
+            exc = future.exception()
+            if exc is not None:
+                if on_error is not None:
+                    on_error(exc)
+                else:
+                    messagebox.showerror("Error", str(exc))
+            elif on_done is not None:
+                on_done(future.result())
+
+        if self._outstanding > 0:
+            self._schedule_poll()
+
+    def shutdown(self) -> None:
+        # Drop queued work and wait for the call in progress to finish.
+        self._closed = True
+        if self._poll_id is not None:
+            try:
+                self._root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=True, cancel_futures=True)
 
 
 class TaskDialog(tk.Toplevel):
+    # accepted due date formats (local time); the first is used for display
+    DUE_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d")
+
     def __init__(
         self,
         parent: tk.Tk,
@@ -315,10 +939,12 @@ class TaskDialog(tk.Toplevel):
         title_text: str | None = None,
         description: str | None = None,
         assignee_id: int | None = None,
+        priority: int = db.DEFAULT_PRIORITY,
+        due_at: str | None = None,
     ) -> None:
         super().__init__(parent)
         self.title(title)
-        self.result: tuple[str, str | None, int | None] | None = None
+        self.result: tuple[str, str | None, int | None, int, datetime | None] | None = None
         self.assignee_map = assignee_map
         self.resizable(False, False)
 
@@ -335,8 +961,21 @@ class TaskDialog(tk.Toplevel):
         self.assignee_combo.grid(row=2, column=1, padx=10, pady=8)
         self.assignee_combo.current(0)
 
+        ttk.Label(self, text="Priority:").grid(row=3, column=0, sticky=tk.W, padx=10, pady=8)
+        self.priority_combo = ttk.Combobox(self, values=list(db.PRIORITIES), state="readonly", width=37)
+        self.priority_combo.grid(row=3, column=1, padx=10, pady=8)
+        self.priority_combo.current(priority)
+
+        # Local time; stored as UTC.
+        ttk.Label(self, text="Due:").grid(row=4, column=0, sticky=tk.W, padx=10, pady=8)
+        self.due_entry = ttk.Entry(self, width=40)
+        self.due_entry.grid(row=4, column=1, padx=10, pady=8)
+        if due_at:
+            local = _parse_db_time(due_at).astimezone()
+            self.due_entry.insert(0, local.strftime(self.DUE_FORMATS[0]))
+
         button_frame = ttk.Frame(self)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=10)
         ttk.Button(button_frame, text="Cancel", command=self._cancel).pack(side=tk.RIGHT, padx=5)
         ttk.Button(button_frame, text="Save", command=self._save).pack(side=tk.RIGHT)
 
@@ -367,7 +1006,21 @@ class TaskDialog(tk.Toplevel):
         assignee_label = self.assignee_combo.get()
         assignee_id = self.assignee_map.get(assignee_label)
 
-        self.result = (title, description, assignee_id)
+        due_text = self.due_entry.get().strip()
+        due_at = None
+        if due_text:
+            for due_format in self.DUE_FORMATS:
+                try:
+                    # astimezone() on a naive time reads it as local time.
+                    due_at = datetime.strptime(due_text, due_format).astimezone()
+                    break
+                except ValueError:
+                    continue
+            else:
+                messagebox.showerror("Error", "Due date must look like 2025-03-01 17:00.", parent=self)
+                return
+
+        self.result = (title, description, assignee_id, self.priority_combo.current(), due_at)
         self.destroy()
 
     def _cancel(self) -> None:
@@ -375,5 +1028,15 @@ class TaskDialog(tk.Toplevel):
 
 
 def main() -> None:
+    # Opt-in query metrics (TASKFLOW_METRICS=<file>); see taskflow.instrument.
+    instrument.enable_from_env()
+    # Opt-in periodic snapshots (TASKFLOW_SNAPSHOT_MINUTES); see taskflow.backup.
+    snapshots = backup.start_from_env()
     app = TaskFlowApp()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        if snapshots is not None:
+            snapshots.stop()
+        app.worker.shutdown()
+        db.close_pool()
@@ -0,0 +1,16 @@
+import pytest
+
+from taskflow import db
+
+
+# point taskflow.db at an empty database in a temporary folder
+@pytest.fixture
+def scratch_db(tmp_path):
+    old_dir, old_path = db.DATA_DIR, db.DB_PATH
+    db.DATA_DIR = tmp_path
+    db.DB_PATH = tmp_path / "taskflow.db"
+    try:
+        yield db.DB_PATH
+    finally:
+        db.close_pool()
+        db.DATA_DIR, db.DB_PATH = old_dir, old_path
@@ -0,0 +1,126 @@
+import pytest
+
+from taskflow import db
+
+# Everything done before this counts as old enough to archive.
+CUTOFF = "2999-01-01"
+
+
+def _archived() -> dict[int, tuple]:
+    # id -> (title, status, assignee_id) of every archived task
+    with db.connection() as conn:
+        if not db._use_archive(conn):
+            return {}
+        rows = conn.execute("SELECT id, title, status, assignee_id FROM archive.tasks").fetchall()
+    return {task_id: tuple(rest) for task_id, *rest in rows}
+
+
+def _ids(rows: list) -> list[int]:
+    return [row[0] for row in rows]
+
+
+def _seed() -> tuple[int, list[int]]:
+    ann = db.add_user("ann")
+    task_ids = db.add_tasks_many([(f"task {index}", None, ann) for index in range(5)])
+    db.update_status_many([(task_id, "done") for task_id in task_ids[:3]])
+    return ann, task_ids
+
+
+def test_archive_moves_done_tasks(scratch_db):
+    _ann, task_ids = _seed()
+    assert not db.archive_path().exists()
+    assert db.archive_done_tasks("2000-01-01") == 0  # nothing that old
+
+    assert db.archive_done_tasks(CUTOFF, batch_size=2) == 3
+    assert sorted(_archived()) == task_ids[:3]
+    assert _ids(db.list_tasks()) == task_ids[3:]
+    assert [db.get_task(task_id) for task_id in task_ids[:3]] == [None, None, None]
+    assert db.task_stats().total == 2
+
+    # include_archived reads both files, still in (created_at, id) order
+    assert _ids(db.list_tasks(include_archived=True)) == task_ids
+    assert _ids(db.list_tasks(status="done", include_archived=True)) == task_ids[:3]
+    assert db.count_tasks(include_archived=True) == 5
+    assert db.count_tasks(status="done", include_archived=True) == 3
+    assert db.count_tasks(title_query="task 1", include_archived=True) == 1
+
+    assert db.archive_done_tasks(CUTOFF) == 0  # running again is a no-op
+
+
+def test_delete_user_clears_archived_assignee(scratch_db):
+    ann, task_ids = _seed()
+    bob = db.add_user("bob")
+    db.update_task_assignee(task_ids[0], bob)
+    db.update_task_status(task_ids[0], "done")
+    db.archive_done_tasks(CUTOFF)
+
+    assert db.delete_user(ann)
+    archived = _archived()
+    assert [archived[task_id][2] for task_id in task_ids[:3]] == [bob, None, None]
+    assert [row[3] for row in db.list_tasks(include_archived=True)] == ["bob"] + [None] * 4
+
+
+def test_task_changed_between_copy_and_delete_stays_live(scratch_db, monkeypatch):
+    _ann, task_ids = _seed()
+    changed = task_ids[0]
+    commit_one = db._commit_one
+    calls = []
+
+    def edit_after_first_copy(conn, sql, params):
+        result = commit_one(conn, sql, params)
+        calls.append(sql)
+        if len(calls) == 1:
+            # someone reopens a task after step 1 copied it
+            db.update_task_status(changed, "todo")
+        return result
+
+    monkeypatch.setattr(db, "_commit_one", edit_after_first_copy)
+    assert db.archive_done_tasks(CUTOFF) == 2
+
+    assert sorted(_archived()) == task_ids[1:3]
+    assert db.get_task(changed)[3] == "todo"
+    assert _ids(db.list_tasks(include_archived=True)) == task_ids
+
+
+def test_edited_task_is_archived_with_its_new_values(scratch_db, monkeypatch):
+    _ann, task_ids = _seed()
+    changed = task_ids[0]
+    commit_one = db._commit_one
+    calls = []
+
+    def edit_after_first_copy(conn, sql, params):
+        result = commit_one(conn, sql, params)
+        calls.append(sql)
+        if len(calls) == 1:
+            db.update_task(changed, "renamed", None, None)
+        return result
+
+    monkeypatch.setattr(db, "_commit_one", edit_after_first_copy)
+    # The stale copy is dropped and the task, still done, moves on the next round.
+    assert db.archive_done_tasks(CUTOFF) == 3
+    assert _archived()[changed] == ("renamed", "done", None)
+    assert db.get_task(changed) is None
+
+
+def test_interrupted_run_leaves_no_duplicates(scratch_db, monkeypatch):
+    _ann, task_ids = _seed()
+    commit_one = db._commit_one
+
+    def crash_after_copy(conn, sql, params):
+        if "DELETE FROM main.tasks" in sql:
+            raise KeyboardInterrupt  # the process dies between step 1 and step 2
+        return commit_one(conn, sql, params)
+
+    monkeypatch.setattr(db, "_commit_one", crash_after_copy)
+    with pytest.raises(KeyboardInterrupt):
+        db.archive_done_tasks(CUTOFF)
+    monkeypatch.setattr(db, "_commit_one", commit_one)
+    assert sorted(_archived()) == task_ids[:3]  # copied, but still live too
+
+    # One of them is reopened, so it no longer qualifies for archiving.
+    db.update_task_status(task_ids[0], "doing")
+    assert db.archive_done_tasks(CUTOFF) == 2
+
+    assert sorted(_archived()) == task_ids[1:3]
+    assert _ids(db.list_tasks(include_archived=True)) == task_ids
+    assert db.count_tasks(include_archived=True) == 5
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+from taskflow import backup, db
+from taskflow.migrations import ARCHIVE_MIGRATIONS, LATEST_VERSION, get_version
+
+
+def _rows(path, sql: str) -> list[tuple]:
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def _task_ids(path) -> list[int]:
+    return [row[0] for row in _rows(path, "SELECT id FROM tasks ORDER BY id")]
+
+
+def _seed(count: int = 300) -> list[int]:
+    ann = db.add_user("ann")
+    # long descriptions so the file spans plenty of pages
+    return db.add_tasks_many([(f"task {index}", "x" * 500, ann) for index in range(count)])
+
+
+@pytest.fixture(params=["durable", "fast"])
+def profile(request, scratch_db):
+    old = db.STORAGE_PROFILE
+    db.configure_storage(request.param)
+    try:
+        yield request.param
+    finally:
+        db.close_pool()
+        db.configure_storage(old)
+
+
+def test_backup_sleeps_between_steps(scratch_db, tmp_path):
+    _seed()
+    steps = []
+    started = time.monotonic()
+    backup.backup_database(tmp_path / "copy.db", pages=8, sleep=0.01, progress=lambda *step: steps.append(step))
+    elapsed = time.monotonic() - started
+
+    assert len(steps) >= 5
+    assert steps[-1][0] == steps[-1][1]
+    # one sleep after every step but the last
+    assert elapsed >= (len(steps) - 1) * 0.01
+
+
+def test_writer_keeps_going_during_backup(profile, tmp_path):
+    task_ids = _seed()
+    db.update_status_many([(task_id, "done") for task_id in task_ids[:100]])
+    db.archive_done_tasks("2999-01-01")
+    dest = tmp_path / "copies" / "copy.db"
+
+    stop = threading.Event()
+    written = []
+
+    def writer():
+        while not stop.is_set():
+            written.append(db.add_task(f"during {len(written)}", None, None))
+            time.sleep(0.002)
+
+    thread = threading.Thread(target=writer)
+    copying = threading.Event()
+
+    def progress(copied, total):
+        copying.set()
+
+    thread.start()
+    try:
+        time.sleep(0.05)
+        before = len(written)
+        backup.backup_database(dest, pages=4, sleep=0.01, progress=progress)
+        during = len(written) - before
+    finally:
+        stop.set()
+        thread.join(timeout=10)
+
+    assert copying.is_set()
+    assert during >= 5  # the writer was not held up for the whole copy
+    for path in (dest, backup.archive_copy_path(dest)):
+        assert _rows(path, "PRAGMA integrity_check") == [("ok",)]
+        assert _rows(path, "PRAGMA journal_mode") == [("delete",)]
+
+    # one point in time: every seeded task is in exactly one of the two
+    # copies, and the copied writes are a prefix of what the writer did
+    live = _task_ids(dest)
+    archived = _task_ids(backup.archive_copy_path(dest))
+    assert archived == task_ids[:100]
+    assert live[:200] == task_ids[100:]
+    assert live[200:] == written[: len(live) - 200]
+
+
+def test_restore_without_archive(scratch_db, tmp_path):
+    task_ids = _seed(3)
+    snapshot = backup.backup_database(tmp_path / "snap" / "taskflow-1.db", sleep=0)
+    assert not backup.archive_copy_path(snapshot).exists()
+
+    target = backup.restore(snapshot, tmp_path / "restored")
+    assert target == tmp_path / "restored" / "taskflow.db"
+    assert _task_ids(target) == task_ids
+    assert not backup.archive_copy_path(target).exists()
+    with closing(sqlite3.connect(target)) as conn:
+        assert get_version(conn) == LATEST_VERSION
+
+
+def test_restore_with_archive(scratch_db, tmp_path):
+    task_ids = _seed(3)
+    db.update_task_status(task_ids[0], "done")
+    db.archive_done_tasks("2999-01-01")
+    snapshot = backup.backup_database(tmp_path / "snap" / "taskflow-1.db", sleep=0)
+
+    target = backup.restore(snapshot, tmp_path / "restored")
+    assert _task_ids(target) == task_ids[1:]
+    target_archive = backup.archive_copy_path(target)
+    assert _task_ids(target_archive) == task_ids[:1]
+    with closing(sqlite3.connect(target_archive)) as conn:
+        assert get_version(conn) == ARCHIVE_MIGRATIONS[-1][0]
+
+    # the restored folder works as a data folder, archive included
+    db.close_pool()
+    db.DATA_DIR, db.DB_PATH = target.parent, target
+    assert db.count_tasks(include_archived=True) == 3
+
+
+def test_restore_refuses_existing_database_and_bad_files(scratch_db, tmp_path):
+    _seed(3)
+    snapshot = backup.backup_database(tmp_path / "snap" / "taskflow-1.db", sleep=0)
+
+    with pytest.raises(ValueError, match="already holds a database"):
+        backup.restore(snapshot, scratch_db.parent)
+    with pytest.raises(ValueError, match="no backup file"):
+        backup.restore(tmp_path / "missing.db", tmp_path / "restored")
+
+    junk = tmp_path / "junk.db"
+    junk.write_bytes(b"not a database" * 100)
+    with pytest.raises(ValueError, match="not a TaskFlow backup"):
+        backup.restore(junk, tmp_path / "restored")
+    # a failed restore leaves nothing behind
+    assert list((tmp_path / "restored").iterdir()) == []
+
+
+def test_snapshots_rotate_with_their_archives(scratch_db, tmp_path):
+    task_ids = _seed(3)
+    db.update_task_status(task_ids[0], "done")
+    db.archive_done_tasks("2999-01-01")
+    directory = tmp_path / "snaps"
+
+    taken = [backup.take_snapshot(directory, keep=2, sleep=0) for _ in range(4)]
+    assert backup.list_snapshots(directory) == taken[2:]
+    assert sorted(directory.iterdir()) == sorted(
+        path for snapshot in taken[2:] for path in (snapshot, backup.archive_copy_path(snapshot))
+    )
+
+    assert backup.rotate_snapshots(directory, keep=1) == taken[2:3]
+    assert backup.list_snapshots(directory) == taken[3:]
+    assert not backup.archive_copy_path(taken[2]).exists()
+    with pytest.raises(ValueError, match="keep"):
+        backup.rotate_snapshots(directory, keep=0)
@@ -0,0 +1,63 @@
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Startup-time budget check for the headless modules.
+# Each module is imported in a fresh interpreter under `python -X importtime`
+# and its cumulative import time is compared with the budget. It also fails if
+# importing it loads a GUI module, which breaks on servers without Tk.
+# TASKFLOW_IMPORT_BUDGET_SCALE multiplies every budget, e.g. 2 on a slow CI machine.
+
+# module -> budget in milliseconds (cumulative, including everything it imports)
+BUDGETS_MS = {
+    "taskflow": 5.0,
+    "taskflow.db": 60.0,
+    "taskflow.cli": 80.0,
+    "taskflow.aio": 100.0,
+}
+# modules the headless code must never pull in
+FORBIDDEN = ("tkinter", "_tkinter", "taskflow.ui")
+# measured imports per module
+RUNS = 5
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def import_profile(module: str) -> dict[str, int]:
+    # Import `module` in a fresh interpreter; return {module: cumulative µs}
+    # for everything it imported.
+    env = dict(os.environ)
+    # Let the first run write .pyc files so we time imports, not compiling.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+@pytest.mark.parametrize("module", BUDGETS_MS)
+def test_import_time(module):
+    import_profile(module)  # warm-up: byte-compile and fill the OS file cache
+    profiles = [import_profile(module) for _ in range(RUNS)]
+
+    loaded = [name for name in FORBIDDEN if name in profiles[0]]
+    assert not loaded, f"importing {module} loads " + ", ".join(loaded)
+
+    median_ms = statistics.median(profile[module] for profile in profiles) / 1000
+    limit_ms = BUDGETS_MS[module] * float(os.environ.get("TASKFLOW_IMPORT_BUDGET_SCALE", "1"))
+    assert median_ms <= limit_ms, f"cold import takes {median_ms:.1f} ms, budget is {limit_ms:.0f} ms"
@@ -0,0 +1,134 @@
+import re
+import sqlite3
+
+from taskflow import db
+
+# EXPLAIN QUERY PLAN regression check for the queries in taskflow.db.
+# It runs every public db function against a scratch database, records the
+# statements they execute (sqlite3 trace callback), and explains each one.
+
+# Statements that never touch table data.
+_SKIP_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "CREATE", "ALTER", "SAVEPOINT", "RELEASE")
+
+# SQLite runs this lookup internally for ON DELETE SET NULL when a user is
+# deleted; the trace callback never sees it, so we list it explicitly.
+_EXTRA_STATEMENTS = ["SELECT 1 FROM tasks WHERE assignee_id = 1"]
+
+# Statements allowed a full table scan: they read every row on purpose, or
+# no index can serve them. Anything else that scans a table is a problem,
+# with or without a WHERE clause (e.g. MAX and MIN side by side in one
+# SELECT scan the table; each alone is a seek). The trace callback sees the
+# SQL with its parameters filled in, so these match the expanded text.
+_FULL_SCANS = [
+    # list_users / user_directory load the whole (small) users table.
+    re.compile(r"SELECT id, name FROM users ORDER BY id"),
+    # task_stats reads every trigger-maintained counter row.
+    re.compile(r"SELECT 'status', status, count FROM task_status_counts UNION ALL .* FROM task_assignee_counts"),
+    # count_tasks with only a title search: a substring LIKE has to read every title.
+    re.compile(r"SELECT COUNT\(\*\) FROM (archive\.tasks AS )?tasks WHERE tasks\.title LIKE '%.*%'"),
+]
+
+
+def _run_workload() -> None:
+    # Call each public function at least once, with every list_tasks filter combination.
+    user_id = db.add_user("plan check")
+    other_id = db.add_user("plan check 2")
+    task_id = db.add_task("plan check task", "description", user_id)
+
+    db.list_users()
+    db.user_directory()
+    for status in (None, "todo"):
+        for assignee_id in (None, user_id):
+            for title_query in (None, "plan"):
+                db.list_tasks(status, assignee_id, title_query)
+                db.list_tasks_page(status, assignee_id, title_query, limit=10)
+                db.list_tasks_page(status, assignee_id, title_query, after=("2000-01-01", 1), limit=10)
+                list(db.iter_tasks(status, assignee_id, title_query))
+                list(db.iter_task_details(status, assignee_id, title_query))
+                db.count_tasks(status, assignee_id, title_query)
+                db.get_task_row(task_id, status, assignee_id, title_query)
+    db.task_stats()
+    db.list_tasks_by_statuses(["todo"])
+    db.list_tasks_by_statuses(["todo", "doing"])
+    db.get_task(task_id)
+    db.get_task_record(task_id)
+    db.list_user_records()
+    for status in (None, "todo"):
+        db.list_task_records(status, user_id)
+        db.list_tasks_columnar(status, None, "plan")
+
+    db.update_task_status(task_id, "doing")
+    db.update_task_assignee(task_id, other_id)
+    db.update_task(task_id, "plan check task (renamed)", None, user_id)
+    db.update_task(task_id, "plan check task (renamed)", None, user_id, 1, "2030-06-01")
+    db.add_task("scheduled", None, user_id, 3, "2030-01-01")
+    db.set_task_schedule(task_id, 2, "2030-01-01T12:00:00")
+    db.get_task_schedule(task_id)
+    db.next_tasks(user_id)
+    db.next_tasks(None, limit=5)
+    db.due_before("2031-01-01")
+    db.overdue_tasks()
+
+    bulk_ids = db.add_tasks_many([("bulk 1", None, user_id), ("bulk 2", None, None)])
+    db.update_status_many([(bulk_id, "done") for bulk_id in bulk_ids])
+    db.delete_tasks_many(bulk_ids)
+    db.import_tasks([("imported", None, "done", user_id, "2024-01-01T09:30:00", "2030-01-01", 3)])
+
+    for status in (None, "done"):
+        for assignee_id in (None, user_id):
+            for title_query in (None, "plan"):
+                db.list_tasks(status, assignee_id, title_query, include_archived=True)
+                db.count_tasks(status, assignee_id, title_query, include_archived=True)
+    db.update_task_status(task_id, "done")
+    db.archive_done_tasks("2999-01-01")
+    db.archive_done_tasks("2999-01-01")  # now with an archive to purge stale copies from
+
+    db.delete_task(task_id)
+    db.delete_user(other_id)
+
+    db.changes_since(db.change_seq() - 5)
+    db.changes_since(0, max_entries=1)
+    db.compact_changes(keep=3)
+
+
+def collect_statements() -> list[str]:
+    # Run the workload on one traced connection and return the distinct statements.
+    seen: dict[str, None] = {}
+
+    def trace(sql: str) -> None:
+        statement = " ".join(sql.split())
+        if statement and not statement.upper().startswith(_SKIP_PREFIXES):
+            seen.setdefault(statement, None)
+
+    # Nested db calls on this thread reuse the connection we hold here.
+    with db.connection() as conn:
+        conn.set_trace_callback(trace)
+        try:
+            _run_workload()
+        finally:
+            conn.set_trace_callback(None)
+
+    for statement in _EXTRA_STATEMENTS:
+        seen.setdefault(statement, None)
+    return list(seen)
+
+
+def plan_problems(conn: sqlite3.Connection, sql: str) -> list[str]:
+    # A temp B-tree sort is always a problem. A full table scan (SCAN without
+    # an index) is only acceptable for the statements in _FULL_SCANS.
+    problems = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        detail = row[3]
+        if "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN ") and "INDEX" not in detail and detail != "SCAN CONSTANT ROW":
+            if not any(pattern.fullmatch(sql) for pattern in _FULL_SCANS):
+                problems.append(detail)
+    return problems
+
+
+def test_query_plans(scratch_db):
+    statements = collect_statements()
+    with db.connection() as conn:
+        problems = [f"{problem}\n    in: {sql}" for sql in statements for problem in plan_problems(conn, sql)]
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,375 @@
+import inspect
+import io
+import re
+import sqlite3
+from contextlib import redirect_stdout
+from itertools import product
+from typing import Callable
+
+import pytest
+
+from taskflow import db
+from taskflow.queries import DEFAULT_PRIORITY, UNCHANGED
+from taskflow.sharded import ShardedDatabase
+from taskflow.storage import METHODS, MemoryStorage, SqliteStorage, Storage
+
+# Conformance checks for storage backends (see taskflow.storage).
+# Every check runs against a fresh, empty store and compares results with
+# what taskflow.db does: ids, ordering, validation errors, printed warnings
+# and ON DELETE SET NULL. Results are checked against the contract, not
+# against timestamps, so the checks do not depend on the clock. A new
+# backend only needs an entry in the store fixture below.
+
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$")
+_FILTER_VALUES = (
+    (None, "todo", " DONE "),
+    (None, 1, 2),
+    (None, "report", "REP", "r_p%t", "   ", "é"),
+)
+
+
+def _expect(actual: object, expected: object, what: str) -> None:
+    assert actual == expected, f"{what}: got {actual!r}, expected {expected!r}"
+
+
+def _raises(error: type[BaseException], call: Callable[[], object], what: str) -> None:
+    try:
+        call()
+    except error:
+        return
+    except Exception as exc:
+        raise AssertionError(f"{what}: raised {type(exc).__name__}, expected {error.__name__}") from exc
+    raise AssertionError(f"{what}: did not raise {error.__name__}")
+
+
+def _printed(call: Callable[[], object]) -> tuple[object, str]:
+    out = io.StringIO()
+    with redirect_stdout(out):
+        result = call()
+    return result, out.getvalue()
+
+
+def _warning(assignee_id: int) -> str:
+    return f"Warning: no user with id {assignee_id}; storing assignee as NULL\n"
+
+
+def _sorted_rows(rows: list) -> list:
+    return sorted(rows, key=lambda row: (row[4], row[0]))
+
+
+def _seed(store: Storage) -> tuple[int, int, list[int]]:
+    ann = store.add_user("ann")
+    bob = store.add_user("bob")
+    titles = ["Write report", "report review", "REPORT draft", "rXpYt", "Émile notes", "émile todo", "plan"]
+    task_ids = store.add_tasks_many(
+        [(title, None, (ann, bob, None)[index % 3]) for index, title in enumerate(titles)]
+    )
+    store.update_task_status(task_ids[1], "doing")
+    store.update_task_status(task_ids[2], "done")
+    store.update_task_status(task_ids[5], "done")
+    return ann, bob, task_ids
+
+
+# --- checks ----------------------------------------------------------------
+# Each takes a fresh store and fails with an AssertionError on a difference.
+
+
+def check_users(store: Storage) -> None:
+    ann = store.add_user("  ann ")
+    bob = store.add_user("bob")
+    _expect(ann != bob, True, "user ids are distinct")
+    _expect(store.list_users(), [(ann, "ann"), (bob, "bob")], "list_users")
+    _expect(store.user_directory(), {ann: "ann", bob: "bob"}, "user_directory")
+    _raises(ValueError, lambda: store.add_user("   "), "add_user with a blank name")
+    _raises(sqlite3.IntegrityError, lambda: store.add_user("ann"), "add_user with a taken name")
+    _expect(store.delete_user(ann), True, "delete_user")
+    _expect(store.delete_user(ann), False, "delete_user twice")
+    carl = store.add_user("carl")
+    _expect(carl not in (ann, bob), True, "user ids are not reused")
+    _expect(store.list_users(), sorted([(bob, "bob"), (carl, "carl")]), "list_users after delete")
+
+
+def check_add_and_get_task(store: Storage) -> None:
+    ann = store.add_user("ann")
+    task_id = store.add_task("  Write report ", "  ", ann)
+    task = store.get_task(task_id)
+    _expect(task[:5], (task_id, "Write report", None, "todo", ann), "get_task")
+    _expect(bool(_TIMESTAMP_RE.match(task[5])), True, "created_at format")
+    _expect(task[6], None, "updated_at of a new task")
+    _expect(store.get_task(task_id + 1000), None, "get_task of a missing id")
+
+    other, printed = _printed(lambda: store.add_task("unknown user", "details", 99))
+    _expect(printed, _warning(99), "warning for an unknown assignee")
+    _expect(store.get_task(other)[2:5], ("details", "todo", None), "unknown assignee is stored as NULL")
+    _expect(other > task_id, True, "task ids increase")
+
+    _raises(ValueError, lambda: store.add_task("  ", None, None), "add_task with a blank title")
+    _raises(ValueError, lambda: store.add_task("title", None, 0), "add_task with assignee id 0")
+
+
+def check_update_task(store: Storage) -> None:
+    ann = store.add_user("ann")
+    task_id = store.add_task("task", None, None)
+
+    _expect(store.update_task_status(task_id, " DONE "), True, "update_task_status")
+    task = store.get_task(task_id)
+    _expect(task[3], "done", "status is normalized")
+    _expect(bool(_TIMESTAMP_RE.match(task[6] or "")), True, "updated_at is set")
+    _expect(store.update_task_status(task_id + 1000, "done"), False, "update_task_status of a missing id")
+    _raises(ValueError, lambda: store.update_task_status(task_id, "later"), "update_task_status with a bad status")
+
+    _expect(store.update_task_assignee(task_id, ann), True, "update_task_assignee")
+    _expect(store.get_task(task_id)[4], ann, "assignee after update_task_assignee")
+    changed, printed = _printed(lambda: store.update_task_assignee(task_id, 99))
+    _expect((changed, printed), (True, _warning(99)), "update_task_assignee to an unknown user")
+    _expect(store.get_task(task_id)[4], None, "unknown assignee is stored as NULL")
+    _expect(store.update_task_assignee(task_id + 1000, None), False, "update_task_assignee of a missing id")
+    _raises(ValueError, lambda: store.update_task_assignee(task_id, -1), "update_task_assignee with a bad id")
+
+    _expect(store.update_task(task_id, " New title ", " text ", ann), True, "update_task")
+    _expect(store.get_task(task_id)[1:5], ("New title", "text", "done", ann), "fields after update_task")
+    _expect(store.update_task(task_id + 1000, "x", None, None), False, "update_task of a missing id")
+    _raises(ValueError, lambda: store.update_task(task_id, " ", None, None), "update_task with a blank title")
+
+
+def check_schedule(store: Storage) -> None:
+    plain = store.add_task("plain", None, None)
+    _expect(store.get_task(plain)[7:], (None, DEFAULT_PRIORITY), "default due_at and priority")
+    task_id = store.add_task("planned", None, None, 3, "2030-01-02T10:30:00+02:00")
+    _expect(store.get_task(task_id)[7:], ("2030-01-02 08:30:00", 3), "due_at is stored as UTC text")
+
+    # each schedule field changes on its own; UNCHANGED (the default) keeps it
+    _expect(store.update_task(task_id, "planned", None, None), True, "update_task without a schedule")
+    _expect(store.get_task(task_id)[7:], ("2030-01-02 08:30:00", 3), "schedule after update_task without one")
+    store.update_task(task_id, "planned", None, None, due_at="2031-05-06")
+    _expect(store.get_task(task_id)[7:], ("2031-05-06 00:00:00", 3), "only due_at changed")
+    store.update_task(task_id, "planned", None, None, priority=0)
+    _expect(store.get_task(task_id)[7:], ("2031-05-06 00:00:00", 0), "only priority changed")
+    store.update_task(task_id, "planned", None, None, UNCHANGED, None)
+    _expect(store.get_task(task_id)[7:], (None, 0), "due_at None clears the deadline")
+
+    _raises(ValueError, lambda: store.add_task("x", None, None, 4), "add_task with a bad priority")
+    _raises(ValueError, lambda: store.add_task("x", None, None, 1, "soon"), "add_task with a bad due_at")
+    _raises(ValueError, lambda: store.update_task(task_id, "x", None, None, priority=-1), "update_task, bad priority")
+    _raises(ValueError, lambda: store.update_task(task_id, "x", None, None, due_at="soon"), "update_task, bad due_at")
+    _expect(store.get_task(task_id)[1], "planned", "a rejected update_task changes nothing")
+
+
+def check_delete_task(store: Storage) -> None:
+    first = store.add_task("first", None, None)
+    second = store.add_task("second", None, None)
+    _expect(store.delete_task(second), True, "delete_task")
+    _expect(store.delete_task(second), False, "delete_task twice")
+    _expect(store.get_task(second), None, "get_task after delete")
+    third = store.add_task("third", None, None)
+    _expect(third not in (first, second), True, "task ids are not reused")
+    _expect([row[0] for row in store.list_tasks()], [first, third], "list_tasks after delete")
+
+
+def check_delete_user_sets_null(store: Storage) -> None:
+    ann, bob, task_ids = _seed(store)
+    before = {task_id: store.get_task(task_id) for task_id in task_ids}
+    stats = store.task_stats()
+    _expect(store.delete_user(ann), True, "delete_user")
+    for task_id, task in before.items():
+        expected = task[:4] + (None if task[4] == ann else task[4],) + task[5:]
+        # ON DELETE SET NULL leaves updated_at alone
+        _expect(store.get_task(task_id), expected, f"task {task_id} after its user was deleted")
+    _expect(store.count_tasks(assignee_id=ann), 0, "count_tasks for the deleted user")
+    _expect(
+        store.task_stats(),
+        db.TaskStats(
+            stats.total,
+            stats.by_status,
+            {bob: stats.by_assignee[bob]},
+            stats.unassigned + stats.by_assignee[ann],
+        ),
+        "task_stats after delete_user",
+    )
+    _expect([row[3] for row in store.list_tasks(assignee_id=bob)], ["bob"] * stats.by_assignee[bob], "names")
+    _expect(all(row[3] in (None, "bob") for row in store.list_tasks()), True, "no row shows the deleted user")
+
+
+def check_list_tasks(store: Storage) -> None:
+    ann, bob, task_ids = _seed(store)
+    everything = store.list_tasks()
+    _expect(sorted(row[0] for row in everything), sorted(task_ids), "list_tasks returns every task")
+    _expect(everything, _sorted_rows(everything), "list_tasks order is (created_at, id)")
+    names = {ann: "ann", bob: "bob", None: None}
+    _expect(
+        [row[3] for row in everything],
+        [names[store.get_task(row[0])[4]] for row in everything],
+        "assignee names",
+    )
+
+    # SQLite LIKE: ASCII letters ignore case, other letters do not; % and _ are wildcards.
+    def like(query: str, title: str) -> bool:
+        pattern = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in query)
+        return re.search(pattern, title, re.ASCII | re.IGNORECASE | re.DOTALL) is not None
+
+    for status, assignee_id, title_query in product(*_FILTER_VALUES):
+        assignee = None if assignee_id is None else (ann, bob)[assignee_id - 1]
+        wanted_status = status.strip().lower() if status else None
+        wanted_query = title_query.strip() if title_query else None
+        expected = [
+            row
+            for row in everything
+            if (wanted_status is None or row[2] == wanted_status)
+            and (assignee is None or store.get_task(row[0])[4] == assignee)
+            and (not wanted_query or like(wanted_query, row[1]))
+        ]
+        label = f"list_tasks({status!r}, {assignee!r}, {title_query!r})"
+        _expect(store.list_tasks(status, assignee, title_query), expected, label)
+        _expect(store.count_tasks(status, assignee, title_query), len(expected), "count_tasks for " + label)
+        _expect(list(store.iter_tasks(status, assignee, title_query, chunk_size=2)), expected, "iter_tasks for " + label)
+        for row in everything:
+            _expect(
+                store.get_task_row(row[0], status, assignee, title_query),
+                row if row in expected else None,
+                f"get_task_row({row[0]}) for " + label,
+            )
+
+    _raises(ValueError, lambda: store.list_tasks("later"), "list_tasks with a bad status")
+    _raises(ValueError, lambda: store.list_tasks(assignee_id=0), "list_tasks with assignee id 0")
+    _raises(ValueError, lambda: store.count_tasks("later"), "count_tasks with a bad status")
+    _raises(ValueError, lambda: store.get_task_row(task_ids[0], "later"), "get_task_row with a bad status")
+    _raises(ValueError, lambda: store.iter_tasks(chunk_size=0), "iter_tasks with chunk size 0")
+    _expect(store.get_task_row(task_ids[-1] + 1000), None, "get_task_row of a missing id")
+
+
+def check_list_tasks_page(store: Storage) -> None:
+    _ann, _bob, _task_ids = _seed(store)
+    everything = store.list_tasks()
+    for offset, limit in product((0, 1, 3, 10), (1, 2, 5, 100)):
+        _expect(
+            store.list_tasks_page(limit=limit, offset=offset),
+            everything[offset : offset + limit],
+            f"list_tasks_page(limit={limit}, offset={offset})",
+        )
+    for index, row in enumerate(everything):
+        _expect(
+            store.list_tasks_page(after=(row[4], row[0]), limit=3),
+            everything[index + 1 : index + 4],
+            f"list_tasks_page after row {index}",
+        )
+    todo = store.list_tasks("todo")
+    _expect(store.list_tasks_page("todo", after=(todo[0][4], todo[0][0]), limit=100), todo[1:], "filtered keyset page")
+    _raises(ValueError, lambda: store.list_tasks_page(limit=0), "list_tasks_page with limit 0")
+    _raises(ValueError, lambda: store.list_tasks_page(offset=-1), "list_tasks_page with a negative offset")
+
+
+def check_list_tasks_by_statuses(store: Storage) -> None:
+    _seed(store)
+    everything = store.list_tasks()
+    _expect(store.list_tasks_by_statuses([]), [], "list_tasks_by_statuses([])")
+    for statuses in (["todo"], ["done", " TODO "], ["doing", "doing"], ["todo", "doing", "done"]):
+        wanted = {status.strip().lower() for status in statuses}
+        _expect(
+            store.list_tasks_by_statuses(statuses),
+            [row for row in everything if row[2] in wanted],
+            f"list_tasks_by_statuses({statuses!r})",
+        )
+    _raises(ValueError, lambda: store.list_tasks_by_statuses(["todo", "later"]), "a bad status")
+
+
+def check_task_stats(store: Storage) -> None:
+    _expect(store.task_stats(), db.TaskStats(0, {"todo": 0, "doing": 0, "done": 0}, {}, 0), "empty task_stats")
+    ann, bob, task_ids = _seed(store)
+    store.update_task_assignee(task_ids[0], None)
+    store.delete_task(task_ids[1])
+    rows = [store.get_task(task_id) for task_id in task_ids]
+    rows = [row for row in rows if row is not None]
+    by_status = {status: sum(1 for row in rows if row[3] == status) for status in ("todo", "doing", "done")}
+    by_assignee = {}
+    for row in rows:
+        if row[4] is not None:
+            by_assignee[row[4]] = by_assignee.get(row[4], 0) + 1
+    unassigned = sum(1 for row in rows if row[4] is None)
+    _expect(store.task_stats(), db.TaskStats(len(rows), by_status, by_assignee, unassigned), "task_stats")
+    for status in ("todo", "doing", "done"):
+        _expect(store.count_tasks(status), by_status[status], f"count_tasks({status!r})")
+    for user_id in (ann, bob):
+        _expect(store.count_tasks(assignee_id=user_id), by_assignee.get(user_id, 0), f"count_tasks(user {user_id})")
+    _expect(store.count_tasks(), len(rows), "count_tasks()")
+
+
+def check_bulk_writes(store: Storage) -> None:
+    ann = store.add_user("ann")
+    _expect(store.add_tasks_many([]), [], "add_tasks_many([])")
+    task_ids, printed = _printed(
+        lambda: store.add_tasks_many([(" a ", " ", ann), ("b", "text", 99), ("c", None, 99), ("d", None, 98)])
+    )
+    _expect(printed, _warning(98) + _warning(99), "one warning per unknown assignee")
+    _expect(len(set(task_ids)), 4, "add_tasks_many ids are distinct")
+    _expect(
+        [store.get_task(task_id)[1:5] for task_id in task_ids],
+        [("a", None, "todo", ann), ("b", "text", "todo", None), ("c", None, "todo", None), ("d", None, "todo", None)],
+        "rows stored by add_tasks_many, in input order",
+    )
+    _raises(ValueError, lambda: store.add_tasks_many([("ok", None, None), (" ", None, None)]), "a blank title")
+    _expect(len(store.list_tasks()), 4, "a failed add_tasks_many stores nothing")
+
+    missing = task_ids[-1] + 1000
+    _expect(store.update_status_many([]), [], "update_status_many([])")
+    _expect(
+        store.update_status_many([(task_ids[0], "done"), (missing, "done"), (task_ids[0], " Doing ")]),
+        [True, False, True],
+        "update_status_many results",
+    )
+    _expect(store.get_task(task_ids[0])[3], "doing", "the last update wins")
+    _raises(ValueError, lambda: store.update_status_many([(task_ids[1], "done"), (task_ids[2], "x")]), "a bad status")
+    _expect(store.get_task(task_ids[1])[3], "todo", "a failed update_status_many changes nothing")
+
+    _expect(store.delete_tasks_many([]), [], "delete_tasks_many([])")
+    _expect(
+        store.delete_tasks_many([task_ids[1], missing, task_ids[1], task_ids[2]]),
+        [True, False, False, True],
+        "delete_tasks_many results",
+    )
+    _expect(sorted(row[0] for row in store.list_tasks()), sorted([task_ids[0], task_ids[3]]), "tasks left")
+
+
+CHECKS: list[Callable[[Storage], None]] = [
+    check_users,
+    check_add_and_get_task,
+    check_update_task,
+    check_schedule,
+    check_delete_task,
+    check_delete_user_sets_null,
+    check_list_tasks,
+    check_list_tasks_page,
+    check_list_tasks_by_statuses,
+    check_task_stats,
+    check_bulk_writes,
+]
+
+
+# --- backends ----------------------------------------------------------------
+
+
+@pytest.fixture(params=["sqlite", "memory", "sharded"])
+def store(request, tmp_path) -> Storage:
+    if request.param == "sqlite":
+        request.getfixturevalue("scratch_db")
+        return SqliteStorage()
+    if request.param == "memory":
+        return MemoryStorage()
+    sharded = ShardedDatabase(tmp_path / "shards", shards=3)
+    request.addfinalizer(sharded.close)
+    return sharded
+
+
+def test_interface(store):
+    missing = [name for name in METHODS if not callable(getattr(store, name, None))]
+    assert not missing, "missing " + ", ".join(missing)
+    # the Storage protocol's parameters, in order (self is already bound);
+    # SQLite-only extras such as include_archived may follow
+    for name in METHODS:
+        expected = list(inspect.signature(getattr(Storage, name)).parameters)[1:]
+        actual = list(inspect.signature(getattr(store, name)).parameters)
+        assert actual[: len(expected)] == expected, f"{name}{inspect.signature(getattr(store, name))}"
+
+
+@pytest.mark.parametrize("check", CHECKS, ids=lambda check: check.__name__.removeprefix("check_"))
+def test_conformance(store, check):
+    check(store)
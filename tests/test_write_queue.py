@@ -0,0 +1,82 @@
+import sqlite3
+import time
+
+import pytest
+
+from taskflow import db
+
+
+def _statuses(task_ids: list[int]) -> list[str]:
+    return [db.get_task(task_id)[3] for task_id in task_ids]
+
+
+def _fail_updates_of(task_id: int) -> None:
+    # make every UPDATE of one task fail inside the writer's transaction
+    with db.connection() as conn:
+        conn.execute(
+            f"""
+            CREATE TRIGGER fail_update BEFORE UPDATE ON tasks WHEN NEW.id = {task_id}
+            BEGIN SELECT RAISE(ABORT, 'update refused'); END
+            """
+        )
+        conn.commit()
+
+
+def test_flush_waits_for_pending_writes(scratch_db):
+    task_ids = db.add_tasks_many([(f"t{index}", None, None) for index in range(3)])
+    # The interval is far longer than the test: only flush() can end the batch.
+    with db.WriteQueue(flush_interval=30) as writes:
+        futures = [writes.update_status(task_id, "done") for task_id in task_ids]
+        started = time.monotonic()
+        writes.flush(timeout=5)
+        assert time.monotonic() - started < 5
+        assert all(future.done() for future in futures)
+        assert [future.result() for future in futures] == [True, True, True]
+        assert _statuses(task_ids) == ["done", "done", "done"]
+
+
+def test_failed_write_fails_its_batch(scratch_db):
+    good, bad = db.add_tasks_many([("good", None, None), ("bad", None, None)])
+    _fail_updates_of(bad)
+    with db.WriteQueue(flush_interval=30) as writes:
+        first = writes.update_status(good, "done")
+        second = writes.update_status(bad, "done")
+        writes.flush(timeout=5)
+        # The batch is one transaction: both changes fail and neither is stored.
+        for future in (first, second):
+            with pytest.raises(sqlite3.IntegrityError, match="update refused"):
+                future.result()
+        assert _statuses([good, bad]) == ["todo", "todo"]
+
+        # The writer thread survives and takes the next batch.
+        later = writes.update_status(good, "doing")
+        writes.flush(timeout=5)
+        assert later.result() is True
+        assert _statuses([good]) == ["doing"]
+
+
+def test_cancelled_write_is_skipped(scratch_db):
+    kept, dropped = db.add_tasks_many([("kept", None, None), ("dropped", None, None)])
+    with db.WriteQueue(flush_interval=30) as writes:
+        first = writes.update_status(kept, "done")
+        second = writes.update_status(dropped, "done")
+        assert second.cancel()
+        writes.flush(timeout=5)
+        assert first.result() is True
+        assert second.cancelled()
+    assert _statuses([kept, dropped]) == ["done", "todo"]
+
+
+def test_close_commits_then_refuses_writes(scratch_db):
+    (task_id,) = db.add_tasks_many([("t", None, None)])
+    writes = db.WriteQueue(flush_interval=30)
+    pending = writes.update_assignee(task_id, None)
+    writes.close(timeout=5)
+    assert pending.result(timeout=0) is True
+
+    with pytest.raises(RuntimeError, match="closed"):
+        writes.update_status(task_id, "done")
+    with pytest.raises(RuntimeError, match="closed"):
+        writes.flush()
+    writes.close()  # closing twice is fine
+    assert _statuses([task_id]) == ["todo"]